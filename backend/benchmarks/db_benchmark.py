@@ -0,0 +1,89 @@
+"""
+SQLite 프로필 벤치마크
+동시 읽기(보드 채팅 기록 조회) N개 + 쓰기(채팅 저장) 1개를 일정 시간 실행하고 초당 처리량 비교
+
+사용법 (backend 폴더에서):
+    python benchmarks/db_benchmark.py --readers 8 --seconds 5 --chats 200
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+import crud_async
+from database import Base, make_async_engine
+from models import ResponseType
+
+
+async def prepare(session_factory, chats: int) -> int:
+    async with session_factory() as db:
+        board = await crud_async.create_board(db, "benchmark")
+        await crud_async.import_chats(db, board.board_id, [
+            {
+                "user_content": f"질문 {i}",
+                "response_type": ResponseType.SUCCESS.value,
+                "code_content": "print('hello')\n" * 20,
+                "wiring_content": "GPIO17 - LED",
+                "steps_content": "1. 연결\n2. 실행",
+            }
+            for i in range(chats)
+        ])
+        return board.board_id
+
+
+async def reader(session_factory, board_id: int, stop: float, counts: dict):
+    while time.perf_counter() < stop:
+        async with session_factory() as db:
+            await crud_async.get_board_chat_history(db, board_id, limit=50)
+        counts["reads"] += 1
+
+
+async def writer(session_factory, board_id: int, stop: float, counts: dict):
+    while time.perf_counter() < stop:
+        async with session_factory() as db:
+            await crud_async.create_chat_transaction(db, board_id, "쓰기", ResponseType.EXCEPTION,
+                                                     plain_text="응답")
+        counts["writes"] += 1
+
+
+async def run_profile(profile: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}", profile=profile)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+        board_id = await prepare(session_factory, args.chats)
+        counts = {"reads": 0, "writes": 0}
+        stop = time.perf_counter() + args.seconds
+        await asyncio.gather(
+            writer(session_factory, board_id, stop, counts),
+            *(reader(session_factory, board_id, stop, counts) for _ in range(args.readers))
+        )
+        await engine.dispose()
+
+    return {name: count / args.seconds for name, count in counts.items()}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--chats", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"읽기 {args.readers}개 + 쓰기 1개, {args.seconds:.0f}초, 채팅 {args.chats}개")
+    for profile in ("default", "production"):
+        result = await run_profile(profile, args)
+        print(f"[{profile:>10}] 읽기 {result['reads']:8.1f}/s  쓰기 {result['writes']:8.1f}/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
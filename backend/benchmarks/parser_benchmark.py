@@ -0,0 +1,174 @@
+"""
+LLM 응답 파서 검증 / 벤치마크
+기록된 응답(log/*.jsonl[.gz]의 ai_response)으로 이전 정규식 파서와 단일 순회 파서를 비교합니다.
+
+검사 항목:
+    - 청크 단위로 나눠 넣은 결과가 한 번에 넣은 결과와 같은지
+    - 이전 파서가 내용을 찾은 섹션을 새 파서가 잃어버리지 않는지
+    - 이전 파서가 빈 문자열로 남긴 섹션을 새 파서가 복구한 수
+    - (예제 사용 시) 펜스 없는 코드의 "# Code" 같은 주석 줄이 코드에 남는지
+
+사용법 (backend 폴더에서):
+    python benchmarks/parser_benchmark.py --log-dir ./log --repeat 20
+"""
+
+import argparse
+import gzip
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models import ResponseType
+from response_parser import SectionParser, parse_llm_response
+
+SECTION_KEYS = ("code_content", "wiring_content", "steps_content")
+
+# 기록된 응답이 없을 때 사용하는 예제 (형식 변형 포함)
+SAMPLE_RESPONSES = [
+    "### CODE\n```python\nfrom gpiozero import LED\nled = LED(17)\nled.on()\n```\n\n"
+    "### WIRING\n```\nraspberrypi rpi at (50, 200)\nrpi.GPIO17 -> bb.1a\n```\n\n"
+    "### STEPS\n```\n1. LED를 꽂으세요\n```",
+    "### WIRING\n```text\nraspberrypi rpi at (50, 200)\n```\n"
+    "### CODE\n```py\nfrom gpiozero import Button\n```\n```bash\npip install gpiozero\n```\n"
+    "### STEPS\n1. 버튼을 꽂으세요\n2. 실행하세요\n",
+    "## Code\n```python3\nprint('hi')\n```\n**WIRING**\n```\nrpi.GPIO2 -> bb.1a\n```\n### STEPS:\n```\n1. 연결\n",
+    "### CODE\nfrom gpiozero import LED\n# Code\nled = LED(17)\n# wiring\nled.on()\n"
+    "### WIRING\nrpi.GPIO17 -> bb.1a\n### STEPS\n1. 실행하세요\n",
+    "안녕하세요! 무엇을 도와드릴까요?",
+    "잘 이해하지 못했어요.",
+]
+
+# 예제 중 기대하는 CODE 섹션 내용 (인덱스: 코드)
+EXPECTED_CODE = {
+    3: "from gpiozero import LED\n# Code\nled = LED(17)\n# wiring\nled.on()",
+}
+
+
+def legacy_parse(response_text: str) -> dict:
+    """이전 구현 (섹션 헤더 3회 검색 + DOTALL 정규식 3회)"""
+    if "### CODE" in response_text and "### WIRING" in response_text and "### STEPS" in response_text:
+        code_match = re.search(r'### CODE\s*```python\s*(.*?)\s*```', response_text, re.DOTALL)
+        wiring_match = re.search(r'### WIRING\s*```\s*(.*?)\s*```', response_text, re.DOTALL)
+        steps_match = re.search(r'### STEPS\s*```\s*(.*?)\s*```', response_text, re.DOTALL)
+        return {
+            'response_type': ResponseType.SUCCESS,
+            'plain_text': None,
+            'code_content': code_match.group(1).strip() if code_match else "",
+            'wiring_content': wiring_match.group(1).strip() if wiring_match else "",
+            'steps_content': steps_match.group(1).strip() if steps_match else ""
+        }
+    return {
+        'response_type': ResponseType.EXCEPTION,
+        'plain_text': response_text.strip(),
+        'code_content': None,
+        'wiring_content': None,
+        'steps_content': None
+    }
+
+
+def load_corpus(log_dir: Path) -> list:
+    responses = []
+    for path in sorted(log_dir.glob("*.jsonl*")):
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get("ai_response"):
+                    responses.append(record["ai_response"])
+    return responses
+
+
+def parse_chunked(text: str, rng: random.Random) -> dict:
+    parser = SectionParser()
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 40)
+        parser.feed(text[position:position + size])
+        position += size
+    return parser.result()
+
+
+def check(corpus: list, seed: int) -> int:
+    rng = random.Random(seed)
+    chunk_mismatches = 0
+    regressions = 0
+    recovered = 0
+    type_changes = 0
+
+    for index, text in enumerate(corpus):
+        new = parse_llm_response(text)
+        old = legacy_parse(text)
+
+        whole = SectionParser()
+        whole.feed(text)
+        if parse_chunked(text, rng) != whole.result():
+            chunk_mismatches += 1
+            print(f"[청크 불일치] #{index}")
+
+        if new["response_type"] != old["response_type"]:
+            type_changes += 1
+            continue
+        if new["response_type"] != ResponseType.SUCCESS:
+            continue
+        for key in SECTION_KEYS:
+            if old[key] and not new[key]:
+                regressions += 1
+                print(f"[섹션 손실] #{index} {key}")
+            elif not old[key] and new[key]:
+                recovered += 1
+
+    print(f"응답 {len(corpus)}개: 청크 불일치 {chunk_mismatches}, 섹션 손실 {regressions}, "
+          f"빈 섹션 복구 {recovered}, 응답 유형 변경 {type_changes}")
+    return chunk_mismatches + regressions
+
+
+def check_expected() -> int:
+    failures = 0
+    for index, code in EXPECTED_CODE.items():
+        parsed = parse_llm_response(SAMPLE_RESPONSES[index])["code_content"]
+        if parsed != code:
+            failures += 1
+            print(f"[코드 불일치] #{index}: {parsed!r}")
+    return failures
+
+
+def bench(name: str, func, corpus: list, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            func(text)
+    elapsed = time.perf_counter() - started
+    per_call = elapsed / (repeat * len(corpus)) * 1e6
+    print(f"[{name:>8}] {per_call:8.1f} µs/응답")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log-dir", type=Path, default=Path("./log"))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.log_dir) if args.log_dir.is_dir() else []
+    if not corpus:
+        print(f"{args.log_dir}에 기록된 응답이 없어 예제 응답을 사용합니다.")
+        corpus = SAMPLE_RESPONSES
+
+    failures = check(corpus, args.seed)
+    if corpus is SAMPLE_RESPONSES:
+        failures += check_expected()
+    bench("legacy", legacy_parse, corpus, args.repeat)
+    bench("single", parse_llm_response, corpus, args.repeat)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
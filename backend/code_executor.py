@@ -2,105 +2,367 @@
 코드 실행 및 패키지 관리 유틸리티
 """
 
+import asyncio
+import codecs
 import os
-import re
-import subprocess
-import tempfile
+import sys
+import json
+import time
+import uuid
 from pathlib import Path
-from typing import List, Tuple, Optional
-from sqlalchemy.orm import Session
+from typing import Callable, List, Optional
 
 import vm_manager
-import crud
+import crud_async
+import database
+import hardware_scheduler
+import import_analyzer
+import script_cache
+import package_provisioner
+from package_provisioner import InstallError
+import interpreter_pool
+from resource_limits import RunResources
+
+RUNTIME_DIR = Path(__file__).resolve().parent / "runtime"  # pigent_runner / pigent_limits
+
+# 기본 설정 (환경변수로 변경 가능)
+RUN_REPORT_DIR = Path(os.getenv("RUN_REPORT_DIR", str(script_cache.SCRIPT_CACHE_DIR / "reports")))
 
 
 def extract_imports(code: str) -> List[str]:
     """
-    Python 코드에서 import 문을 추출하여 패키지 이름 리스트 반환
-    
-    Args:
-        code: Python 코드 문자열
-    
-    Returns:
-        List[str]: 패키지 이름 리스트 (중복 제거)
-    
+    Python 코드에서 import하는 최상위 모듈 이름 리스트 반환 (ast 기반)
+
+    들여쓴 import, "import a, b", try 블록 안의 import, importlib.import_module("x")도 포함합니다.
+
     Examples:
-        >>> extract_imports("import os\\nfrom gpiozero import LED")
-        ['os', 'gpiozero']
-        
+        >>> extract_imports("import os, sys\\nfrom gpiozero import LED")
+        ['gpiozero', 'os', 'sys']
+
         >>> extract_imports("from RPi import GPIO\\nimport time")
         ['RPi', 'time']
     """
-    packages = set()
-    
-    # 1. import xxx 형태
-    import_pattern = r'^import\s+([a-zA-Z_][a-zA-Z0-9_]*)'
-    for match in re.finditer(import_pattern, code, re.MULTILINE):
-        packages.add(match.group(1))
-    
-    # 2. from xxx import yyy 형태
-    from_import_pattern = r'^from\s+([a-zA-Z_][a-zA-Z0-9_]*)'
-    for match in re.finditer(from_import_pattern, code, re.MULTILINE):
-        packages.add(match.group(1))
-    
-    return list(packages)
-
-
-def execute_code(db: Session, code: str) -> Tuple[bool, str, str]:
-    """
-    Slave VM에서 코드 실행 (단일 공유 VM 사용)
-    
-    1. Python 버전 체크 (불일치 시 Slave VM 재생성)
-    2. 임시 파일 생성
-    3. Slave VM의 Python으로 실행
-    4. 결과 반환 및 파일 삭제
-    
+    return sorted(import_analyzer.analyzer.analyze(code).modules)
+
+
+def check_imports(code: str) -> Optional[str]:
+    """
+    설치되지 않은 필수 패키지 확인 (프로세스 시작 전)
+
+    Returns:
+        Optional[str]: 미설치 패키지 안내 메시지 (문제 없으면 None)
+    """
+    return import_analyzer.analyzer.analyze(code).error_message()
+
+
+async def prepare_imports(code: str, on_output: Optional[Callable[[str, str], None]] = None) -> Optional[str]:
+    """
+    실행 전 import 확인 (PACKAGE_AUTO_INSTALL이면 미설치 패키지를 Master VM에 설치)
+
     Args:
-        db: DB 세션
         code: 실행할 Python 코드
-    
+        on_output: 설치 진행 안내를 전달할 콜백 (stream 이름, 텍스트)
+
     Returns:
-        Tuple[bool, str, str]: (성공 여부, stdout, stderr)
+        Optional[str]: 실행할 수 없을 때 안내 메시지 (문제 없으면 None)
     """
-    # 1. Python 버전 체크 및 필요 시 재생성
-    vm_manager.recreate_slave_vm_if_needed()
-    
-    # 2. Python 실행 파일 경로 가져오기
+    analysis = import_analyzer.analyzer.analyze(code)
+    if analysis.ok:
+        return None
+    if not package_provisioner.PACKAGE_AUTO_INSTALL:
+        return analysis.error_message()
+
+    if on_output:
+        on_output("stderr", f">>> 패키지 설치 중: {', '.join(analysis.missing)}\n")
+    try:
+        await package_provisioner.provisioner.install_modules(analysis.missing)
+    except InstallError as e:
+        return str(e)
+    return check_imports(code)
+
+
+def build_exec_env() -> dict:
+    """코드 실행용 환경변수 구성"""
+    env = os.environ.copy()
+
+    # Windows/Mac 개발 환경에서는 mock 사용
+    # 라즈베리파이에서는 이 환경변수를 제거하면 실제 GPIO 사용
+    if sys.platform == "win32" or sys.platform == "darwin":
+        env['GPIOZERO_PIN_FACTORY'] = 'mock'
+    env['PYTHONUNBUFFERED'] = '1'  # 출력 버퍼링 비활성화
+    env['PYTHONIOENCODING'] = 'utf-8'  # Python 출력 인코딩을 UTF-8로 설정
+    # python -m pigent_runner 로 실행할 수 있도록 runtime 디렉토리 추가
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(RUNTIME_DIR), env.get('PYTHONPATH')]))
+    return env
+
+
+def preload_modules(code: str) -> List[str]:
+    """warmup 대상 하드웨어 라이브러리 중 코드가 실제로 import하는 모듈 (런너가 미리 import)"""
+    modules = import_analyzer.analyzer.analyze(code).modules
+    return [name for name in interpreter_pool.EXEC_WARMUP_MODULES if name.split(".", 1)[0] in modules]
+
+
+def read_run_report(process) -> Optional[dict]:
+    """
+    pigent_runner가 남긴 실행 정보 읽기 (읽은 뒤 파일 삭제)
+
+    Returns:
+        Optional[dict]: {'exit_code', 'exception', 'signal', 'preloaded', 'limits_ms', 'preload_ms', 'run_ms'}
+                        (강제 종료 등으로 기록하지 못했으면 None)
+    """
+    path = getattr(process, "report_path", None)
+    if path is None:
+        return None
+    process.report_path = None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+async def ensure_slave_python() -> Optional[Path]:
+    """
+    Slave VM 확인 후 Python 실행 파일 경로 반환
+
+    평소에는 캐시된 VM 상태를 stat으로만 검증하며,
+    VM이 재생성된 경우 warm 인터프리터 풀도 새 인터프리터로 다시 시작합니다.
+    """
+    recreated = vm_manager.recreate_slave_vm_if_needed()
     python_exe = vm_manager.get_slave_python_executable()
+    if recreated and python_exe:
+        await interpreter_pool.pool.start(python_exe, force=True)
+    return python_exe
+
+
+async def spawn_python(python_exe: Path, script_path: str, env: dict, merge_stderr: bool = False,
+                       resources: Optional[RunResources] = None, preload: Optional[List[str]] = None):
+    """
+    Slave VM Python으로 스크립트 실행 프로세스 생성
+
+    warm 인터프리터 풀을 사용할 수 있으면 미리 import된 zygote에서 fork하고,
+    그렇지 않으면 새 Python 프로세스를 시작합니다 (콜드 스타트).
+    두 경우 모두 pigent_runner가 리소스 제한, 신호 처리, GPIO 정리, 실행 정보 보고를 맡습니다.
+    반환된 프로세스의 mode 속성으로 구분할 수 있고, 종료 후 read_run_report()로 실행 정보를 읽습니다.
+
+    Args:
+        python_exe: Slave VM Python 실행 파일
+        script_path: 실행할 스크립트 경로
+        env: 환경변수 (build_exec_env())
+        merge_stderr: True이면 stderr를 stdout으로 합침
+        resources: 자식 프로세스에 적용할 리소스 제한 (사용량 측정도 시작)
+        preload: 런너가 사용자 코드보다 먼저 import할 모듈 (preload_modules())
+    """
+    started = time.perf_counter()
+
+    RUN_REPORT_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    report_path = str(RUN_REPORT_DIR / f"{uuid.uuid4().hex}.json")
+    env = dict(env, PIGENT_REPORT=report_path, PIGENT_PRELOAD=",".join(preload or []))
+
+    child_spec = resources.child_spec() if resources else None
+    process = await interpreter_pool.pool.spawn(python_exe, script_path, env, merge_stderr, child_spec)
+    if process is None:
+        if child_spec:
+            env["PIGENT_LIMITS"] = json.dumps(child_spec)
+        process = await asyncio.create_subprocess_exec(
+            str(python_exe), "-m", "pigent_runner", script_path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT if merge_stderr else asyncio.subprocess.PIPE,
+            env=env
+        )
+        process.mode = "cold"
+    process.report_path = report_path
+
+    interpreter_pool.pool.record(process.mode, "spawn", time.perf_counter() - started)
+    if resources:
+        resources.attach(process)
+    return process
+
+
+async def terminate_process(process, grace: float = 2.0):
+    """프로세스 종료 (SIGTERM 후 grace초 안에 끝나지 않으면 kill)"""
+    if process.returncode is not None:
+        return
+    process.terminate()
+    try:
+        await asyncio.wait_for(process.wait(), timeout=grace)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+
+
+async def find_wiring(code: str) -> Optional[str]:
+    """코드와 함께 생성된 WIRING 섹션 조회 (없거나 조회 실패 시 None - 코드만으로 핀 판단)"""
+    try:
+        async with database.AsyncSessionLocal() as db:
+            return await crud_async.find_wiring_for_code(db, code)
+    except Exception as e:
+        print(f"[Hardware] WIRING 조회 실패: {e}")
+        return None
+
+
+async def acquire_hardware(code: str, wiring: Optional[str] = None,
+                           label: str = "") -> Optional[hardware_scheduler.PinLease]:
+    """
+    코드가 사용하는 핀의 사용권 요청 (대기는 호출자가 lease.wait()로)
+
+    Returns:
+        Optional[PinLease]: 하드웨어를 쓰지 않는 코드면 None
+    """
+    if not hardware_scheduler.scheduler.enabled:
+        return None
+    usage = hardware_scheduler.pins_from_code(code)
+    if usage.empty:
+        return None  # 하드웨어를 쓰지 않는 코드는 WIRING 조회도 생략
+    if wiring is None:
+        wiring = await find_wiring(code)
+    return hardware_scheduler.scheduler.request(hardware_scheduler.with_wiring(usage, wiring), label)
+
+
+async def wait_hardware(lease: hardware_scheduler.PinLease, on_queue: Optional[Callable[[int], None]] = None,
+                        on_output: Optional[Callable[[str, str], None]] = None):
+    """핀 사용권을 받을 때까지 대기 (대기 순서가 바뀔 때마다 on_queue 호출, on_output으로 안내 출력)"""
+    def report(position: int):
+        if on_queue:
+            on_queue(position)
+        if on_output and position:
+            on_output("stderr", f">>> 하드웨어 대기 중 ({position}번째, 사용 핀: {lease.usage.describe()})\n")
+
+    await lease.wait(report)
+
+
+async def run_code(code: str, timeout: Optional[float] = None,
+                   on_output: Optional[Callable[[str, str], None]] = None,
+                   merge_stderr: bool = False, on_spawn: Optional[Callable[[object], None]] = None,
+                   wiring: Optional[str] = None, on_queue: Optional[Callable[[int], None]] = None,
+                   label: str = "", hardware: bool = True) -> dict:
+    """
+    Slave VM에서 코드를 실행하고 stdout/stderr를 수집
+
+    Args:
+        code: 실행할 Python 코드
+        timeout: 벽시계 기준 최대 실행 시간 (초, None이면 제한 없음)
+        on_output: 출력이 도착할 때마다 호출되는 콜백 (stream 이름, 디코딩된 텍스트)
+        merge_stderr: True이면 stderr를 stdout으로 합쳐 출력 순서 유지 (터미널용)
+        on_spawn: 프로세스 시작 직후 호출되는 콜백 - 지정하면 stdin을 닫지 않음 (호출자가 입력 전달/중지)
+        wiring: 코드의 WIRING 섹션 (None이면 DB에서 같은 코드의 응답을 찾음) - 핀 사용권 판단용
+        on_queue: 핀 사용권을 기다리는 동안 대기 순서가 바뀔 때 호출 (1부터, 사용권을 받으면 0)
+        label: 하드웨어 스케줄러에 표시할 실행 이름
+        hardware: False이면 핀 사용권을 요청하지 않음 (호출자가 이미 사용권을 받은 경우)
+
+    Returns:
+        dict: {'success', 'exit_code', 'stdout', 'stderr', 'timed_out', 'mode', 'usage', 'runtime'}
+              (runtime: pigent_runner 실행 정보 - read_run_report())
+    """
+    result = {"success": False, "exit_code": None, "stdout": "", "stderr": "",
+              "timed_out": False, "mode": None, "usage": None, "runtime": None}
+
+    # 1. Python 버전 체크 (필요 시 재생성) 및 실행 파일 경로 가져오기
+    python_exe = await ensure_slave_python()
     if not python_exe:
-        return False, "", "SlaveVM not found"
-    
-    # 3. 임시 파일 생성 및 코드 실행
+        result["stderr"] = "SlaveVM not found"
+        return result
+
+    # 미설치 패키지가 있으면 프로세스를 띄우지 않고 바로 실패 (자동 설치 설정 시 설치 후 진행)
+    missing = await prepare_imports(code, on_output)
+    if missing:
+        result["stderr"] = missing
+        return result
+
+    # 2. 핀 사용권 (같은 핀을 쓰는 실행이 끝날 때까지 대기, 대기 시간은 timeout에 포함하지 않음)
+    # 3. 스크립트 준비 (같은 코드는 캐시된 .pyc 재사용) 및 코드 실행
+    lease = None
+    script = None
+    process = None
+    resources = RunResources()
     try:
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as temp_file:
-            temp_file.write(code)
-            temp_file_path = temp_file.name
-        
-        # 4. 환경변수 설정
-        env = os.environ.copy()
-        
-        # Windows/Mac 개발 환경에서는 mock 사용
-        # 라즈베리파이에서는 이 환경변수를 제거하면 실제 GPIO 사용
-        import sys
-        if sys.platform == "win32" or sys.platform == "darwin":
-            env['GPIOZERO_PIN_FACTORY'] = 'mock'
-        
-        # 5. subprocess로 코드 실행
-        result = subprocess.run(
-            [str(python_exe), temp_file_path],
-            capture_output=True,
-            text=True,
-            timeout=None,  # 타임아웃 제한 없음
-            env=env  # 환경변수 전달
-        )
-        
-        # 6. 임시 파일 삭제
-        Path(temp_file_path).unlink()
-        
-        success = result.returncode == 0
-        return success, result.stdout, result.stderr
-        
-    except subprocess.TimeoutExpired:
-        return False, "", "Code execution timeout (30 seconds)"
+        if hardware:
+            lease = await acquire_hardware(code, wiring, label)
+        if lease:
+            await wait_hardware(lease, on_queue, on_output)
+        script = await script_cache.cache.acquire(code)
+
+        # 4. 프로세스 실행 (리소스 제한 적용) 및 출력 수집
+        started = time.perf_counter()
+        await resources.setup()
+        process = await spawn_python(python_exe, str(script.path), build_exec_env(), merge_stderr,
+                                     resources=resources, preload=preload_modules(code))
+        if on_spawn:
+            on_spawn(process)
+        else:
+            process.stdin.close()
+        result["mode"] = process.mode
+
+        chunks = {"stdout": [], "stderr": []}
+
+        def emit(name, text):
+            chunks[name].append(text)
+            if on_output:
+                on_output(name, text)
+
+        async def pump(stream, name):
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            while True:
+                data = await stream.read(4096)
+                if data and resources.limit_exceeded == "output":
+                    continue  # 제한 초과 이후 출력은 버림 (프로세스 종료 대기)
+                if data and not resources.count_output(len(data)):
+                    emit("stderr", f"\n>>> 출력 제한 초과 ({resources.limits['output_bytes']} bytes) - 실행을 중지합니다")
+                    asyncio.create_task(terminate_process(process))
+                    continue
+                text = decoder.decode(data, final=not data)
+                if text:
+                    emit(name, text)
+                if not data:
+                    break
+
+        pumps = [pump(process.stdout, "stdout")]
+        if process.stderr is not None:
+            pumps.append(pump(process.stderr, "stderr"))
+        gathered = asyncio.gather(*pumps, process.wait())
+        gathered.add_done_callback(lambda future: future.cancelled() or future.exception())
+        try:
+            await asyncio.wait_for(gathered, timeout=timeout)
+        except asyncio.TimeoutError:
+            await terminate_process(process)
+            result["timed_out"] = True
+            resources.mark_exceeded("wall_time")
+            emit("stderr", f"\nCode execution timeout ({timeout:g} seconds)")
+        except asyncio.CancelledError:
+            # 작업 취소 시 프로세스도 함께 종료
+            await terminate_process(process)
+            await resources.finish(process)
+            raise
+
+        interpreter_pool.pool.record(process.mode, "run", time.perf_counter() - started)
+
+        result["usage"] = await resources.finish(process)
+        result["runtime"] = read_run_report(process)
+        result["exit_code"] = process.returncode
+        result["success"] = (process.returncode == 0 and not result["timed_out"]
+                             and result["usage"]["limit_exceeded"] is None)
+        result["stdout"] = "".join(chunks["stdout"])
+        result["stderr"] = "".join(chunks["stderr"])
+        return result
+
     except Exception as e:
-        return False, "", f"Code execution error: {str(e)}"
+        if process and process.returncode is None:
+            # 실행 도중 오류 - 핀 사용권/실행 슬롯을 넘기기 전에 프로세스 종료
+            await terminate_process(process)
+        result["stderr"] = f"Code execution error: {str(e)}"
+        return result
+    finally:
+        # 5. 스크립트 사용 종료 (캐시 크기 초과 시 오래된 스크립트 삭제) 및 핀 사용권 반납
+        if process:
+            read_run_report(process)  # 오류/취소로 읽지 못한 보고 파일 정리
+        await resources.cleanup()  # 시작 실패/오류 시 남은 cgroup 삭제
+        if script:
+            script_cache.cache.release(script)
+        if lease:
+            lease.release()
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from models import Board, UserChat, LLMResponse, ResponseType
+from models import Board, UserChat, LLMResponse, ResponseType, hash_code
 from datetime import datetime
 from typing import Optional, List
 
@@ -109,6 +109,24 @@ def get_llm_response(db: Session, user_chat_id: int) -> Optional[LLMResponse]:
 
 # ==================== 통합 함수 ====================
 
+def build_chat(board_id: int, user_content: str, response_type: ResponseType, created_time: datetime,
+               plain_text: Optional[str] = None, code_content: Optional[str] = None,
+               wiring_content: Optional[str] = None, steps_content: Optional[str] = None) -> UserChat:
+    """UserChat + LLMResponse 객체 생성 (세션에 추가하지 않음)"""
+    user_chat = UserChat(
+        board_id=board_id,
+        content=user_content,
+        response_type=response_type,
+        created_time=created_time
+    )
+    user_chat.llm_response = LLMResponse(
+        plain_text=plain_text,
+        code_content=code_content,
+        wiring_content=wiring_content,
+        steps_content=steps_content
+    )
+    return user_chat
+
 def create_chat_with_exception_response(db: Session, board_id: int, user_content: str, plain_text: str):
     """사용자 채팅과 Exception 응답을 함께 생성"""
     # 1. UserChat 생성
@@ -131,6 +149,24 @@ def create_chat_with_success_response(db: Session, board_id: int, user_content:
 
     return user_chat, llm_response
 
+def backfill_code_hashes(db: Session, batch_size: int = 500) -> int:
+    """code_hash 컬럼 추가 전에 저장된 응답의 해시 채우기 (서버 시작 시 한 번)"""
+    filled = 0
+    while True:
+        rows = (db.query(LLMResponse)
+                .filter(LLMResponse.code_hash.is_(None), LLMResponse.code_content.isnot(None),
+                        LLMResponse.code_content != "")
+                .limit(batch_size).all())
+        if not rows:
+            break
+        for row in rows:
+            row.code_hash = hash_code(row.code_content)
+        db.commit()
+        filled += len(rows)
+    if filled:
+        print(f"[CRUD] code_hash {filled}개 채움")
+    return filled
+
 def get_board_with_chats(db: Session, board_id: int):
     """보드와 모든 채팅, LLM 응답을 함께 조회"""
     board = get_board(db, board_id)
@@ -0,0 +1,179 @@
+"""
+비동기 CRUD (aiosqlite 세션용)
+보드/채팅 API에서 사용하며, crud.py의 동기 함수와 같은 동작을 합니다.
+"""
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from models import Board, UserChat, LLMResponse, ResponseType, hash_code
+from datetime import datetime
+from typing import Optional, List, Tuple
+
+from crud import build_chat
+
+# ==================== Board CRUD ====================
+
+async def create_board(db: AsyncSession, title: str, prompt_template: Optional[str] = None) -> Board:
+    """새로운 보드 생성"""
+    board = Board(title=title, prompt_template=prompt_template)
+    db.add(board)
+    await db.commit()
+    await db.refresh(board)
+
+    print(f"[CRUD] Board {board.board_id} created")
+    return board
+
+async def get_board(db: AsyncSession, board_id: int) -> Optional[Board]:
+    """보드 ID로 조회"""
+    return await db.get(Board, board_id)
+
+async def get_all_boards(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Board]:
+    """모든 보드 조회 (페이지네이션)"""
+    result = await db.execute(select(Board).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+async def update_board(db: AsyncSession, board_id: int, title: Optional[str] = None,
+                       prompt_template: Optional[str] = None) -> Optional[Board]:
+    """보드 정보 업데이트 (prompt_template이 빈 문자열이면 기본 템플릿으로 되돌림)"""
+    board = await get_board(db, board_id)
+    if not board:
+        return None
+
+    if title is not None:
+        board.title = title
+    if prompt_template is not None:
+        board.prompt_template = prompt_template or None
+
+    board.edited_time = datetime.now()
+    await db.commit()
+    return board
+
+async def delete_board(db: AsyncSession, board_id: int) -> bool:
+    """
+    보드 삭제
+    비동기 세션에서는 관계 지연 로딩을 할 수 없으므로 하위 행을 직접 삭제 (커밋 1회)
+    """
+    board = await get_board(db, board_id)
+    if not board:
+        return False
+
+    chat_ids = select(UserChat.user_chat_id).where(UserChat.board_id == board_id)
+    await db.execute(delete(LLMResponse).where(LLMResponse.user_chat_id.in_(chat_ids)))
+    await db.execute(delete(UserChat).where(UserChat.board_id == board_id))
+    await db.execute(delete(Board).where(Board.board_id == board_id))
+    await db.commit()
+    return True
+
+# ==================== UserChat CRUD ====================
+
+async def get_board_chat_history(db: AsyncSession, board_id: int, before: Optional[int] = None,
+                                 after: Optional[int] = None, limit: Optional[int] = None,
+                                 include_content: bool = True, latest: bool = False) -> List[UserChat]:
+    """
+    보드 채팅 기록을 LLM 응답과 함께 한 번의 쿼리로 조회 (커서 기반 페이지네이션)
+
+    Args:
+        before: 이 user_chat_id보다 이전 채팅만 (최근 limit개)
+        after: 이 user_chat_id보다 이후 채팅만 (오래된 순 limit개)
+        limit: 최대 개수 (None이면 전체)
+        include_content: False이면 LLM 응답을 불러오지 않음 (요약 목록용)
+        latest: True이면 before 없이도 최근 limit개 (프롬프트용 대화 기록)
+
+    Returns:
+        List[UserChat]: user_chat_id 오름차순 (커서와 같은 기준으로 정렬해야 페이지가 겹치거나 빠지지 않음 -
+                        가져온 채팅은 created_time이 id 순서와 다를 수 있음)
+    """
+    query = select(UserChat).where(UserChat.board_id == board_id)
+    if include_content:
+        query = query.options(joinedload(UserChat.llm_response))
+
+    if after is not None:
+        query = query.where(UserChat.user_chat_id > after)
+    newest_first = before is not None or latest
+    if before is not None:
+        query = query.where(UserChat.user_chat_id < before)
+    if newest_first:
+        query = query.order_by(UserChat.user_chat_id.desc())
+    else:
+        query = query.order_by(UserChat.user_chat_id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    chats = list((await db.execute(query)).scalars().all())
+    return list(reversed(chats)) if newest_first else chats
+
+# ==================== LLMResponse 조회 ====================
+
+async def find_wiring_for_code(db: AsyncSession, code: str) -> Optional[str]:
+    """코드와 함께 생성된 WIRING 섹션 (같은 코드가 여러 번 생성됐으면 가장 최근 응답, code_hash 인덱스로 조회)"""
+    query = (select(LLMResponse.wiring_content)
+             .where(LLMResponse.code_hash == hash_code(code), LLMResponse.code_content == code)
+             .order_by(LLMResponse.response_id.desc())
+             .limit(1))
+    return (await db.execute(query)).scalar_one_or_none()
+
+# ==================== 통합 함수 ====================
+
+async def create_chat_transaction(db: AsyncSession, board_id: int, user_content: str, response_type: ResponseType,
+                                  plain_text: Optional[str] = None, code_content: Optional[str] = None,
+                                  wiring_content: Optional[str] = None,
+                                  steps_content: Optional[str] = None) -> Tuple[UserChat, LLMResponse]:
+    """
+    사용자 채팅 + LLM 응답 + 보드 edited_time 갱신을 하나의 트랜잭션(커밋 1회)으로 저장
+
+    Returns:
+        (UserChat, LLMResponse)
+    """
+    now = datetime.now()
+    user_chat = build_chat(board_id, user_content, response_type, now,
+                           plain_text, code_content, wiring_content, steps_content)
+    db.add(user_chat)
+    await db.execute(update(Board).where(Board.board_id == board_id).values(edited_time=now))
+    try:
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return user_chat, user_chat.llm_response
+
+async def import_chats(db: AsyncSession, board_id: int, chats: List[dict], batch_size: int = 500) -> int:
+    """
+    여러 채팅을 한꺼번에 저장 (보드 이전/복원용)
+    batch_size개마다 한 번만 커밋하며, 실패하면 해당 배치는 롤백됨
+
+    Args:
+        chats: [{'user_content', 'response_type', 'plain_text', 'code_content',
+                 'wiring_content', 'steps_content', 'created_time'(선택)}, ...]
+
+    Returns:
+        int: 저장된 채팅 수
+    """
+    imported = 0
+    now = datetime.now()
+    for start in range(0, len(chats), batch_size):
+        batch = chats[start:start + batch_size]
+        db.add_all([
+            build_chat(
+                board_id,
+                chat["user_content"],
+                ResponseType(chat["response_type"]),
+                chat.get("created_time") or now,
+                chat.get("plain_text"),
+                chat.get("code_content"),
+                chat.get("wiring_content"),
+                chat.get("steps_content")
+            )
+            for chat in batch
+        ])
+        if start + batch_size >= len(chats):
+            await db.execute(update(Board).where(Board.board_id == board_id).values(edited_time=now))
+        try:
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        imported += len(batch)
+
+    print(f"[CRUD] Board {board_id}: {imported} chats imported")
+    return imported
@@ -1,21 +1,78 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from pathlib import Path
+import os
 
 # SQLite 데이터베이스 파일 경로 (backend 폴더 내 고정)
 BASE_DIR = Path(__file__).resolve().parent
 DATABASE_PATH = BASE_DIR / "pigent.db"
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_PATH}"
 
-# SQLite용 엔진 생성 (check_same_thread=False: FastAPI에서 사용하기 위해 필요)
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+# 데이터베이스 설정 (환경변수로 변경 가능)
+DB_PROFILE = os.getenv("DB_PROFILE", "production")         # production: WAL + 튜닝 pragma, default: SQLite 기본값
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))  # 연결당 페이지 캐시
+DB_MMAP_SIZE_MB = int(os.getenv("DB_MMAP_SIZE_MB", "64"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+def production_pragmas() -> dict:
+    """production 프로필에서 연결마다 적용할 pragma"""
+    return {
+        # 읽기와 쓰기가 서로 막지 않음, 커밋마다 fsync하지 않음 (체크포인트 때만)
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -DB_CACHE_SIZE_KB,  # 음수는 KB 단위
+        "mmap_size": DB_MMAP_SIZE_MB * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": DB_BUSY_TIMEOUT_MS,
+    }
+
+def apply_profile(sync_engine, profile: str = DB_PROFILE):
+    """엔진의 새 연결마다 프로필 pragma 적용"""
+    if profile != "production":
+        return
+    pragmas = production_pragmas()
+
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def make_engine(url: str = SQLALCHEMY_DATABASE_URL, profile: str = DB_PROFILE):
+    """동기 엔진 생성 (check_same_thread=False: FastAPI에서 사용하기 위해 필요)"""
+    new_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW
+    )
+    apply_profile(new_engine, profile)
+    return new_engine
+
+def make_async_engine(url: str = ASYNC_DATABASE_URL, profile: str = DB_PROFILE):
+    """aiosqlite 기반 비동기 엔진 생성 (쿼리가 이벤트 루프를 막지 않음)"""
+    new_engine = create_async_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW
+    )
+    apply_profile(new_engine.sync_engine, profile)
+    return new_engine
+
+# SQLite용 엔진 생성
+engine = make_engine()
+async_engine = make_async_engine()
 
 # 세션 로컬 클래스 생성
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 비동기 세션 (커밋 후 속성을 만료시키지 않음 - 지연 로딩 SELECT 방지)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # Base 클래스 생성 (모든 모델이 상속받을 클래스)
 Base = declarative_base()
@@ -31,3 +88,35 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """
+    비동기 세션 dependency (보드/채팅 API용)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def ensure_indexes():
+    """
+    모델에 정의된 인덱스 생성
+    create_all은 이미 존재하는 테이블에 새로 추가된 인덱스를 만들지 않으므로 별도로 확인
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def ensure_columns():
+    """
+    모델에 새로 추가된 nullable 컬럼을 기존 테이블에 추가 (간단한 마이그레이션)
+    create_all은 이미 존재하는 테이블의 컬럼을 변경하지 않음
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                print(f"[DB] 컬럼 추가: {table.name}.{column.name}")
@@ -0,0 +1,417 @@
+"""
+실행 세션 (WebSocket 하나로 여러 실행을 다중화)
+실행 버튼마다 WebSocket을 새로 여는 대신, 연결 하나에서 JSON 메시지로 여러 실행을 run_id로 구분해 다룹니다.
+
+클라이언트 → 서버
+    {"type": "run", "code": "...", "ref": "클라이언트 식별자", "timeout": 30, "wiring": "..."}   (wiring 생략 가능)
+    {"type": "stdin", "run_id": "...", "data": "입력\\n", "eof": false}
+    {"type": "stop", "run_id": "..."}
+    {"type": "status", "run_id": "..."}          (run_id 생략 시 세션의 모든 실행)
+    {"type": "resume", "run_id": "...", "offset": 12}
+    {"type": "ping"} / {"type": "pong"}
+
+서버 → 클라이언트
+    {"type": "session", "session_id": "...", "runs": [...]}   (연결 직후)
+    {"type": "accepted", "run_id": "...", "ref": "..."}
+    {"type": "output", "run_id": "...", "stream": "stdout", "data": "...", "offset": 13}   (offset: 이 출력 다음 바이트 위치)
+    {"type": "status", "run_id": "...", "status": "running", ...}  (상태가 바뀔 때마다, 완료 시 summary 포함)
+                                                                  (핀 사용권 대기 중이면 status "queued" + queue_position)
+    {"type": "error", "detail": "...", "run_id"/"ref": ...}
+    {"type": "ping"} / {"type": "pong"}
+
+연결이 끊겨도 실행은 계속되며, EXEC_SESSION_RESUME_TIMEOUT 안에 같은 session_id로 다시 연결하면
+resume 메시지로 받은 위치(offset) 이후의 출력부터 이어 받을 수 있습니다. 시간이 지나면 남은 실행을 중지합니다.
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+
+import code_executor
+from job_scheduler import ExecutionJob, JobStatus, EXEC_JOB_MAX_TIMEOUT
+from resource_limits import format_usage
+
+# 기본 설정 (환경변수로 변경 가능)
+EXEC_SESSION_MAX_RUNS = int(os.getenv("EXEC_SESSION_MAX_RUNS", "4"))                    # 세션당 동시 실행 수
+EXEC_SESSION_RUN_RETENTION = int(os.getenv("EXEC_SESSION_RUN_RETENTION", "20"))         # 세션당 보관할 완료 실행 수
+EXEC_SESSION_PING_INTERVAL = float(os.getenv("EXEC_SESSION_PING_INTERVAL", "20"))       # 메시지가 없을 때 ping 간격 (초)
+EXEC_SESSION_IDLE_TIMEOUT = float(os.getenv("EXEC_SESSION_IDLE_TIMEOUT", "60"))         # 응답이 없으면 연결 끊김으로 처리 (초)
+EXEC_SESSION_RESUME_TIMEOUT = float(os.getenv("EXEC_SESSION_RESUME_TIMEOUT", "60"))     # 재연결 대기 시간 (초)
+
+
+class SessionError(Exception):
+    """클라이언트 메시지를 처리할 수 없음 (error 메시지로 응답)"""
+
+
+class SessionRun(ExecutionJob):
+    """세션에서 시작한 실행 하나 (stdin 입력과 중지 지원)"""
+
+    log_kind = "session"
+
+    def __init__(self, session_id: str, code: str, timeout: Optional[float] = None, wiring: Optional[str] = None):
+        super().__init__(code, timeout, wiring)
+        self.session_id = session_id
+        self.runtime: Optional[dict] = None
+        self.process = None
+        self.stop_requested = False
+
+    @property
+    def run_id(self) -> str:
+        return self.job_id
+
+    def attach(self, process):
+        """run_code가 프로세스를 시작하면 호출 (stdin/중지 대상, 핀 사용권 대기가 끝난 뒤)"""
+        self.process = process
+        self.set_status(JobStatus.RUNNING)
+        if self.stop_requested:
+            process.terminate()
+
+    async def write_stdin(self, data: str, eof: bool = False):
+        process = self.process
+        if process is None or process.returncode is not None or process.stdin is None:
+            raise SessionError("입력을 받을 수 있는 실행이 아닙니다")
+        try:
+            if data:
+                process.stdin.write(data.encode("utf-8"))
+                await process.stdin.drain()
+            if eof:
+                process.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            raise SessionError("프로세스가 입력을 닫았습니다")
+
+    def stop(self) -> bool:
+        """실행 중지 (프로세스에는 SIGTERM - 런너가 정리 후 종료, 시작 전(핀 사용권 대기 포함)이면 작업 취소)"""
+        if self.finished:
+            return False
+        self.stop_requested = True
+        if self.process is not None:
+            # 종료 신호를 무시하면 잠시 후 강제 종료
+            asyncio.create_task(code_executor.terminate_process(self.process))
+        elif self._task is not None:
+            self._task.cancel()
+        return True
+
+    async def frames(self, offset: int = 0) -> AsyncIterator[Tuple[int, Optional[Tuple[str, str]]]]:
+        """
+        offset(바이트)부터 완료될 때까지 전달
+
+        쌓여 있는 출력은 스트림별로 묶어 (다음 offset, (stream, text))로,
+        상태나 핀 사용권 대기 순서가 바뀌면 (offset, None)으로 알립니다.
+        """
+        status = None
+        while True:
+            changed = self._changed
+            while offset < self.log.end:
+                next_offset, pieces = self.log.segments(offset)
+                if next_offset == offset:
+                    break  # 아직 문자가 완성되지 않음
+                for stream, text, end in pieces:
+                    yield end, (stream, text)
+                offset = next_offset
+            if (self.status, self.queue_position) != status:
+                status = (self.status, self.queue_position)
+                yield offset, None
+            if self.finished and offset >= self.log.end:
+                return
+            await changed.wait()
+
+    def to_dict(self, include_output: bool = True) -> dict:
+        data = super().to_dict(include_output)
+        data.update({
+            "run_id": self.run_id,
+            "session_id": self.session_id,
+            "runtime": self.runtime,
+        })
+        if self.usage:
+            data["summary"] = format_usage(self.usage)
+        return data
+
+
+class ExecutionSession:
+    """클라이언트 하나의 실행 묶음 (WebSocket이 바뀌어도 유지)"""
+
+    def __init__(self, manager: "SessionManager", session_id: Optional[str] = None):
+        self.manager = manager
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self.runs: "OrderedDict[str, SessionRun]" = OrderedDict()
+        self.websocket: Optional[WebSocket] = None
+        self.detached_at: Optional[float] = time.monotonic()
+        self.generation = 0  # 연결이 바뀔 때마다 증가 (오래된 만료 타이머 무시)
+        self._forwarders: Dict[str, asyncio.Task] = {}
+        self._send_lock = asyncio.Lock()
+
+    @property
+    def active_runs(self) -> List[SessionRun]:
+        return [run for run in self.runs.values() if not run.finished]
+
+    # ---------- 연결 ----------
+
+    def attach(self, websocket: WebSocket):
+        """새 연결로 교체 (이전 연결이 남아 있으면 닫음)"""
+        previous = self.websocket
+        self._cancel_forwarders()
+        self.websocket = websocket
+        self.detached_at = None
+        self.generation += 1
+        if previous is not None:
+            asyncio.create_task(_close_quietly(previous, code=4000))
+
+    def detach(self, websocket: WebSocket):
+        """연결 종료 - 실행은 계속하고 재연결을 기다림"""
+        if self.websocket is not websocket:
+            return  # 이미 다른 연결로 교체됨
+        self._cancel_forwarders()
+        self.websocket = None
+        self.detached_at = time.monotonic()
+        asyncio.get_running_loop().call_later(EXEC_SESSION_RESUME_TIMEOUT, self.manager.expire, self, self.generation)
+
+    def _cancel_forwarders(self):
+        for task in self._forwarders.values():
+            task.cancel()
+        self._forwarders.clear()
+
+    async def send(self, message: dict):
+        websocket = self.websocket
+        if websocket is None:
+            return
+        async with self._send_lock:
+            await websocket.send_text(json.dumps(jsonable_encoder(message), ensure_ascii=False))
+
+    # ---------- 실행 ----------
+
+    def start_run(self, code: str, timeout: Optional[float] = None, wiring: Optional[str] = None) -> SessionRun:
+        if len(self.active_runs) >= EXEC_SESSION_MAX_RUNS:
+            raise SessionError(f"동시에 실행할 수 있는 코드는 {EXEC_SESSION_MAX_RUNS}개까지입니다")
+        run = SessionRun(self.session_id, code, timeout, wiring)
+        self.runs[run.run_id] = run
+        run._task = asyncio.create_task(self._execute(run))
+        self._prune()
+        return run
+
+    async def _execute(self, run: SessionRun):
+        try:
+            # 프로세스가 시작되면 attach()에서 running으로 바뀜 (그 전까지는 핀 사용권 대기 등으로 queued)
+            result = await code_executor.run_code(run.code, timeout=run.timeout, on_output=run.append_output,
+                                                  merge_stderr=True, on_spawn=run.attach, wiring=run.wiring,
+                                                  on_queue=run.set_queue_position, label=f"session {run.run_id}")
+            run.exit_code = result["exit_code"]
+            run.mode = result["mode"]
+            run.usage = result["usage"]
+            run.runtime = result["runtime"]
+            if result["exit_code"] is None and result["stderr"]:
+                run.append_output("stderr", result["stderr"])  # 실행 전 실패 (VM 없음, 미설치 패키지 등)
+
+            if run.stop_requested:
+                run.set_status(JobStatus.CANCELLED)
+            elif result["timed_out"]:
+                run.set_status(JobStatus.TIMEOUT)
+            elif result["success"]:
+                run.set_status(JobStatus.SUCCEEDED)
+            else:
+                run.set_status(JobStatus.FAILED)
+        except asyncio.CancelledError:
+            run.set_status(JobStatus.CANCELLED)
+
+    def follow(self, run: SessionRun, offset: int = 0):
+        """run의 출력/상태를 현재 연결로 전달 (같은 run의 이전 전달은 교체)"""
+        previous = self._forwarders.pop(run.run_id, None)
+        if previous is not None:
+            previous.cancel()
+        task = asyncio.create_task(self._forward(run, offset))
+        self._forwarders[run.run_id] = task
+
+        def forget(done: asyncio.Task):
+            if self._forwarders.get(run.run_id) is done:
+                del self._forwarders[run.run_id]
+
+        task.add_done_callback(forget)
+
+    async def _forward(self, run: SessionRun, offset: int):
+        try:
+            async for offset, frame in run.frames(offset):
+                if frame is None:
+                    await self.send({"type": "status", **run.to_dict(include_output=False)})
+                else:
+                    stream, text = frame
+                    await self.send({"type": "output", "run_id": run.run_id, "stream": stream,
+                                     "data": text, "offset": offset})
+        except Exception as e:
+            # 연결 종료 (서버 구현에 따라 ClientDisconnected/ConnectionClosed 등) - 출력은 기록에 남아 resume으로 이어 받음
+            if not isinstance(e, (WebSocketDisconnect, RuntimeError)):
+                print(f"[Session] {run.run_id} 출력 전달 중단: {type(e).__name__}: {e}")
+
+    def stop_all(self):
+        for run in self.active_runs:
+            run.stop()
+
+    def _prune(self):
+        finished = [run_id for run_id, run in self.runs.items() if run.finished]
+        for run_id in finished[:max(len(finished) - EXEC_SESSION_RUN_RETENTION, 0)]:
+            del self.runs[run_id]
+
+    # ---------- 메시지 처리 ----------
+
+    def _run(self, message: dict) -> SessionRun:
+        run = self.runs.get(message.get("run_id") or "")
+        if run is None:
+            raise SessionError("실행을 찾을 수 없습니다")
+        return run
+
+    async def handle(self, message: dict):
+        kind = message.get("type")
+
+        if kind == "run":
+            code = message.get("code")
+            if not isinstance(code, str) or not code.strip():
+                raise SessionError("실행할 코드가 없습니다")
+            timeout = message.get("timeout")
+            if timeout is not None:
+                try:
+                    timeout = float(timeout)
+                except (TypeError, ValueError):
+                    timeout = math.nan
+                if not math.isfinite(timeout) or timeout <= 0:
+                    raise SessionError("timeout은 0보다 큰 숫자(초)여야 합니다")
+                timeout = min(timeout, EXEC_JOB_MAX_TIMEOUT)
+            wiring = message.get("wiring")
+            run = self.start_run(code, timeout, wiring if isinstance(wiring, str) else None)
+            await self.send({"type": "accepted", "run_id": run.run_id, "ref": message.get("ref")})
+            self.follow(run)
+
+        elif kind == "stdin":
+            await self._run(message).write_stdin(str(message.get("data") or ""), bool(message.get("eof")))
+
+        elif kind == "stop":
+            self._run(message).stop()
+
+        elif kind == "status":
+            if message.get("run_id"):
+                await self.send({"type": "status", **self._run(message).to_dict(include_output=False)})
+            else:
+                await self.send(self.describe())
+
+        elif kind == "resume":
+            run = self._run(message)
+            self.follow(run, max(0, int(message.get("offset") or 0)))
+
+        elif kind == "ping":
+            await self.send({"type": "pong"})
+
+        elif kind != "pong":
+            raise SessionError(f"알 수 없는 메시지: {kind}")
+
+    def describe(self) -> dict:
+        return {
+            "type": "session",
+            "session_id": self.session_id,
+            "runs": [run.to_dict(include_output=False) for run in self.runs.values()],
+        }
+
+
+async def _close_quietly(websocket: WebSocket, code: int = 1000):
+    try:
+        await websocket.close(code=code)
+    except Exception:
+        pass
+
+
+class SessionManager:
+    """
+    실행 세션 관리
+
+    - session_id로 재연결하면 기존 세션(실행 중인 run 포함)에 다시 연결
+    - 재연결이 없으면 EXEC_SESSION_RESUME_TIMEOUT 후 남은 실행을 중지하고 세션 삭제
+    - 메시지가 EXEC_SESSION_PING_INTERVAL 동안 없으면 ping, EXEC_SESSION_IDLE_TIMEOUT을 넘으면 연결 종료
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, ExecutionSession] = {}
+        self.connections = 0
+        self.resumed = 0
+        self.expired = 0
+
+    def open(self, session_id: Optional[str] = None) -> ExecutionSession:
+        session = self._sessions.get(session_id) if session_id else None
+        if session is not None:
+            self.resumed += 1
+            return session
+        session = ExecutionSession(self)
+        self._sessions[session.session_id] = session
+        return session
+
+    def expire(self, session: ExecutionSession, generation: int):
+        """재연결 대기 시간이 지난 세션 정리 (그사이 다시 연결되었으면 유지)"""
+        if session.websocket is not None or session.generation != generation:
+            return
+        session.stop_all()
+        if self._sessions.get(session.session_id) is session:
+            del self._sessions[session.session_id]
+        self.expired += 1
+
+    async def serve(self, websocket: WebSocket, session_id: Optional[str] = None):
+        """/ws/session 연결 처리 (accept 이후 호출)"""
+        session = self.open(session_id)
+        session.attach(websocket)
+        self.connections += 1
+        last_seen = time.monotonic()
+        try:
+            await session.send(session.describe())
+            while True:
+                try:
+                    text = await asyncio.wait_for(websocket.receive_text(), timeout=EXEC_SESSION_PING_INTERVAL)
+                except asyncio.TimeoutError:
+                    if time.monotonic() - last_seen > EXEC_SESSION_IDLE_TIMEOUT:
+                        print(f"[Session] {session.session_id} 응답 없음 - 연결 종료")
+                        break
+                    await session.send({"type": "ping"})
+                    continue
+
+                last_seen = time.monotonic()
+                try:
+                    message = json.loads(text)
+                except ValueError:
+                    message = None
+                if not isinstance(message, dict):
+                    await session.send({"type": "error", "detail": "JSON 객체 메시지가 아닙니다"})
+                    continue
+                try:
+                    await session.handle(message)
+                except (ValueError, TypeError, SessionError) as e:
+                    await session.send({"type": "error", "detail": str(e),
+                                        "run_id": message.get("run_id"), "ref": message.get("ref")})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            session.detach(websocket)
+            await _close_quietly(websocket)
+
+    async def stop(self):
+        """서버 종료 시 모든 실행 중지"""
+        runs = [run for session in self._sessions.values() for run in session.active_runs]
+        for run in runs:
+            run.stop()
+        await asyncio.gather(*(run.wait() for run in runs), return_exceptions=True)
+        self._sessions.clear()
+
+    def stats(self) -> dict:
+        sessions = list(self._sessions.values())
+        return {
+            "sessions": len(sessions),
+            "connected": sum(1 for session in sessions if session.websocket is not None),
+            "active_runs": sum(len(session.active_runs) for session in sessions),
+            "connections": self.connections,
+            "resumed": self.resumed,
+            "expired": self.expired,
+        }
+
+
+# 서버 전역 세션 관리자
+sessions = SessionManager()
@@ -0,0 +1,395 @@
+"""
+하드웨어(GPIO 핀) 사용 스케줄러
+모든 보드가 라즈베리파이 하나를 공유하므로, 같은 핀을 쓰는 실행이 동시에 돌지 않도록 핀 단위로 배타적 사용권(lease)을 줍니다.
+
+- 사용 핀: 코드(ast - gpiozero 장치 생성, RPi.GPIO 호출, I2C/SPI 라이브러리)와 WIRING 섹션(rpi.GPIO17)에서 추출
+  핀을 알 수 없는 하드웨어 코드(변수로 계산한 핀 번호 등)는 모든 핀을 사용하는 것으로 취급
+- 겹치는 핀이 있는 실행은 요청 순서(FIFO)대로 대기, 겹치지 않는 실행은 바로 병렬 실행
+- 하드웨어를 쓰지 않는 코드는 사용권 없이 바로 실행
+"""
+
+import ast
+import asyncio
+import os
+import re
+import time
+import uuid
+from typing import Callable, Dict, FrozenSet, List, Optional, Set
+
+# 기본 설정 (환경변수로 변경 가능)
+HARDWARE_SCHEDULER_ENABLED = os.getenv("HARDWARE_SCHEDULER_ENABLED", "true").lower() == "true"
+
+# 이 모듈을 import하면 하드웨어 코드로 취급
+HARDWARE_MODULES = {"gpiozero", "RPi", "pigpio", "lgpio", "smbus", "smbus2", "spidev", "board", "busio",
+                    "neopixel", "w1thermsensor", "Adafruit_DHT", "adafruit_dht"}
+
+# 버스 핀 (BCM 번호)
+I2C_PINS = frozenset({2, 3})
+SPI_PINS = frozenset({7, 8, 9, 10, 11})
+BUS_MODULES = {"smbus": I2C_PINS, "smbus2": I2C_PINS, "busio": I2C_PINS, "spidev": SPI_PINS}
+
+# gpiozero에서 핀 번호가 아닌 키워드 인자
+GPIOZERO_OPTION_KEYWORDS = {
+    "active_high", "initial_value", "frequency", "pull_up", "active_state", "bounce_time", "hold_time",
+    "hold_repeat", "queue_len", "sample_rate", "threshold", "threshold_distance", "max_distance", "partial",
+    "pin_factory", "charge_time_limit", "sample_wait", "min_pulse_width", "max_pulse_width", "frame_width",
+    "min_angle", "max_angle", "initial_angle", "pwm", "tones", "mid_tone", "octaves", "wait", "brightness",
+    "channel", "differential", "max_voltage", "select_pin", "clock_pin", "mosi_pin", "miso_pin", "port", "device",
+}
+
+# gpiozero SPI 장치 (MCP3008 등 - 인자는 채널 번호)
+GPIOZERO_SPI_PREFIX = "MCP3"
+
+# RPi.GPIO에서 첫 번째 인자가 핀 번호인 함수
+RPI_GPIO_PIN_CALLS = {"setup", "output", "input", "PWM", "add_event_detect", "remove_event_detect",
+                      "wait_for_edge", "event_detected", "add_event_callback", "gpio_function"}
+
+# 40핀 헤더 물리 번호(BOARD) → BCM 번호
+BOARD_TO_BCM = {
+    3: 2, 5: 3, 7: 4, 8: 14, 10: 15, 11: 17, 12: 18, 13: 27, 15: 22, 16: 23, 18: 24, 19: 10, 21: 9,
+    22: 25, 23: 11, 24: 8, 26: 7, 27: 0, 28: 1, 29: 5, 31: 6, 32: 12, 33: 13, 35: 19, 36: 16, 37: 26,
+    38: 20, 40: 21,
+}
+
+WIRING_PIN_PATTERN = re.compile(r'\brpi\.GPIO(\d+)\b', re.IGNORECASE)
+WIRING_BUS_PATTERN = re.compile(r'\brpi\.(SDA|SCL|MOSI|MISO|SCLK|CE0|CE1)\b', re.IGNORECASE)
+WIRING_BUS_PINS = {"SDA": 2, "SCL": 3, "MOSI": 10, "MISO": 9, "SCLK": 11, "CE0": 8, "CE1": 7}
+
+PIN_NAME_PATTERN = re.compile(r'^(?:GPIO|BCM)(\d+)$|^(?:BOARD|J8:)(\d+)$', re.IGNORECASE)
+
+
+class PinUsage:
+    """실행 하나가 사용하는 핀 (all_pins이면 모든 핀)"""
+
+    def __init__(self, pins: Set[int] = (), all_pins: bool = False):
+        self.pins: FrozenSet[int] = frozenset(pins)
+        self.all_pins = all_pins
+
+    @property
+    def empty(self) -> bool:
+        return not self.all_pins and not self.pins
+
+    def conflicts(self, other: "PinUsage") -> bool:
+        if self.empty or other.empty:
+            return False
+        return self.all_pins or other.all_pins or bool(self.pins & other.pins)
+
+    def __or__(self, other: "PinUsage") -> "PinUsage":
+        return PinUsage(self.pins | other.pins, self.all_pins or other.all_pins)
+
+    def describe(self) -> str:
+        if self.all_pins:
+            return "모든 핀"
+        return ", ".join(f"GPIO{pin}" for pin in sorted(self.pins)) or "없음"
+
+    def to_dict(self) -> dict:
+        return {"pins": sorted(self.pins), "all_pins": self.all_pins}
+
+
+class _PinVisitor(ast.NodeVisitor):
+    """코드에서 사용하는 BCM 핀 번호 수집"""
+
+    def __init__(self):
+        self.modules: Set[str] = set()
+        self.gpiozero_names: Set[str] = set()   # from gpiozero import LED → LED
+        self.module_aliases: Dict[str, str] = {}  # import RPi.GPIO as GPIO → GPIO: RPi.GPIO
+        self.constants: Dict[str, object] = {}
+        self.pins: Set[int] = set()
+        self.unknown = False
+        self.board_numbering = False
+
+    # ---------- import / 상수 ----------
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self.modules.add(alias.name.split(".", 1)[0])
+            self.module_aliases[alias.asname or alias.name.split(".", 1)[0]] = alias.name
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if not node.module or node.level:
+            return
+        self.modules.add(node.module.split(".", 1)[0])
+        for alias in node.names:
+            name = alias.asname or alias.name
+            if node.module == "gpiozero":
+                self.gpiozero_names.add(name)
+            else:
+                self.module_aliases[name] = f"{node.module}.{alias.name}"
+
+    def visit_Assign(self, node: ast.Assign):
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                self.constants[target.id] = node.value
+        self.generic_visit(node)
+
+    # ---------- 핀 값 해석 ----------
+
+    def _add_pin(self, value):
+        if isinstance(value, bool):
+            return
+        if isinstance(value, int):
+            pin = BOARD_TO_BCM.get(value) if self.board_numbering else value
+            if pin is not None and 0 <= pin <= 27:
+                self.pins.add(pin)
+        elif isinstance(value, str):
+            match = PIN_NAME_PATTERN.match(value.strip())
+            if match and match.group(1):
+                self.pins.add(int(match.group(1)))
+            elif match and int(match.group(2)) in BOARD_TO_BCM:
+                self.pins.add(BOARD_TO_BCM[int(match.group(2))])
+
+    def _collect(self, node, depth: int = 0):
+        """인자 표현식에서 핀 번호 수집 (해석할 수 없으면 unknown)"""
+        if depth > 5:
+            self.unknown = True
+        elif isinstance(node, ast.Constant):
+            self._add_pin(node.value)  # 핀 번호가 아닌 상수(옵션 값 등)는 무시
+        elif isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+            for element in node.elts:
+                self._collect(element, depth + 1)
+        elif isinstance(node, ast.Dict):
+            for value in node.values:
+                self._collect(value, depth + 1)
+        elif isinstance(node, ast.Name) and node.id in self.constants:
+            self._collect(self.constants[node.id], depth + 1)
+        elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "board":
+            self._board_attribute(node.attr)
+        else:
+            self.unknown = True
+
+    def _board_attribute(self, name: str):
+        """Adafruit Blinka board.D17 / board.SCL"""
+        if name.startswith("D") and name[1:].isdigit():
+            self.pins.add(int(name[1:]))
+        elif name.upper() in WIRING_BUS_PINS:
+            self.pins.add(WIRING_BUS_PINS[name.upper()])
+
+    # ---------- 호출 ----------
+
+    def visit_Call(self, node: ast.Call):
+        name = _call_name(node.func)
+        if name:
+            head, _, attr = name.rpartition(".")
+            owner = self.module_aliases.get(head, head)
+            imported = attr in self.gpiozero_names or ("*" in self.gpiozero_names and attr[:1].isupper())
+            if (not head and imported) or owner == "gpiozero":
+                self._gpiozero_device(attr, node)
+            elif owner == "RPi.GPIO":
+                self._rpi_gpio_call(attr, node)
+        self.generic_visit(node)
+
+    def _gpiozero_device(self, name: str, node: ast.Call):
+        if name[:1].islower() or name in ("Device", "Factory"):
+            return  # pause(), 유틸리티 함수
+        if name.startswith(GPIOZERO_SPI_PREFIX):
+            self.pins |= SPI_PINS
+            return
+        for arg in node.args:
+            self._collect(arg)
+        for keyword in node.keywords:
+            if keyword.arg and keyword.arg not in GPIOZERO_OPTION_KEYWORDS:
+                self._collect(keyword.value)
+
+    def _rpi_gpio_call(self, name: str, node: ast.Call):
+        if name == "setmode" and node.args:
+            self.board_numbering = _call_name(node.args[0]).endswith("BOARD")
+        elif name in RPI_GPIO_PIN_CALLS and node.args:
+            self._collect(node.args[0])
+
+
+def _call_name(node) -> str:
+    """호출 대상의 점 이름 (예: GPIO.setup, gpiozero.LED)"""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return ".".join(reversed(parts))
+    return ""
+
+
+def pins_from_code(code: str) -> PinUsage:
+    """코드가 사용하는 핀 (하드웨어 라이브러리를 쓰지 않으면 빈 사용량)"""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return PinUsage()  # 실행 즉시 문법 오류로 끝남
+
+    # 소스 순서대로 방문 (import, 상수 대입, setmode가 보통 사용보다 앞에 옴)
+    visitor = _PinVisitor()
+    visitor.visit(tree)
+    if not visitor.modules & HARDWARE_MODULES:
+        return PinUsage()
+
+    pins = set(visitor.pins)
+    for module, bus_pins in BUS_MODULES.items():
+        if module in visitor.modules:
+            pins |= bus_pins
+    return PinUsage(pins, all_pins=visitor.unknown or not pins)
+
+
+def pins_from_wiring(wiring: Optional[str]) -> PinUsage:
+    """WIRING 섹션에서 라즈베리파이 핀 추출 (예: rpi.GPIO17 -> bb.1a)"""
+    if not wiring:
+        return PinUsage()
+    pins = {int(match) for match in WIRING_PIN_PATTERN.findall(wiring)}
+    pins |= {WIRING_BUS_PINS[name.upper()] for name in WIRING_BUS_PATTERN.findall(wiring)}
+    return PinUsage(pins)
+
+
+def pin_usage(code: str, wiring: Optional[str] = None) -> PinUsage:
+    """실행에 필요한 핀 (코드 + WIRING)"""
+    return with_wiring(pins_from_code(code), wiring)
+
+
+def with_wiring(usage: PinUsage, wiring: Optional[str]) -> PinUsage:
+    """
+    코드에서 찾은 핀에 WIRING의 핀을 더함
+
+    WIRING에 연결된 핀도 함께 잡아 두므로, 코드에서 핀을 못 찾은 경우에도 배선 기준으로 충돌을 막습니다.
+    코드가 하드웨어를 쓰지 않으면 WIRING이 있어도 사용권이 필요 없습니다.
+    """
+    if usage.empty:
+        return usage
+    wired = pins_from_wiring(wiring)
+    if usage.all_pins and wired.pins:
+        # 코드에서 핀을 해석하지 못했으면 배선에 연결된 핀만 사용한다고 판단
+        return PinUsage(usage.pins | wired.pins)
+    return usage | wired
+
+
+class PinLease:
+    """핀 사용권 하나 (request() → wait() → release())"""
+
+    def __init__(self, scheduler: "HardwareScheduler", usage: PinUsage, label: str):
+        self.lease_id = uuid.uuid4().hex[:8]
+        self.scheduler = scheduler
+        self.usage = usage
+        self.label = label
+        self.requested = time.monotonic()
+        self.granted_at: Optional[float] = None
+        self.position = 0  # 대기 순서 (1부터, 사용 중이면 0)
+        self.released = False
+        self._changed = asyncio.Event()
+
+    @property
+    def granted(self) -> bool:
+        return self.granted_at is not None
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self, on_position: Optional[Callable[[int], None]] = None):
+        """사용권을 받을 때까지 대기 (대기 순서가 바뀔 때마다 on_position 호출)"""
+        reported = None
+        while not self.granted:
+            changed = self._changed
+            if on_position and self.position != reported:
+                reported = self.position
+                on_position(self.position)
+            await changed.wait()
+        if on_position and reported is not None:
+            on_position(0)
+
+    def release(self):
+        """사용권 반납 (대기 중 취소도 포함, 여러 번 호출해도 안전)"""
+        if not self.released:
+            self.released = True
+            self.scheduler._release(self)
+
+    def to_dict(self) -> dict:
+        now = time.monotonic()
+        return {
+            "lease_id": self.lease_id,
+            "label": self.label,
+            **self.usage.to_dict(),
+            "granted": self.granted,
+            "position": self.position,
+            "waited_seconds": round((self.granted_at or now) - self.requested, 3),
+        }
+
+
+class HardwareScheduler:
+    """
+    핀 사용권 스케줄러
+
+    대기열은 요청 순서를 유지하며, 대기 중인 사용권은 다음 조건을 모두 만족할 때 바로 승인합니다.
+        - 사용 중인 사용권과 핀이 겹치지 않음
+        - 앞에서 기다리는 사용권과 핀이 겹치지 않음 (겹치는 요청끼리는 FIFO, 뒤 요청이 앞지르지 않음)
+    """
+
+    def __init__(self, enabled: bool = HARDWARE_SCHEDULER_ENABLED):
+        self.enabled = enabled
+        self._held: List[PinLease] = []
+        self._waiting: List[PinLease] = []
+        self.granted_count = 0
+        self.queued_count = 0
+        self.total_wait = 0.0
+
+    def request(self, usage: PinUsage, label: str = "") -> Optional[PinLease]:
+        """
+        사용권 요청 (가능하면 바로 승인, 아니면 대기열에 추가)
+
+        Returns:
+            Optional[PinLease]: 하드웨어를 쓰지 않거나 스케줄러가 꺼져 있으면 None
+        """
+        if not self.enabled or usage.empty:
+            return None
+        lease = PinLease(self, usage, label)
+        self._waiting.append(lease)
+        self._schedule()
+        if not lease.granted:
+            self.queued_count += 1
+            print(f"[Hardware] {label or lease.lease_id} 대기 ({usage.describe()}, {lease.position}번째)")
+        return lease
+
+    def _schedule(self):
+        blocked: List[PinLease] = []
+        for lease in list(self._waiting):
+            if any(lease.usage.conflicts(other.usage) for other in self._held + blocked):
+                blocked.append(lease)
+                continue
+            self._waiting.remove(lease)
+            self._held.append(lease)
+            lease.granted_at = time.monotonic()
+            lease.position = 0
+            self.granted_count += 1
+            self.total_wait += lease.granted_at - lease.requested
+            lease._notify()
+
+        # 대기 순서: 앞에서 기다리는 겹치는 요청 수 + 1
+        for index, lease in enumerate(blocked):
+            position = 1 + sum(1 for other in blocked[:index] if lease.usage.conflicts(other.usage))
+            if position != lease.position:
+                lease.position = position
+                lease._notify()
+
+    def _release(self, lease: PinLease):
+        if lease in self._held:
+            self._held.remove(lease)
+        elif lease in self._waiting:
+            self._waiting.remove(lease)
+        self._schedule()
+
+    def list(self) -> List[PinLease]:
+        return self._held + self._waiting
+
+    def stats(self) -> dict:
+        busy = PinUsage()
+        for lease in self._held:
+            busy = busy | lease.usage
+        return {
+            "enabled": self.enabled,
+            "held": len(self._held),
+            "waiting": len(self._waiting),
+            "busy_pins": busy.to_dict(),
+            "granted": self.granted_count,
+            "queued": self.queued_count,
+            "avg_wait_seconds": round(self.total_wait / self.granted_count, 3) if self.granted_count else 0.0,
+        }
+
+
+# 서버 전역 하드웨어 스케줄러
+scheduler = HardwareScheduler()
@@ -0,0 +1,271 @@
+"""
+import 분석 모듈
+사용자 코드를 ast로 분석해 최상위 모듈 이름을 찾고, 표준 라이브러리 / 설치됨 / 미설치로 분류합니다.
+미설치 패키지는 프로세스를 띄우기 전에 바로 알려줄 수 있습니다.
+
+설치 여부는 Master VM의 site-packages (Slave VM이 심볼릭 링크로 공유) 목록으로 판단하며
+(Slave VM이 include-system-site-packages이면 시스템 site-packages도 포함),
+분석 결과는 코드 해시별로 캐시합니다 (site-packages가 바뀌면 캐시를 비움).
+"""
+
+import ast
+import hashlib
+import os
+import site
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import vm_manager
+
+# 기본 설정 (환경변수로 변경 가능)
+IMPORT_CACHE_SIZE = int(os.getenv("IMPORT_CACHE_SIZE", "256"))  # 코드 해시별 분석 결과 캐시 수
+
+# Slave VM과 Master VM은 서버와 같은 Python 버전을 사용하므로 서버 기준 표준 라이브러리 목록 사용
+STDLIB_MODULES: Set[str] = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names)
+
+# except 절에서 이 예외를 잡으면 선택적 import로 취급 (없어도 실행 가능)
+IMPORT_ERROR_NAMES = {"ImportError", "ModuleNotFoundError", "Exception", "BaseException"}
+
+# 동적 import 함수 (문자열 상수 인자만 분석)
+DYNAMIC_IMPORT_CALLS = {"import_module", "__import__"}
+
+
+class ImportAnalysis:
+    """코드 하나의 import 분석 결과"""
+
+    def __init__(self, modules: Dict[str, bool], stdlib: List[str], installed: List[str],
+                 missing: List[str], optional_missing: List[str], unknown: List[str],
+                 syntax_error: Optional[str] = None):
+        self.modules = modules  # 모듈 이름 → 필수 여부 (try/except ImportError 밖에서 import)
+        self.stdlib = stdlib
+        self.installed = installed
+        self.missing = missing                    # 필수인데 설치되지 않은 모듈
+        self.optional_missing = optional_missing  # 선택적 import라서 실행은 가능
+        self.unknown = unknown                    # site-packages를 찾을 수 없어 판단하지 못한 모듈
+        self.syntax_error = syntax_error
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing
+
+    def error_message(self) -> Optional[str]:
+        """실행 전에 사용자에게 보여줄 미설치 패키지 안내"""
+        if self.ok:
+            return None
+        names = ", ".join(self.missing)
+        return f"설치되지 않은 패키지: {names}\n패키지를 설치한 뒤 다시 실행하세요."
+
+    def to_dict(self) -> dict:
+        return {
+            "modules": sorted(self.modules),
+            "stdlib": self.stdlib,
+            "installed": self.installed,
+            "missing": self.missing,
+            "optional_missing": self.optional_missing,
+            "unknown": self.unknown,
+            "syntax_error": self.syntax_error,
+        }
+
+
+class _ImportVisitor(ast.NodeVisitor):
+    """최상위 모듈 이름과 필수 여부 수집"""
+
+    def __init__(self):
+        self.modules: Dict[str, bool] = {}
+        self._optional_depth = 0  # try/except ImportError 블록 깊이
+
+    def _add(self, dotted: Optional[str]):
+        if not dotted:
+            return
+        name = dotted.split(".", 1)[0]
+        required = self._optional_depth == 0
+        self.modules[name] = self.modules.get(name, False) or required
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self._add(alias.name)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.level == 0:  # 상대 import는 사용자 코드에서 의미 없음
+            self._add(node.module)
+
+    def visit_Try(self, node):
+        if any(_catches_import_error(handler) for handler in node.handlers):
+            self._optional_depth += 1
+            for statement in node.body:
+                self.visit(statement)
+            self._optional_depth -= 1
+            for statement in node.handlers + node.orelse + node.finalbody:
+                self.visit(statement)
+        else:
+            self.generic_visit(node)
+
+    visit_TryStar = visit_Try
+
+    def visit_Call(self, node: ast.Call):
+        func = node.func
+        name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+        if (name in DYNAMIC_IMPORT_CALLS and node.args
+                and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str)):
+            self._add(node.args[0].value)
+        self.generic_visit(node)
+
+
+def _catches_import_error(handler: ast.ExceptHandler) -> bool:
+    if handler.type is None:
+        return True
+    types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+    return any(getattr(node, "id", getattr(node, "attr", None)) in IMPORT_ERROR_NAMES for node in types)
+
+
+def find_imports(code: str) -> Dict[str, bool]:
+    """
+    코드에서 import하는 최상위 모듈 이름 추출
+
+    Returns:
+        Dict[str, bool]: 모듈 이름 → 필수 여부
+
+    Raises:
+        SyntaxError: 코드를 파싱할 수 없음
+    """
+    visitor = _ImportVisitor()
+    visitor.visit(ast.parse(code))
+    return visitor.modules
+
+
+def scan_site_packages(site_packages: Path) -> Set[str]:
+    """site-packages에서 import 가능한 최상위 모듈 이름 수집"""
+    names: Set[str] = set()
+    try:
+        entries = list(os.scandir(site_packages))
+    except OSError:
+        return names
+
+    for entry in entries:
+        name = entry.name
+        if name.startswith("."):
+            continue
+        if entry.is_dir():
+            if name.endswith((".dist-info", ".egg-info")):
+                # 배포 이름과 모듈 이름이 다른 패키지 (예: RPi.GPIO → RPi)
+                top_level = Path(entry.path) / "top_level.txt"
+                try:
+                    names.update(line.strip() for line in top_level.read_text(encoding="utf-8").splitlines()
+                                 if line.strip())
+                except OSError:
+                    pass
+            elif name != "__pycache__" and "." not in name:
+                names.add(name)  # 일반 패키지 / 네임스페이스 패키지
+        elif name.endswith((".py", ".so", ".pyd")):
+            names.add(name.split(".", 1)[0])  # 단일 모듈 / 확장 모듈 (name.cpython-311-...so)
+    return names
+
+
+def slave_site_dirs() -> List[Path]:
+    """Slave VM에서 import할 수 있는 site-packages 목록 (첫 번째가 Master VM의 site-packages)"""
+    dirs = [vm_manager.MASTER_SITE_PACKAGES]
+    try:
+        config = (vm_manager.SLAVE_VM_PATH / "pyvenv.cfg").read_text(encoding="utf-8")
+    except OSError:
+        return dirs
+    for line in config.splitlines():
+        key, _, value = line.partition("=")
+        if key.strip() == "include-system-site-packages" and value.strip().lower() == "true":
+            dirs.extend(Path(path) for path in site.getsitepackages([sys.base_prefix]))
+    return dirs
+
+
+class ImportAnalyzer:
+    """
+    import 분석기 (코드 해시별 결과 캐시)
+
+    site-packages 디렉토리의 mtime이 바뀌면 (패키지 설치/삭제) 설치 목록을 다시 읽고 캐시를 비웁니다.
+    Master VM의 site-packages가 없으면 설치 여부를 판단하지 않습니다 (unknown).
+    """
+
+    def __init__(self, site_dirs: Optional[List[Path]] = None, cache_size: int = IMPORT_CACHE_SIZE):
+        self.site_dirs = site_dirs if site_dirs is not None else slave_site_dirs()
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, ImportAnalysis]" = OrderedDict()
+        self._installed: Optional[Set[str]] = None
+        self._signature: Optional[tuple] = None
+        self.hits = 0
+        self.misses = 0
+        self.rescans = 0
+
+    def _dir_signature(self) -> tuple:
+        signature = []
+        for path in self.site_dirs:
+            try:
+                signature.append(path.stat().st_mtime_ns)
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def installed_modules(self) -> Optional[Set[str]]:
+        """설치된 최상위 모듈 (site-packages가 바뀌었을 때만 다시 읽음, 판단 불가면 None)"""
+        signature = self._dir_signature()
+        if signature != self._signature:
+            if signature and signature[0] is not None:
+                self._installed = set()
+                for path, mtime in zip(self.site_dirs, signature):
+                    if mtime is not None:
+                        self._installed |= scan_site_packages(path)
+            else:
+                self._installed = None
+            self._signature = signature
+            self._cache.clear()
+            self.rescans += 1
+        return self._installed
+
+    def analyze(self, code: str) -> ImportAnalysis:
+        installed = self.installed_modules()
+        key = hashlib.sha256(code.encode("utf-8")).hexdigest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        try:
+            modules = find_imports(code)
+            syntax_error = None
+        except SyntaxError as e:
+            # 실행 시 Python이 정확한 오류를 보여주므로 여기서는 막지 않음
+            modules, syntax_error = {}, f"line {e.lineno}: {e.msg}"
+
+        stdlib, found, missing, optional_missing, unknown = [], [], [], [], []
+        for name in sorted(modules):
+            if name in STDLIB_MODULES:
+                stdlib.append(name)
+            elif installed is None:
+                unknown.append(name)
+            elif name in installed:
+                found.append(name)
+            elif modules[name]:
+                missing.append(name)
+            else:
+                optional_missing.append(name)
+
+        analysis = ImportAnalysis(modules, stdlib, found, missing, optional_missing, unknown, syntax_error)
+        self._cache[key] = analysis
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return analysis
+
+    def stats(self) -> dict:
+        return {
+            "site_packages": [str(path) for path in self.site_dirs],
+            "installed_modules": len(self._installed) if self._installed is not None else None,
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "rescans": self.rescans,
+        }
+
+
+# 서버 전역 분석기
+analyzer = ImportAnalyzer()
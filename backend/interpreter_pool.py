@@ -0,0 +1,386 @@
+"""
+사전 준비(warm) 인터프리터 풀
+Slave VM에서 하드웨어 라이브러리를 미리 import한 zygote 프로세스를 유지하고,
+실행 요청마다 zygote가 fork한 자식 프로세스를 asyncio 서브프로세스처럼 다룰 수 있게 합니다.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 기본 설정 (환경변수로 변경 가능)
+EXEC_POOL_SIZE = int(os.getenv("EXEC_POOL_SIZE", "2"))                 # zygote 개수 (0이면 비활성화)
+EXEC_POOL_MAX_REUSE = int(os.getenv("EXEC_POOL_MAX_REUSE", "50"))      # zygote 하나당 최대 fork 횟수
+EXEC_WARMUP_MODULES = [
+    name.strip()
+    for name in os.getenv("EXEC_WARMUP_MODULES", "gpiozero,RPi.GPIO,time").split(",")
+    if name.strip()
+]
+
+ZYGOTE_SCRIPT = Path(__file__).resolve().parent / "runtime" / "pigent_zygote.py"
+
+
+def pool_supported() -> bool:
+    """fork + fd 전달(SCM_RIGHTS)이 가능한 플랫폼인지 확인"""
+    return os.name == "posix" and hasattr(socket, "send_fds") and hasattr(os, "fork")
+
+
+class WarmProcess:
+    """
+    zygote가 fork한 자식 프로세스
+
+    asyncio.subprocess.Process와 같은 인터페이스
+    (pid, returncode, stdin, stdout, stderr, wait, communicate, terminate, kill)를 제공합니다.
+    """
+
+    mode = "warm"
+
+    def __init__(self, pid: int, sock: socket.socket, stdin: asyncio.StreamWriter,
+                 stdout: asyncio.StreamReader, stderr: Optional[asyncio.StreamReader], pending: bytes = b""):
+        self.pid = pid
+        self.returncode: Optional[int] = None
+        self.rusage: Optional[dict] = None
+        self.stdin = stdin
+        self.stdout = stdout
+        self.stderr = stderr
+        self._sock = sock
+        self._pending = pending
+        self._exited = asyncio.get_running_loop().create_future()
+        self._monitor = asyncio.create_task(self._wait_exit())
+
+    async def _wait_exit(self):
+        """zygote가 보내는 종료 메시지 대기"""
+        loop = asyncio.get_running_loop()
+        buffer = self._pending
+        try:
+            while b"\n" not in buffer:
+                data = await loop.sock_recv(self._sock, 4096)
+                if not data:
+                    break
+                buffer += data
+        except OSError:
+            pass
+        finally:
+            self._sock.close()
+
+        if b"\n" in buffer:
+            message = json.loads(buffer.split(b"\n", 1)[0])
+            self.returncode = message["exit"]
+            self.rusage = message.get("rusage")
+        else:
+            # zygote가 비정상 종료 → 고아가 된 자식 정리
+            self._signal(signal.SIGKILL)
+            self.returncode = -signal.SIGKILL
+        self._exited.set_result(self.returncode)
+
+    def _signal(self, signum: int):
+        if self.returncode is not None:
+            return
+        try:
+            os.kill(self.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def terminate(self):
+        self._signal(signal.SIGTERM)
+
+    def kill(self):
+        self._signal(signal.SIGKILL)
+
+    async def wait(self) -> int:
+        return await asyncio.shield(self._exited)
+
+    async def communicate(self, input: Optional[bytes] = None):
+        if input:
+            self.stdin.write(input)
+            await self.stdin.drain()
+        self.stdin.close()
+
+        async def read_all(stream):
+            return await stream.read() if stream is not None else None
+
+        stdout, stderr = await asyncio.gather(read_all(self.stdout), read_all(self.stderr))
+        await self.wait()
+        return stdout, stderr
+
+
+class Zygote:
+    """Slave VM Python으로 실행되는 fork 서버 하나"""
+
+    def __init__(self, python_exe: Path, socket_path: str, warmup_modules: List[str], max_reuse: int):
+        self.python_exe = python_exe
+        self.socket_path = socket_path
+        self.warmup_modules = warmup_modules
+        self.max_reuse = max_reuse
+        self.forks = 0
+        self.warmup_ms = 0.0
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._log_task: Optional[asyncio.Task] = None
+
+    async def start(self, timeout: float = 60.0):
+        env = os.environ.copy()
+        env['PYTHONUNBUFFERED'] = '1'
+        env['PYTHONIOENCODING'] = 'utf-8'
+
+        started = time.perf_counter()
+        self.process = await asyncio.create_subprocess_exec(
+            str(self.python_exe), "-u", str(ZYGOTE_SCRIPT),
+            "--socket", self.socket_path,
+            "--warmup", ",".join(self.warmup_modules),
+            "--max-forks", str(self.max_reuse),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            env=env
+        )
+
+        # READY 출력 전까지의 로그는 그대로 전달
+        while True:
+            line = await asyncio.wait_for(self.process.stdout.readline(), timeout=timeout)
+            if not line:
+                raise RuntimeError("zygote가 준비되기 전에 종료되었습니다")
+            text = line.decode("utf-8", errors="replace").rstrip()
+            if text == "READY":
+                break
+            print(text)
+
+        self.warmup_ms = (time.perf_counter() - started) * 1000
+        self._log_task = asyncio.create_task(self._drain_output())
+
+    async def _drain_output(self):
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                break
+            print(line.decode("utf-8", errors="replace").rstrip())
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    @property
+    def exhausted(self) -> bool:
+        return bool(self.max_reuse) and self.forks >= self.max_reuse
+
+    async def spawn(self, script_path: str, env: Dict[str, str], merge_stderr: bool,
+                    resources: Optional[dict] = None) -> WarmProcess:
+        """자식 프로세스 fork 요청 후 파이프를 asyncio 스트림으로 연결"""
+        loop = asyncio.get_running_loop()
+
+        stdin_r, stdin_w = os.pipe()
+        stdout_r, stdout_w = os.pipe()
+        if merge_stderr:
+            stderr_r, stderr_w = None, stdout_w
+        else:
+            stderr_r, stderr_w = os.pipe()
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await loop.sock_connect(sock, self.socket_path)
+            request = json.dumps({
+                "script": script_path, "env": env, "cwd": os.getcwd(), "resources": resources
+            }) + "\n"
+            socket.send_fds(sock, [request.encode("utf-8")], [stdin_r, stdout_w, stderr_w])
+            self.forks += 1
+
+            # pid 수신
+            buffer = b""
+            while b"\n" not in buffer:
+                data = await loop.sock_recv(sock, 4096)
+                if not data:
+                    raise RuntimeError("zygote 연결이 끊어졌습니다")
+                buffer += data
+            line, pending = buffer.split(b"\n", 1)
+            pid = json.loads(line)["pid"]
+        except BaseException:
+            sock.close()
+            for fd in (stdin_w, stdout_r, stderr_r):
+                if fd is not None:
+                    os.close(fd)
+            raise
+        finally:
+            # 자식 쪽 fd는 zygote로 넘겼으므로 닫음 (닫지 않으면 stdout EOF가 오지 않음)
+            for fd in {stdin_r, stdout_w, stderr_w}:
+                os.close(fd)
+
+        async def reader_for(fd: int) -> asyncio.StreamReader:
+            reader = asyncio.StreamReader(limit=2 ** 16)
+            await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader),
+                os.fdopen(fd, "rb", 0)
+            )
+            return reader
+
+        stdout = await reader_for(stdout_r)
+        stderr = await reader_for(stderr_r) if stderr_r is not None else None
+        transport, protocol = await loop.connect_write_pipe(
+            lambda: asyncio.StreamReaderProtocol(asyncio.StreamReader()),
+            os.fdopen(stdin_w, "wb", 0)
+        )
+        stdin = asyncio.StreamWriter(transport, protocol, None, loop)
+
+        return WarmProcess(pid, sock, stdin, stdout, stderr, pending)
+
+    async def stop(self):
+        if self.alive:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=2.0)
+            except asyncio.TimeoutError:
+                self.process.kill()
+        if self._log_task:
+            self._log_task.cancel()
+
+
+class InterpreterPool:
+    """
+    zygote 풀 관리
+
+    - size: 동시에 유지할 zygote 개수
+    - warmup_modules: zygote가 미리 import할 모듈 목록
+    - max_reuse: zygote 하나가 fork할 수 있는 최대 횟수 (초과 시 새 zygote로 교체)
+    """
+
+    def __init__(self, size: int = EXEC_POOL_SIZE, warmup_modules: Optional[List[str]] = None,
+                 max_reuse: int = EXEC_POOL_MAX_REUSE):
+        self.size = size
+        self.warmup_modules = warmup_modules if warmup_modules is not None else EXEC_WARMUP_MODULES
+        self.max_reuse = max_reuse
+        self.python_exe: Optional[Path] = None
+        self._zygotes: List[Zygote] = []
+        self._socket_dir: Optional[str] = None
+        self._counter = 0
+        self._lock = asyncio.Lock()
+        self._replacing = set()
+
+        # 콜드/웜 스타트 지연 시간 통계 (밀리초)
+        self._metrics = {mode: {} for mode in ("cold", "warm")}
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 and pool_supported()
+
+    async def start(self, python_exe: Path, force: bool = False):
+        """zygote 풀 시작 (Slave VM Python 경로가 바뀌거나 force=True이면 재시작)"""
+        if not self.enabled:
+            print("[Interpreter Pool] 비활성화됨 (지원되지 않는 플랫폼 또는 EXEC_POOL_SIZE=0)")
+            return
+
+        async with self._lock:
+            if self.python_exe == python_exe and self._zygotes and not force:
+                return
+            await self._stop_all()
+            self.python_exe = python_exe
+            self._socket_dir = tempfile.mkdtemp(prefix="pigent-pool-")
+            results = await asyncio.gather(
+                *[self._start_zygote() for _ in range(self.size)],
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"[Interpreter Pool] zygote 시작 실패: {result}")
+            print(f"[Interpreter Pool] {len(self._zygotes)}/{self.size} zygote 준비 완료 "
+                  f"(warmup: {', '.join(self.warmup_modules) or '-'})")
+
+    async def _start_zygote(self) -> Zygote:
+        self._counter += 1
+        socket_path = os.path.join(self._socket_dir, f"zygote-{self._counter}.sock")
+        zygote = Zygote(self.python_exe, socket_path, self.warmup_modules, self.max_reuse)
+        await zygote.start()
+        self._zygotes.append(zygote)
+        return zygote
+
+    async def _replace(self, zygote: Zygote):
+        """fork 한도에 도달한 zygote를 새 zygote로 교체 (기존 zygote는 남은 자식 종료 후 스스로 종료)"""
+        if zygote in self._zygotes:
+            self._zygotes.remove(zygote)
+        try:
+            await self._start_zygote()
+        except Exception as e:
+            print(f"[Interpreter Pool] zygote 교체 실패: {e}")
+
+    async def spawn(self, python_exe: Path, script_path: str, env: Dict[str, str],
+                    merge_stderr: bool = False, resources: Optional[dict] = None) -> Optional[WarmProcess]:
+        """
+        warm 프로세스로 스크립트 실행
+
+        resources는 자식에서 적용할 cgroup/rlimit 설정입니다 (RunResources.child_spec()).
+
+        Returns:
+            Optional[WarmProcess]: 풀을 사용할 수 없으면 None (호출자가 콜드 스타트)
+        """
+        if not self.enabled or python_exe != self.python_exe:
+            return None
+
+        candidates = [z for z in self._zygotes if z.alive and not z.exhausted]
+        if not candidates:
+            return None
+        zygote = min(candidates, key=lambda z: z.forks)
+
+        try:
+            process = await zygote.spawn(script_path, env, merge_stderr, resources)
+        except Exception as e:
+            print(f"[Interpreter Pool] warm 실행 실패, 콜드 스타트로 전환: {e}")
+            return None
+
+        if zygote.exhausted:
+            task = asyncio.create_task(self._replace(zygote))
+            self._replacing.add(task)
+            task.add_done_callback(self._replacing.discard)
+        return process
+
+    def record(self, mode: str, metric: str, seconds: float):
+        """지연 시간 기록 (mode: cold/warm, metric: spawn/first_output/run)"""
+        entry = self._metrics[mode].setdefault(metric, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        ms = seconds * 1000
+        entry["count"] += 1
+        entry["total_ms"] += ms
+        entry["max_ms"] = max(entry["max_ms"], ms)
+
+    def stats(self) -> dict:
+        latency = {}
+        for mode, metrics in self._metrics.items():
+            latency[mode] = {
+                metric: {
+                    "count": entry["count"],
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 2),
+                    "max_ms": round(entry["max_ms"], 2),
+                }
+                for metric, entry in metrics.items()
+            }
+        return {
+            "enabled": self.enabled,
+            "size": self.size,
+            "max_reuse": self.max_reuse,
+            "warmup_modules": self.warmup_modules,
+            "zygotes": [
+                {"pid": z.process.pid, "forks": z.forks, "alive": z.alive, "warmup_ms": round(z.warmup_ms, 1)}
+                for z in self._zygotes if z.process
+            ],
+            "latency": latency,
+        }
+
+    async def _stop_all(self):
+        for zygote in self._zygotes:
+            await zygote.stop()
+        self._zygotes = []
+        if self._socket_dir:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+            self._socket_dir = None
+
+    async def stop(self):
+        async with self._lock:
+            await self._stop_all()
+            self.python_exe = None
+
+
+# 서버 전역 풀
+pool = InterpreterPool()
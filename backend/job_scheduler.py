@@ -0,0 +1,241 @@
+"""
+코드 실행 작업(Job) 스케줄러
+제출 즉시 job_id를 반환하고, 동시 실행 수 제한과 벽시계 타임아웃 아래에서 백그라운드 실행
+"""
+
+import asyncio
+import enum
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import code_executor
+import output_log
+
+# 기본 설정 (환경변수로 변경 가능)
+EXEC_MAX_CONCURRENT_JOBS = int(os.getenv("EXEC_MAX_CONCURRENT_JOBS", "2"))
+EXEC_MAX_QUEUED_JOBS = int(os.getenv("EXEC_MAX_QUEUED_JOBS", "32"))
+EXEC_JOB_TIMEOUT = float(os.getenv("EXEC_JOB_TIMEOUT", "30"))           # 기본 타임아웃 (초)
+EXEC_JOB_MAX_TIMEOUT = float(os.getenv("EXEC_JOB_MAX_TIMEOUT", "600"))  # 요청 가능한 최대 타임아웃 (초)
+EXEC_JOB_RETENTION = int(os.getenv("EXEC_JOB_RETENTION", "100"))        # 보관할 완료 작업 수
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.TIMEOUT, JobStatus.CANCELLED}
+
+
+class JobQueueFullError(Exception):
+    """대기 중인 작업이 너무 많아 새 작업을 받을 수 없음"""
+
+
+class ExecutionJob:
+    """코드 실행 작업 하나의 상태와 출력"""
+
+    log_kind = "job"  # 출력 기록 종류 (GET /runs)
+
+    def __init__(self, code: str, timeout: float, wiring: Optional[str] = None):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.code = code
+        self.timeout = timeout
+        self.wiring = wiring
+        self.status = JobStatus.QUEUED
+        self.queue_position: Optional[int] = None  # 핀 사용권 대기 순서 (하드웨어 대기 중일 때만)
+        self.exit_code: Optional[int] = None
+        self.mode: Optional[str] = None
+        self.usage: Optional[dict] = None
+        self.created_time = datetime.now()
+        self.started_time: Optional[datetime] = None
+        self.finished_time: Optional[datetime] = None
+
+        # stdout/stderr를 합친 출력 - 구독자는 바이트 offset으로 이어서 읽음 (작업이 정리된 뒤에도 GET /runs로 조회)
+        self.log = output_log.store.create(self.log_kind, self.job_id)
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def output(self, stream: str) -> str:
+        return self.log.text(stream)
+
+    def append_output(self, stream: str, text: str):
+        self.log.append(stream, text)
+        self._notify()
+
+    def set_queue_position(self, position: int):
+        """핀 사용권 대기 순서 변경 (0이면 사용권을 받음)"""
+        self.queue_position = position or None
+        self._notify()
+
+    def set_status(self, status: JobStatus):
+        self.status = status
+        if status == JobStatus.RUNNING:
+            self.started_time = datetime.now()
+        elif status in FINISHED_STATUSES:
+            self.finished_time = datetime.now()
+            self.log.close(status.value)
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self):
+        """작업 완료까지 대기"""
+        while not self.finished:
+            await self._changed.wait()
+
+    async def follow(self, offset: int = 0) -> AsyncIterator[Tuple[str, str, int]]:
+        """offset(바이트)부터 완료될 때까지 출력을 (stream, 텍스트, 다음 offset)으로 전달"""
+        while True:
+            changed = self._changed
+            while offset < self.log.end:
+                next_offset, pieces = self.log.segments(offset)
+                if next_offset == offset:
+                    break  # 아직 문자가 완성되지 않음
+                for piece in pieces:
+                    yield piece
+                offset = next_offset
+            if self.finished:
+                return
+            await changed.wait()
+
+    def to_dict(self, include_output: bool = True) -> dict:
+        data = {
+            "job_id": self.job_id,
+            "status": self.status.value,
+            "exit_code": self.exit_code,
+            "mode": self.mode,
+            "usage": self.usage,
+            "timeout": self.timeout,
+            "queue_position": self.queue_position,
+            "created_time": self.created_time,
+            "started_time": self.started_time,
+            "finished_time": self.finished_time,
+            "offset": self.log.end,
+        }
+        if include_output:
+            data["stdout"] = self.output("stdout")
+            data["stderr"] = self.output("stderr")
+        return data
+
+
+class JobScheduler:
+    """
+    실행 작업 스케줄러
+
+    - max_concurrent 개까지 동시에 실행, 나머지는 FIFO 대기
+    - 대기 작업이 max_queued를 넘으면 제출 거절 (백프레셔)
+    - 작업마다 벽시계 타임아웃 적용
+    - 같은 핀을 쓰는 작업은 핀 사용권을 받을 때까지 대기 (hardware_scheduler)
+    """
+
+    def __init__(self, max_concurrent: int = EXEC_MAX_CONCURRENT_JOBS, max_queued: int = EXEC_MAX_QUEUED_JOBS,
+                 default_timeout: float = EXEC_JOB_TIMEOUT, retention: int = EXEC_JOB_RETENTION):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max_queued
+        self.default_timeout = default_timeout
+        self.retention = retention
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._jobs: "OrderedDict[str, ExecutionJob]" = OrderedDict()
+
+    def _count(self, status: JobStatus) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == status)
+
+    def submit(self, code: str, timeout: Optional[float] = None, wiring: Optional[str] = None) -> ExecutionJob:
+        """작업 제출 (즉시 반환, 실행은 백그라운드)"""
+        if self._count(JobStatus.QUEUED) >= self.max_queued:
+            raise JobQueueFullError(f"대기 중인 작업이 너무 많습니다 ({self.max_queued})")
+
+        timeout = min(timeout or self.default_timeout, EXEC_JOB_MAX_TIMEOUT)
+        job = ExecutionJob(code, timeout, wiring)
+        self._jobs[job.job_id] = job
+        job._task = asyncio.create_task(self._run(job))
+        self._prune()
+        return job
+
+    async def _run(self, job: ExecutionJob):
+        try:
+            # 미설치 패키지가 있으면 실행 슬롯을 기다리지 않고 바로 실패 (자동 설치는 슬롯 밖에서 진행)
+            missing = await code_executor.prepare_imports(job.code, on_output=job.append_output)
+            if missing:
+                job.append_output("stderr", missing)
+                job.set_status(JobStatus.FAILED)
+                return
+
+            # 핀 사용권은 실행 슬롯보다 먼저 받음 (같은 핀을 기다리는 작업이 슬롯을 차지하지 않도록)
+            lease = await code_executor.acquire_hardware(job.code, job.wiring, label=f"job {job.job_id}")
+            try:
+                if lease:
+                    await code_executor.wait_hardware(lease, job.set_queue_position, job.append_output)
+                async with self._semaphore:
+                    job.set_status(JobStatus.RUNNING)
+                    result = await code_executor.run_code(job.code, timeout=job.timeout, on_output=job.append_output,
+                                                          hardware=False)
+            finally:
+                if lease:
+                    lease.release()
+
+            job.exit_code = result["exit_code"]
+            job.mode = result["mode"]
+            job.usage = result["usage"]
+            if result["timed_out"]:
+                job.set_status(JobStatus.TIMEOUT)
+            elif result["success"]:
+                job.set_status(JobStatus.SUCCEEDED)
+            else:
+                if result["exit_code"] is None and result["stderr"]:
+                    job.append_output("stderr", result["stderr"])
+                job.set_status(JobStatus.FAILED)
+        except asyncio.CancelledError:
+            job.set_status(JobStatus.CANCELLED)
+        except Exception as e:
+            # VM 재생성 실패 등 실행 전 오류 - 작업이 대기/실행 상태로 남지 않도록 실패 처리
+            print(f"[Job] {job.job_id} 실행 오류: {e}")
+            job.append_output("stderr", f"Code execution error: {e}")
+            job.set_status(JobStatus.FAILED)
+
+    def get(self, job_id: str) -> Optional[ExecutionJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[ExecutionJob]:
+        return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        """대기 중이거나 실행 중인 작업 취소 (실행 중이면 프로세스 종료)"""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        job._task.cancel()
+        return True
+
+    def _prune(self):
+        """보관 한도를 넘은 오래된 완료 작업 삭제"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self.retention, 0)]:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "default_timeout": self.default_timeout,
+            "queued": self._count(JobStatus.QUEUED),
+            "running": self._count(JobStatus.RUNNING),
+            "total": len(self._jobs),
+        }
+
+
+# 서버 전역 스케줄러
+scheduler = JobScheduler()
@@ -0,0 +1,179 @@
+"""
+LLM 응답 캐시 모듈
+프롬프트 템플릿 해시 + 정규화된 사용자 입력 + 모델 이름을 키로 하는
+메모리 LRU(TTL) 캐시와 선택적 SQLite 영구 캐시
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+# 기본 설정 (환경변수로 변경 가능)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))             # 초
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))
+LLM_CACHE_PERSIST = os.getenv("LLM_CACHE_PERSIST", "0") == "1"
+
+# 영구 캐시 파일 경로 (pigent.db와 같은 backend 폴더)
+CACHE_DB_PATH = Path(__file__).resolve().parent / "llm_cache.db"
+
+
+def normalize_user_input(user_input: str) -> str:
+    """
+    캐시 키용 사용자 입력 정규화
+
+    유니코드 NFC 정규화, 대소문자 통일, 연속 공백 축약
+    """
+    text = unicodedata.normalize("NFC", user_input)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.casefold()
+
+
+def make_cache_key(template: str, user_input: str, model_name: str, history: str = "") -> str:
+    """프롬프트 템플릿 해시 + 정규화된 입력 + 모델 이름 (+ 대화 기록)으로 캐시 키 생성"""
+    template_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()
+    raw = f"{template_hash}\x00{model_name}\x00{normalize_user_input(user_input)}"
+    if history:
+        raw += "\x00" + hashlib.sha256(history.encode("utf-8")).hexdigest()
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PersistentCache:
+    """SQLite 기반 영구 캐시 (서버 재시작 후에도 유지)"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " cache_key TEXT PRIMARY KEY,"
+            " response_text TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, ttl: float) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response_text, created_at FROM llm_cache WHERE cache_key = ?",
+                (key,)
+            ).fetchone()
+            if row and time.time() - row[1] > ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+                self._conn.commit()
+                return None
+        return row
+
+    def put(self, key: str, response_text: str, created_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (cache_key, response_text, created_at) VALUES (?, ?, ?)",
+                (key, response_text, created_at)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+
+class LLMResponseCache:
+    """
+    2단계 LLM 응답 캐시
+
+    1. 메모리: OrderedDict 기반 LRU + TTL
+    2. SQLite (선택): 메모리 미스 시 조회, 히트하면 메모리로 승격
+    """
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl: float = LLM_CACHE_TTL,
+                 persist: bool = LLM_CACHE_PERSIST, enabled: bool = LLM_CACHE_ENABLED):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._persistent = PersistentCache(CACHE_DB_PATH) if (enabled and persist) else None
+
+        # 통계
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        """캐시 조회 (없거나 만료되면 None)"""
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            response_text, created_at = entry
+            if time.time() - created_at <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return response_text
+            del self._entries[key]
+
+        if self._persistent is not None:
+            row = await asyncio.to_thread(self._persistent.get, key, self.ttl)
+            if row is not None:
+                self._store_memory(key, row[0], row[1])
+                self.persistent_hits += 1
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, response_text: str):
+        """캐시 저장 (메모리 + 영구 캐시)"""
+        if not self.enabled:
+            return
+
+        created_at = time.time()
+        self._store_memory(key, response_text, created_at)
+        if self._persistent is not None:
+            try:
+                await asyncio.to_thread(self._persistent.put, key, response_text, created_at)
+            except Exception as e:
+                print(f"[LLM Cache] 영구 캐시 저장 실패: {e}")
+
+    def record_bypass(self):
+        self.bypassed += 1
+
+    def _store_memory(self, key: str, response_text: str, created_at: float):
+        self._entries[key] = (response_text, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def clear(self):
+        self._entries.clear()
+        if self._persistent is not None:
+            await asyncio.to_thread(self._persistent.clear)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.persistent_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "persistent": self._persistent is not None,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.persistent_hits) / lookups, 3) if lookups else 0.0,
+        }
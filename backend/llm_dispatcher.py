@@ -0,0 +1,300 @@
+"""
+LLM 호출 디스패치 모듈
+프로바이더별 동시 실행 수 제한, 대기열 백프레셔, 요청별 데드라인 관리
+"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+# 기본 설정 (환경변수로 변경 가능)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))          # 요청별 데드라인 (초)
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))        # 프로바이더별 최대 대기 요청 수
+
+
+class LLMQueueFullError(Exception):
+    """대기열이 가득 차서 요청을 받을 수 없음 (백프레셔)"""
+
+
+class LLMDeadlineExceeded(Exception):
+    """요청 데드라인 초과"""
+
+
+class ProviderLimiter:
+    """
+    단일 프로바이더의 동시 호출 수 제한기
+
+    - max_concurrency 만큼만 동시에 upstream 호출
+    - 나머지는 최대 max_queue 개까지 대기, 초과 시 즉시 거절
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # 통계
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def acquire(self, deadline: float):
+        """
+        슬롯 확보 (빈 슬롯이 있으면 즉시, 없으면 대기열에서 대기)
+
+        Args:
+            deadline: time.monotonic() 기준 절대 데드라인
+        """
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise LLMQueueFullError(f"{self.name} 대기열이 가득 찼습니다 ({self.max_queue})")
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise LLMDeadlineExceeded(f"{self.name} 대기 중 데드라인 초과")
+            finally:
+                self.waiting -= 1
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    async def run(self, factory: Callable[[], Awaitable[Any]], deadline: float) -> Any:
+        """
+        슬롯을 얻은 뒤 factory()가 만든 코루틴을 데드라인 안에서 실행
+
+        데드라인 초과 시 호출자에게는 바로 LLMDeadlineExceeded를 올리지만,
+        슬롯은 호출이 실제로 끝난 뒤에 반납합니다 (워커 스레드가 아직 돌고 있을 수 있음).
+
+        Args:
+            factory: 호출 시 코루틴을 반환하는 함수
+            deadline: time.monotonic() 기준 절대 데드라인
+        """
+        await self.acquire(deadline)
+        call = asyncio.ensure_future(factory())
+        try:
+            result = await asyncio.wait_for(asyncio.shield(call), timeout=max(deadline - time.monotonic(), 0))
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise LLMDeadlineExceeded(f"{self.name} 응답 데드라인 초과")
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            if call.done():
+                self.release()
+            else:
+                call.cancel()
+                call.add_done_callback(lambda _: self.release())
+
+    async def stream(self, chunks: AsyncIterator[Any], deadline: float) -> AsyncIterator[Any]:
+        """
+        스트림 전체 동안 슬롯을 점유하며 청크를 전달 (청크마다 데드라인 확인)
+
+        소비자가 중간에 멈추면 aclose()로 닫아야 슬롯과 원본 스트림이 바로 정리됩니다.
+        """
+        await self.acquire(deadline)
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        chunks.__anext__(),
+                        timeout=max(deadline - time.monotonic(), 0)
+                    )
+                except StopAsyncIteration:
+                    break
+                yield chunk
+            self.completed += 1
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise LLMDeadlineExceeded(f"{self.name} 스트리밍 데드라인 초과")
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.release()
+            await chunks.aclose()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class LLMDispatcher:
+    """
+    프로바이더별 제한기와 전용 스레드 풀을 관리
+
+    동기 SDK(예: Gemini)는 프로바이더 전용 스레드 풀에서 실행하여
+    이벤트 루프를 막지 않고, 스레드 수도 동시 실행 수로 제한됩니다.
+    """
+
+    def __init__(self, default_timeout: float = LLM_TIMEOUT):
+        self.default_timeout = default_timeout
+        self._limiters: Dict[str, ProviderLimiter] = {}
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+
+    def register_provider(self, name: str, max_concurrency: int, max_queue: int = LLM_MAX_QUEUE):
+        """프로바이더 등록 (동시 실행 수, 대기열 크기 설정)"""
+        max_concurrency = max(1, max_concurrency)
+        self._limiters[name] = ProviderLimiter(name, max_concurrency, max_queue)
+        self._executors[name] = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix=f"llm-{name}"
+        )
+        print(f"[LLM] {name} 디스패처 등록 (동시 {max_concurrency}, 대기열 {max_queue})")
+
+    def new_deadline(self, timeout: Optional[float] = None) -> float:
+        """현재 시점 기준 절대 데드라인 계산"""
+        return time.monotonic() + (timeout or self.default_timeout)
+
+    def remaining(self, deadline: float) -> float:
+        """데드라인까지 남은 시간 (초, 워커 스레드에서도 호출 가능)"""
+        return max(deadline - time.monotonic(), 0)
+
+    async def run_async(self, provider: str, factory: Callable[[], Awaitable[Any]], deadline: float) -> Any:
+        """비동기 SDK 호출 실행"""
+        return await self._limiters[provider].run(factory, deadline)
+
+    async def run_blocking(self, provider: str, func: Callable[[], Any], deadline: float) -> Any:
+        """
+        동기 SDK 호출을 프로바이더 전용 스레드 풀에서 실행
+
+        실행 중인 스레드는 중단할 수 없으므로, 취소되어도 스레드가 끝날 때까지
+        기다렸다가 취소를 전달합니다 (그동안 슬롯 유지).
+        """
+        executor = self._executors[provider]
+
+        async def call():
+            future = executor.submit(func)
+            try:
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                if not future.cancel():
+                    await asyncio.wait([asyncio.wrap_future(future)])
+                raise
+
+        return await self._limiters[provider].run(call, deadline)
+
+    def stream_async(self, provider: str, factory: Callable[[], Awaitable[AsyncIterator[Any]]],
+                     deadline: float) -> AsyncIterator[Any]:
+        """비동기 SDK 스트리밍 호출 (factory는 비동기 이터레이터를 반환하는 코루틴)"""
+        async def chunks():
+            async with aclosing(await factory()) as stream:
+                async for chunk in stream:
+                    yield chunk
+
+        return self._limiters[provider].stream(chunks(), deadline)
+
+    def stream_blocking(self, provider: str, func: Callable[[], Iterator[Any]],
+                        deadline: float) -> AsyncIterator[Any]:
+        """
+        동기 SDK 스트리밍 호출
+
+        전용 스레드 풀에서 이터레이터를 소비하고 청크를 asyncio 큐로 넘겨받습니다.
+        소비자가 스트림을 닫으면 스레드도 다음 청크에서 멈추고 이터레이터를 닫습니다.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._executors[provider]
+        done = object()
+
+        async def chunks():
+            queue: asyncio.Queue = asyncio.Queue()
+            stopped = threading.Event()
+
+            def put(item):
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+
+            def produce():
+                iterator = None
+                try:
+                    iterator = iter(func())
+                    for chunk in iterator:
+                        if stopped.is_set():
+                            return
+                        put(chunk)
+                    put(done)
+                except Exception as e:
+                    put(e)
+                finally:
+                    close = getattr(iterator, "close", None)
+                    if stopped.is_set() and close is not None:
+                        close()
+
+            loop.run_in_executor(executor, produce)
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is done:
+                        return
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                stopped.set()
+
+        return self._limiters[provider].stream(chunks(), deadline)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: limiter.stats() for name, limiter in self._limiters.items()}
+
+    def shutdown(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SingleFlight:
+    """
+    동일 키의 동시 요청을 하나의 upstream 호출로 합치는 in-flight 중복 제거기
+
+    첫 요청(leader)이 호출을 독립 태스크로 시작하고, 같은 키로 들어온 요청은
+    그 태스크의 결과를 함께 기다립니다. 개별 요청이 취소되어도 공유 호출은 계속됩니다.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.leaders += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "shared": self.shared,
+        }
@@ -0,0 +1,358 @@
+"""
+LLM 프로바이더 레지스트리
+SDK import와 클라이언트 생성을 서버 시작 후 백그라운드(또는 첫 사용 시)로 미루고,
+프로바이더별 초기화 시간을 기록합니다.
+"""
+
+import asyncio
+import datetime
+import importlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from llm_dispatcher import LLMDispatcher
+from prompt_builder import Prompt
+
+
+class LLMUnavailableError(Exception):
+    """사용 가능한 LLM 프로바이더가 없음"""
+
+
+class LLMProvider:
+    """
+    프로바이더 공통 인터페이스
+
+    하위 클래스 구현:
+        configured(): 설정(API 키 등)이 있는지 - import 없이 판단
+        setup(): SDK import 및 클라이언트 생성 (블로킹, 스레드에서 실행)
+        generate(prompt, deadline, usage): 전체 응답 텍스트
+        stream(prompt, deadline, usage): 응답 텍스트 조각
+    usage 딕셔너리에는 응답 후 tokens_in / tokens_out을 채웁니다.
+    """
+
+    name = ""
+    default_concurrency = 1
+
+    def __init__(self, dispatcher: LLMDispatcher):
+        self.dispatcher = dispatcher
+        self.max_concurrency = int(os.getenv(f"{self.name.upper()}_MAX_CONCURRENCY", str(self.default_concurrency)))
+
+    @property
+    def model_name(self) -> str:
+        raise NotImplementedError
+
+    def configured(self) -> bool:
+        return True
+
+    def setup(self):
+        raise NotImplementedError
+
+    async def generate(self, prompt: Prompt, deadline: float, usage: dict) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: Prompt, deadline: float, usage: dict) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini (동기 SDK → dispatcher 전용 스레드 풀에서 실행)
+
+    템플릿은 system_instruction으로 전달하며, GEMINI_CONTEXT_CACHE=true이면
+    서버 측 cached content로 만들어 요청마다 다시 토큰화하지 않습니다.
+    """
+
+    name = "gemini"
+    default_concurrency = 4
+    MAX_MODELS = 8  # 시스템 지시문별로 보관할 모델 객체 수
+
+    def __init__(self, dispatcher: LLMDispatcher):
+        super().__init__(dispatcher)
+        self.api_key = os.getenv("LLM_API_KEY")
+        self._model_name = os.getenv("LLM_MODEL_NAME", "gemini-2.5-flash")
+        self.context_cache = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() == "true"
+        self.context_cache_ttl = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+        self.genai = None
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+        self._models_lock = threading.Lock()
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def setup(self):
+        self.genai = importlib.import_module("google.generativeai")
+        self.genai.configure(api_key=self.api_key)
+
+    def _create_model(self, system: str):
+        if self.context_cache:
+            try:
+                cached = self.genai.caching.CachedContent.create(
+                    model=f"models/{self._model_name}",
+                    system_instruction=system,
+                    ttl=datetime.timedelta(seconds=self.context_cache_ttl)
+                )
+                print(f"[LLM] Gemini cached content 생성: {cached.name}")
+                return self.genai.GenerativeModel.from_cached_content(cached_content=cached)
+            except Exception as e:
+                # 최소 토큰 수 미달 등 - system_instruction으로 대체
+                print(f"[LLM] Gemini cached content 사용 불가: {e}")
+        return self.genai.GenerativeModel(self._model_name, system_instruction=system)
+
+    def _model_for(self, prompt: Prompt):
+        """시스템 지시문별 모델 객체 (스레드 풀에서 호출)"""
+        key = prompt.system_hash
+        with self._models_lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._create_model(prompt.system)
+                self._models[key] = model
+                if len(self._models) > self.MAX_MODELS:
+                    self._models.popitem(last=False)
+            else:
+                self._models.move_to_end(key)
+            return model
+
+    @staticmethod
+    def _contents(prompt: Prompt) -> List[dict]:
+        return [
+            {"role": "user" if message["role"] == "user" else "model", "parts": [message["content"]]}
+            for message in prompt.messages
+        ]
+
+    @staticmethod
+    def _generation_config(prompt: Prompt) -> Optional[dict]:
+        if prompt.response_format == "json":
+            return {"response_mime_type": "application/json"}
+        return None
+
+    @staticmethod
+    def _record_usage(metadata, usage: dict):
+        if metadata is None:
+            return
+        usage["tokens_in"] = getattr(metadata, "prompt_token_count", None)
+        usage["tokens_out"] = getattr(metadata, "candidates_token_count", None)
+        cached_tokens = getattr(metadata, "cached_content_token_count", None)
+        if cached_tokens:
+            usage["tokens_cached"] = cached_tokens
+
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """스트리밍 청크의 텍스트 (안전 필터/종료 정보만 있는 청크는 빈 문자열)"""
+        candidates = getattr(chunk, "candidates", None) or []
+        if not any(getattr(candidate.content, "parts", None) for candidate in candidates):
+            return ""
+        try:
+            return chunk.text
+        except ValueError:
+            return ""  # 텍스트가 아닌 part만 있는 청크
+
+    async def generate(self, prompt: Prompt, deadline: float, usage: dict) -> str:
+        response = await self.dispatcher.run_blocking(
+            self.name,
+            lambda: self._model_for(prompt).generate_content(
+                self._contents(prompt),
+                generation_config=self._generation_config(prompt),
+                request_options={"timeout": self.dispatcher.remaining(deadline)}
+            ),
+            deadline
+        )
+        self._record_usage(getattr(response, "usage_metadata", None), usage)
+        return response.text
+
+    async def stream(self, prompt: Prompt, deadline: float, usage: dict) -> AsyncIterator[str]:
+        chunks = self.dispatcher.stream_blocking(
+            self.name,
+            lambda: self._model_for(prompt).generate_content(
+                self._contents(prompt),
+                generation_config=self._generation_config(prompt),
+                stream=True,
+                request_options={"timeout": self.dispatcher.remaining(deadline)}
+            ),
+            deadline
+        )
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                # 사용량은 마지막 청크 기준
+                self._record_usage(getattr(chunk, "usage_metadata", None), usage)
+                text = self._chunk_text(chunk)
+                if text:
+                    yield text
+
+
+class OllamaProvider(LLMProvider):
+    """
+    Ollama (AsyncClient)
+
+    템플릿을 system 메시지로 보내므로 같은 템플릿이면 Ollama가 프롬프트 앞부분의 KV 캐시를 재사용합니다.
+    """
+
+    name = "ollama"
+    default_concurrency = 1
+
+    def __init__(self, dispatcher: LLMDispatcher):
+        super().__init__(dispatcher)
+        self.host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+        self._model_name = os.getenv("OLLAMA_MODEL", "gemma3")
+        self.client = None
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    def setup(self):
+        ollama = importlib.import_module("ollama")
+        self.client = ollama.AsyncClient(host=self.host)
+
+    @staticmethod
+    def _messages(prompt: Prompt) -> List[dict]:
+        return [{"role": "system", "content": prompt.system}] + list(prompt.messages)
+
+    @staticmethod
+    def _record_usage(response, usage: dict):
+        usage["tokens_in"] = response.get("prompt_eval_count")
+        usage["tokens_out"] = response.get("eval_count")
+
+    async def generate(self, prompt: Prompt, deadline: float, usage: dict) -> str:
+        response = await self.dispatcher.run_async(
+            self.name,
+            lambda: self.client.chat(
+                model=self._model_name,
+                messages=self._messages(prompt),
+                format=prompt.response_format or ""
+            ),
+            deadline
+        )
+        self._record_usage(response, usage)
+        return response['message']['content']
+
+    async def stream(self, prompt: Prompt, deadline: float, usage: dict) -> AsyncIterator[str]:
+        chunks = self.dispatcher.stream_async(
+            self.name,
+            lambda: self.client.chat(
+                model=self._model_name,
+                messages=self._messages(prompt),
+                format=prompt.response_format or "",
+                stream=True
+            ),
+            deadline
+        )
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                if chunk.get("done"):
+                    self._record_usage(chunk, usage)
+                text = chunk['message']['content']
+                if text:
+                    yield text
+
+
+# 이름으로 선택 가능한 프로바이더 (LLM_PROVIDERS 환경변수 순서 = 우선순위)
+PROVIDER_CLASSES = {
+    GeminiProvider.name: GeminiProvider,
+    OllamaProvider.name: OllamaProvider,
+}
+
+
+class ProviderRegistry:
+    """
+    지연 초기화 프로바이더 레지스트리
+
+    - start_background(): 서버 시작 직후 백그라운드에서 초기화
+    - ensure_ready(): 초기화가 끝날 때까지 대기 후 사용 가능한 프로바이더 목록 반환
+      (초기화는 한 번만 실행되며 동시에 호출해도 같은 작업을 기다림)
+    - report(): 프로바이더별 상태와 초기화 시간
+    """
+
+    def __init__(self, dispatcher: LLMDispatcher, names: Optional[List[str]] = None):
+        self.dispatcher = dispatcher
+        if names is None:
+            names = [name.strip() for name in os.getenv("LLM_PROVIDERS", "gemini,ollama").split(",") if name.strip()]
+
+        self._providers: "OrderedDict[str, LLMProvider]" = OrderedDict()
+        self._status: Dict[str, Dict[str, Any]] = {}
+        for name in names:
+            cls = PROVIDER_CLASSES.get(name)
+            if cls is None:
+                print(f"[LLM] 알 수 없는 프로바이더: {name}")
+                continue
+            self.register(cls(dispatcher))
+
+        self._ready: List[LLMProvider] = []
+        self._init_task: Optional[asyncio.Task] = None
+        self.init_seconds: Optional[float] = None
+
+    def register(self, provider: LLMProvider):
+        """프로바이더 추가 (초기화 전에만 의미 있음)"""
+        self._providers[provider.name] = provider
+        self._status[provider.name] = {
+            "status": "pending" if provider.configured() else "unconfigured",
+            "model": provider.model_name,
+            "setup_seconds": None,
+            "error": None,
+        }
+
+    @property
+    def initialized(self) -> bool:
+        return self._init_task is not None and self._init_task.done()
+
+    def configured_providers(self) -> List[LLMProvider]:
+        """설정이 있는 프로바이더 (초기화 여부와 무관, 우선순위 순)"""
+        return [provider for provider in self._providers.values() if provider.configured()]
+
+    def ready_providers(self) -> List[LLMProvider]:
+        """초기화에 성공한 프로바이더 (우선순위 순)"""
+        return list(self._ready)
+
+    def get(self, name: str) -> Optional[LLMProvider]:
+        return self._providers.get(name)
+
+    def start_background(self) -> asyncio.Task:
+        if self._init_task is None:
+            self._init_task = asyncio.create_task(self._initialize())
+        return self._init_task
+
+    async def ensure_ready(self) -> List[LLMProvider]:
+        """초기화 완료 대기 (시작 전이면 지금 시작) 후 사용 가능한 프로바이더 반환"""
+        await asyncio.shield(self.start_background())
+        if not self._ready:
+            raise LLMUnavailableError("LLM을 사용할 수 없습니다. Gemini API 키를 설정하거나 Ollama를 실행하세요.")
+        return list(self._ready)
+
+    async def _initialize(self):
+        started = time.perf_counter()
+        for provider in self.configured_providers():
+            status = self._status[provider.name]
+            status["status"] = "initializing"
+            provider_started = time.perf_counter()
+            try:
+                await asyncio.to_thread(provider.setup)
+            except Exception as e:
+                status["status"] = "failed"
+                status["error"] = str(e)
+                print(f"[LLM] {provider.name} 초기화 실패: {e}")
+                continue
+            finally:
+                status["setup_seconds"] = round(time.perf_counter() - provider_started, 3)
+
+            self.dispatcher.register_provider(provider.name, provider.max_concurrency)
+            self._ready.append(provider)
+            status["status"] = "ready"
+            print(f"[LLM] {provider.name} 활성화 ({provider.model_name}, {status['setup_seconds']:.2f}s)")
+
+        self.init_seconds = round(time.perf_counter() - started, 3)
+        if not self._ready:
+            print("[LLM] 사용 가능한 LLM이 없습니다. LLM 기능을 제외한 API만 동작합니다.")
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "initialized": self.initialized,
+            "init_seconds": self.init_seconds,
+            "providers": {name: dict(status) for name, status in self._status.items()},
+        }
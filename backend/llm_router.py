@@ -0,0 +1,329 @@
+"""
+LLM 프로바이더 라우터
+프로바이더별 최근 상태(지연 시간, 오류율)를 기록하고 회로 차단기로 장애 프로바이더를 건너뜁니다.
+선택적으로 지연 시간 기준 정렬과 헤지(hedged) 요청을 지원합니다.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional
+
+from llm_dispatcher import LLMDeadlineExceeded, LLMQueueFullError
+from llm_providers import LLMProvider, LLMUnavailableError, ProviderRegistry
+from prompt_builder import Prompt
+
+# 기본 설정 (환경변수로 변경 가능)
+LLM_ROUTING = os.getenv("LLM_ROUTING", "priority")                        # priority: 설정 순서, latency: 빠른 순
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "0"))                # 0이면 헤지 요청 사용 안 함 (초)
+LLM_HEALTH_WINDOW = int(os.getenv("LLM_HEALTH_WINDOW", "20"))             # 오류율 계산에 쓰는 최근 호출 수
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))        # 연속 실패 시 차단
+LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))  # 최근 오류율 초과 시 차단
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))     # 차단 후 재시도까지 대기 (초)
+
+BREAKER_MIN_CALLS = 5       # 오류율로 차단하기 위한 최소 호출 수
+LATENCY_EWMA_ALPHA = 0.3    # 지연 시간 이동 평균 가중치
+
+# 프로바이더 장애로 보지 않는 오류 (로컬 대기열 초과, 요청 데드라인 소진) - 회로 차단기에 기록하지 않음
+NOT_PROVIDER_FAILURES = (LLMQueueFullError, LLMDeadlineExceeded)
+
+
+class CircuitBreaker:
+    """
+    회로 차단기
+
+    closed → (연속 실패 또는 오류율 초과) → open → (cooldown 경과) → half_open
+    half_open에서는 탐색 요청 하나만 허용하며, 성공하면 closed, 실패하면 다시 open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.open_count = 0
+        self._probing = False
+
+    def available(self) -> bool:
+        """요청을 보낼 수 있는 상태인지 (상태를 바꾸지 않음)"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() >= self.opened_at + self.cooldown
+        return not self._probing
+
+    def allow(self) -> bool:
+        """요청 허용 여부 (half_open이면 탐색 요청 슬롯을 차지함)"""
+        if self.state == self.OPEN and time.monotonic() >= self.opened_at + self.cooldown:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probing = False
+
+    def record_failure(self, error_rate_exceeded: bool = False):
+        self.consecutive_failures += 1
+        if (self.state == self.HALF_OPEN or error_rate_exceeded
+                or self.consecutive_failures >= self.failure_threshold):
+            self.trip()
+
+    def release(self):
+        """결과를 판단할 수 없는 요청(취소, 대기열 초과)이 끝남 - 탐색 슬롯 반환"""
+        self._probing = False
+
+    def trip(self):
+        if self.state != self.OPEN:
+            self.open_count += 1
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._probing = False
+
+    def retry_in(self) -> Optional[float]:
+        if self.state != self.OPEN:
+            return None
+        return max(0.0, round(self.opened_at + self.cooldown - time.monotonic(), 1))
+
+
+class ProviderHealth:
+    """프로바이더 하나의 최근 호출 결과와 회로 차단기"""
+
+    def __init__(self, window: int = LLM_HEALTH_WINDOW):
+        self.breaker = CircuitBreaker()
+        self.results = deque(maxlen=window)  # 최근 호출 성공 여부
+        self.latency_ewma: Optional[float] = None
+        self.calls = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def error_rate(self) -> float:
+        if not self.results:
+            return 0.0
+        return self.results.count(False) / len(self.results)
+
+    def record_success(self, latency: Optional[float] = None):
+        self.calls += 1
+        self.results.append(True)
+        if latency is not None:
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += LATENCY_EWMA_ALPHA * (latency - self.latency_ewma)
+        self.breaker.record_success()
+
+    def record_failure(self, error: BaseException):
+        self.calls += 1
+        self.failures += 1
+        self.results.append(False)
+        self.last_error = str(error) or type(error).__name__
+        exceeded = len(self.results) >= BREAKER_MIN_CALLS and self.error_rate >= LLM_BREAKER_ERROR_RATE
+        self.breaker.record_failure(error_rate_exceeded=exceeded)
+
+    def stats(self) -> dict:
+        return {
+            "state": self.breaker.state,
+            "retry_in": self.breaker.retry_in(),
+            "open_count": self.breaker.open_count,
+            "calls": self.calls,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate, 3),
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+class ProviderRouter:
+    """
+    프로바이더 선택과 장애 조치
+
+    - 회로가 열린 프로바이더는 타임아웃을 기다리지 않고 바로 건너뜀
+    - routing="latency"이면 최근 지연 시간이 짧은 프로바이더부터 시도
+    - hedge_delay > 0이면 첫 프로바이더가 그 시간 안에 응답하지 않을 때
+      다음 프로바이더에도 요청을 보내고 먼저 성공한 응답을 사용 (스트리밍 제외)
+    """
+
+    def __init__(self, registry: ProviderRegistry, routing: str = LLM_ROUTING,
+                 hedge_delay: float = LLM_HEDGE_DELAY):
+        self.registry = registry
+        self.routing = routing
+        self.hedge_delay = hedge_delay
+        self._health: Dict[str, ProviderHealth] = {}
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def health(self, name: str) -> ProviderHealth:
+        if name not in self._health:
+            self._health[name] = ProviderHealth()
+        return self._health[name]
+
+    def _order(self, providers: List[LLMProvider]) -> List[LLMProvider]:
+        """사용 가능한 프로바이더를 시도 순서대로 정렬"""
+        available = [provider for provider in providers if self.health(provider.name).breaker.available()]
+        if not available:
+            retry_in = min(self.health(provider.name).breaker.retry_in() or 0 for provider in providers)
+            raise LLMUnavailableError(f"모든 LLM 프로바이더가 일시 차단되었습니다 ({retry_in:.0f}초 후 재시도)")
+        if self.routing == "latency":
+            # 측정값이 없는 프로바이더는 설정 순서를 유지하며 뒤로
+            available.sort(key=lambda provider: (self.health(provider.name).latency_ewma is None,
+                                                 self.health(provider.name).latency_ewma or 0))
+        return available
+
+    async def _attempt(self, provider: LLMProvider, prompt: Prompt, deadline: float, usage: dict) -> str:
+        health = self.health(provider.name)
+        started = time.monotonic()
+        attempt_usage = dict(usage)
+        try:
+            text = await provider.generate(prompt, deadline, attempt_usage)
+        except (asyncio.CancelledError, *NOT_PROVIDER_FAILURES):
+            # 헤지에서 진 요청 / 로컬 대기열 초과 / 데드라인 소진은 프로바이더 장애가 아님
+            health.breaker.release()
+            raise
+        except Exception as e:
+            health.record_failure(e)
+            raise
+        health.record_success(time.monotonic() - started)
+        # 헤지 요청 중 이긴 요청의 사용량만 반영
+        usage.update(attempt_usage, provider=provider.name)
+        return text
+
+    async def generate(self, prompt: Prompt, deadline: float, usage: Optional[dict] = None) -> str:
+        """전체 응답 생성 (장애 조치 + 선택적 헤지)"""
+        usage = usage if usage is not None else {}
+        providers = self._order(await self.registry.ensure_ready())
+        if self.hedge_delay > 0 and len(providers) > 1:
+            return await self._generate_hedged(providers, prompt, deadline, usage)
+
+        last_error: Optional[Exception] = None
+        for provider in providers:
+            if deadline - time.monotonic() <= 0:
+                # 남은 프로바이더는 바로 데드라인 초과로 실패하므로 시도하지 않음 (차단기에도 기록하지 않음)
+                last_error = last_error or LLMDeadlineExceeded("LLM 요청 데드라인 초과")
+                break
+            if not self.health(provider.name).breaker.allow():
+                continue
+            try:
+                return await self._attempt(provider, prompt, deadline, usage)
+            except Exception as e:
+                print(f"[LLM] {provider.name} 호출 실패: {e}")
+                last_error = e
+        raise last_error or LLMUnavailableError("사용 가능한 LLM 프로바이더가 없습니다.")
+
+    async def _generate_hedged(self, providers: List[LLMProvider], prompt: Prompt, deadline: float,
+                               usage: dict) -> str:
+        remaining = iter(providers)
+        tasks: Dict[asyncio.Task, LLMProvider] = {}
+        errors: List[Exception] = []
+
+        def launch_next() -> bool:
+            if deadline - time.monotonic() <= 0:
+                return False
+            for provider in remaining:
+                if self.health(provider.name).breaker.allow():
+                    tasks[asyncio.create_task(self._attempt(provider, prompt, deadline, usage))] = provider
+                    return True
+            return False
+
+        if not launch_next():
+            raise LLMUnavailableError("사용 가능한 LLM 프로바이더가 없습니다.")
+        first = next(iter(tasks.values()))
+        can_hedge = True
+        hedged = False
+
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks, timeout=self.hedge_delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # 응답이 늦음 → 다음 프로바이더에도 요청
+                    can_hedge = launch_next()
+                    if can_hedge:
+                        hedged = True
+                        self.hedged += 1
+                    continue
+
+                for task in done:
+                    provider = tasks.pop(task)
+                    if task.exception() is None:
+                        if hedged and provider is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    print(f"[LLM] {provider.name} 호출 실패: {task.exception()}")
+                    errors.append(task.exception())
+
+                # 진행 중인 요청이 없으면 다음 프로바이더로 장애 조치
+                if not tasks and not launch_next():
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        raise errors[-1] if errors else LLMUnavailableError("사용 가능한 LLM 프로바이더가 없습니다.")
+
+    async def stream(self, prompt: Prompt, deadline: float, usage: Optional[dict] = None) -> AsyncIterator[str]:
+        """
+        스트리밍 응답 (첫 토큰 전 실패 시에만 다음 프로바이더로 장애 조치)
+        """
+        usage = usage if usage is not None else {}
+        providers = self._order(await self.registry.ensure_ready())
+        last_error: Optional[Exception] = None
+        for provider in providers:
+            if deadline - time.monotonic() <= 0:
+                last_error = last_error or LLMDeadlineExceeded("LLM 요청 데드라인 초과")
+                break
+            health = self.health(provider.name)
+            if not health.breaker.allow():
+                continue
+
+            started = False
+            try:
+                async with aclosing(provider.stream(prompt, deadline, usage)) as texts:
+                    async for text in texts:
+                        started = True
+                        yield text
+            except (asyncio.CancelledError, GeneratorExit):
+                health.breaker.release()
+                raise
+            except Exception as e:
+                if isinstance(e, NOT_PROVIDER_FAILURES):
+                    health.breaker.release()
+                else:
+                    health.record_failure(e)
+                print(f"[LLM] {provider.name} 스트리밍 실패: {e}")
+                if started:
+                    raise
+                last_error = e
+                continue
+
+            health.record_success()
+            usage["provider"] = provider.name
+            return
+        raise last_error or LLMUnavailableError("사용 가능한 LLM 프로바이더가 없습니다.")
+
+    def stats(self) -> dict:
+        return {
+            "routing": self.routing,
+            "hedge_delay": self.hedge_delay,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "providers": {
+                provider.name: self.health(provider.name).stats()
+                for provider in self.registry.configured_providers()
+            },
+        }
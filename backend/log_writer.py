@@ -0,0 +1,141 @@
+"""
+요청/응답 로그 비동기 기록 모듈
+요청 경로에서는 메모리 큐에 넣기만 하고, 백그라운드 작업이 모아서
+날짜별 JSON Lines 파일(log/YYYY-MM-DD.jsonl[.gz])에 한 번에 추가합니다.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 기본 설정 (환경변수로 변경 가능)
+LOG_DIR = Path(os.getenv("LOG_DIR", "./log"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "1000"))           # 대기 가능한 로그 수 (초과 시 버림)
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "100"))            # 한 번에 쓰는 최대 로그 수
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "2.0"))  # 로그를 모으는 최대 시간 (초)
+LOG_COMPRESS = os.getenv("LOG_COMPRESS", "false").lower() == "true"
+
+
+class LogWriter:
+    """
+    배치 로그 기록기
+
+    - log(): 큐에 넣고 즉시 반환 (큐가 가득 차면 버리고 dropped 증가)
+    - 기록 작업: 첫 로그가 들어오면 flush_interval 동안 또는 batch_size개까지 모은 뒤
+      날짜별 파일에 한 번에 추가 (파일 쓰기는 스레드에서 수행)
+    - stop(): 남은 로그를 모두 기록한 뒤 종료
+    """
+
+    def __init__(self, log_dir: Path = LOG_DIR, queue_size: int = LOG_QUEUE_SIZE,
+                 batch_size: int = LOG_BATCH_SIZE, flush_interval: float = LOG_FLUSH_INTERVAL,
+                 compress: bool = LOG_COMPRESS):
+        self.log_dir = log_dir
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+
+        # 통계
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failed = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def log(self, record: dict):
+        """로그 추가 (대기하지 않음)"""
+        record = {"time": datetime.now().isoformat(timespec="milliseconds"), **record}
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def log_chat(self, user_input: str, ai_response: str, **extra):
+        """LLM 요청/응답 로그"""
+        self.log({"user_input": user_input, "ai_response": ai_response, **extra})
+
+    async def _run(self):
+        """종료 신호(None)를 받을 때까지 로그를 모아서 기록"""
+        loop = asyncio.get_running_loop()
+        while True:
+            record = await self._queue.get()
+            if record is None:
+                return
+            batch = [record]
+            stopping = False
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            await self._write(batch)
+            if stopping:
+                return
+
+    async def _write(self, batch: List[dict]):
+        try:
+            await asyncio.to_thread(self._append, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"[로그 저장 실패] {e}")
+
+    def _path_for(self, date: str) -> Path:
+        suffix = ".jsonl.gz" if self.compress else ".jsonl"
+        return self.log_dir / f"{date}{suffix}"
+
+    def _append(self, batch: List[dict]):
+        """날짜별로 묶어 파일 하나당 한 번씩 추가 (gzip은 멤버를 이어 붙이는 방식)"""
+        by_date: Dict[str, List[str]] = {}
+        for record in batch:
+            by_date.setdefault(record["time"][:10], []).append(json.dumps(record, ensure_ascii=False))
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        for date, lines in by_date.items():
+            data = ("\n".join(lines) + "\n").encode("utf-8")
+            path = self._path_for(date)
+            if self.compress:
+                with gzip.open(path, "ab") as f:
+                    f.write(data)
+            else:
+                with open(path, "ab") as f:
+                    f.write(data)
+
+    async def stop(self):
+        """남은 로그를 모두 기록한 뒤 기록 작업 종료"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "compress": self.compress,
+        }
+
+
+# 서버 전역 로그 기록기
+writer = LogWriter()
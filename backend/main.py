@@ -2,34 +2,65 @@ from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconn
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-# from ollama import AsyncClient  # Ollama 사용 시 활성화
-import google.generativeai as genai
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from dotenv import load_dotenv
 from datetime import datetime
 from pathlib import Path
-import re
-from typing import Optional
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional
 import webbrowser
 import threading
 import asyncio
-import tempfile
 import sys
+import time
+
+# 환경변수 로드 (각 모듈이 import 시점에 설정을 읽으므로 가장 먼저 실행)
+load_dotenv()
+
+# 서버 모듈 import 시간 측정 (시작 보고용)
+_imports_started = time.perf_counter()
 
 # 데이터베이스 import
-from database import engine, get_db, Base
+from database import engine, get_async_db, Base, SessionLocal, ensure_indexes, ensure_columns
 from models import ResponseType
 import crud
-
-# 환경변수 로드
-load_dotenv()
+import crud_async
+from llm_dispatcher import LLMDispatcher, SingleFlight, LLMQueueFullError, LLMDeadlineExceeded
+from llm_providers import ProviderRegistry, LLMUnavailableError
+from llm_router import ProviderRouter
+from prompt_builder import Prompt, build_prompt, new_usage, LLM_HISTORY_TURNS
+import template_store
+from template_store import PromptTemplate, TemplateNotFoundError
+from llm_cache import LLMResponseCache, make_cache_key
+from response_parser import SectionParser, parse_llm_response, parse_structured
+import vm_manager
+import code_executor
+import import_analyzer
+import script_cache
+import package_provisioner
+import interpreter_pool
+import job_scheduler
+import exec_session
+import output_log
+import hardware_scheduler
+from job_scheduler import JobStatus, JobQueueFullError
+from resource_limits import RunResources, format_usage
+from output_batcher import OutputBatcher, WS_READ_CHUNK_BYTES
+import log_writer
+
+IMPORT_SECONDS = round(time.perf_counter() - _imports_started, 3)
 
 app = FastAPI()
 
 # 데이터베이스 테이블 생성
 Base.metadata.create_all(bind=engine)
+ensure_columns()
+ensure_indexes()
+with SessionLocal() as _db:
+    crud.backfill_code_hashes(_db)
 
 # CORS 설정
 app.add_middleware(
@@ -60,179 +91,182 @@ async def startup_event():
         webbrowser.open("http://127.0.0.1:8000")
     
     threading.Thread(target=open_browser, daemon=True).start()
+    started = time.perf_counter()
 
-# === LLM 클라이언트 설정 ===
+    # 요청/응답 로그 기록 작업 시작
+    log_writer.writer.start()
 
-# Gemini 우선, 실패 시 Ollama 사용
-LLM_API_KEY = os.getenv("LLM_API_KEY")
-LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gemini-2.5-flash")
-OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma3")
+    # 프롬프트 템플릿 파일 변경 감시 (PROMPT_RELOAD_INTERVAL)
+    prompt_templates.start_watching()
 
-use_gemini = False
-use_ollama = False
-gemini_model = None
-ollama_client = None
+    # 패키지 설치 대기열
+    package_provisioner.provisioner.start()
 
-# Gemini 초기화 시도
-if LLM_API_KEY:
-    try:
-        genai.configure(api_key=LLM_API_KEY)
-        gemini_model = genai.GenerativeModel(LLM_MODEL_NAME)
-        use_gemini = True
-        print("[LLM] Gemini API 활성화")
-    except Exception as e:
-        print(f"[LLM] Gemini 초기화 실패: {e}")
+    # LLM 프로바이더 초기화 (백그라운드 - 완료 전에도 LLM 외 API는 바로 사용 가능)
+    llm_registry.start_background()
 
-# Ollama 초기화 (Gemini 실패 시 또는 백업용)
-if not use_gemini:
-    try:
-        from ollama import AsyncClient
-        ollama_client = AsyncClient(host=OLLAMA_HOST)
-        use_ollama = True
-        print("[LLM] Ollama 활성화")
-    except Exception as e:
-        print(f"[LLM] Ollama 초기화 실패: {e}")
+    # Slave VM 검증 (버전 확인은 여기서 한 번만, 이후 실행 경로에서는 stat 비교만 수행)
+    await asyncio.to_thread(vm_manager.verify_vm_at_startup)
 
-if not use_gemini and not use_ollama:
-    raise ValueError("LLM을 사용할 수 없습니다. Gemini API 키를 설정하거나 Ollama를 실행하세요.")
+    # warm 인터프리터 풀 시작 (백그라운드)
+    python_exe = vm_manager.get_slave_python_executable()
+    if python_exe:
+        app.state.interpreter_pool_task = asyncio.create_task(interpreter_pool.pool.start(python_exe))
 
-# LLM 호출 함수 (Gemini 우선, 실패 시 Ollama)
-async def call_llm(prompt: str) -> str:
-    """
-    Gemini를 먼저 시도하고, 실패하면 Ollama 사용
-    """
-    # Gemini 시도
-    if use_gemini:
-        try:
-            response = gemini_model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            print(f"[LLM] Gemini 호출 실패: {e}")
-            if not use_ollama:
-                raise
-    
-    # Ollama 시도
-    if use_ollama:
-        try:
-            response = await ollama_client.chat(
-                model=OLLAMA_MODEL,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return response['message']['content']
-        except Exception as e:
-            print(f"[LLM] Ollama 호출 실패: {e}")
-            raise
-    
-    raise ValueError("사용 가능한 LLM이 없습니다.")
+    app.state.startup_report = {
+        "import_seconds": IMPORT_SECONDS,
+        "startup_seconds": round(time.perf_counter() - started, 3),
+    }
+    print(f"[Startup] 모듈 import {IMPORT_SECONDS:.2f}s, 시작 작업 {app.state.startup_report['startup_seconds']:.2f}s")
 
-# text_prompt.txt 파일 읽기
-def load_prompt_template():
-    encodings = ['utf-8', 'cp949', 'euc-kr', 'utf-8-sig']
-    for encoding in encodings:
-        try:
-            with open("./text_prompt.txt", "r", encoding=encoding) as f:
-                content = f.read()
-                return content
-        except (FileNotFoundError, UnicodeDecodeError):
-            continue
-    print("[경고] 프롬프트 파일을 읽을 수 없어 기본 프롬프트를 사용합니다.")
-    return "당신은 라즈베리파이 학습을 돕는 AI 어시스턴트입니다."
-
-PROMPT_TEMPLATE = load_prompt_template()
-
-# LLM 응답 파싱 함수
-def parse_llm_response(response_text: str):
-    """
-    LLM 응답을 파싱하여 response_type과 각 섹션을 추출합니다.
-
-    Returns:
-        dict: {
-            'response_type': 'success' or 'exception',
-            'plain_text': str (exception인 경우),
-            'code_content': str (success인 경우),
-            'wiring_content': str (success인 경우),
-            'steps_content': str (success인 경우)
-        }
-    """
-    # ### CODE, ### WIRING, ### STEPS 패턴 확인
-    has_code = "### CODE" in response_text
-    has_wiring = "### WIRING" in response_text
-    has_steps = "### STEPS" in response_text
-
-    # 세 섹션이 모두 있으면 success, 없으면 exception
-    if has_code and has_wiring and has_steps:
-        # Success 응답 파싱
-        code_match = re.search(r'### CODE\s*```python\s*(.*?)\s*```', response_text, re.DOTALL)
-        wiring_match = re.search(r'### WIRING\s*```\s*(.*?)\s*```', response_text, re.DOTALL)
-        steps_match = re.search(r'### STEPS\s*```\s*(.*?)\s*```', response_text, re.DOTALL)
-
-        return {
-            'response_type': ResponseType.SUCCESS,
-            'plain_text': None,
-            'code_content': code_match.group(1).strip() if code_match else "",
-            'wiring_content': wiring_match.group(1).strip() if wiring_match else "",
-            'steps_content': steps_match.group(1).strip() if steps_match else ""
-        }
-    else:
-        # Exception 응답 (인사말, 에러 메시지 등)
-        return {
-            'response_type': ResponseType.EXCEPTION,
-            'plain_text': response_text.strip(),
-            'code_content': None,
-            'wiring_content': None,
-            'steps_content': None
-        }
+@app.on_event("shutdown")
+async def shutdown_event():
+    llm_dispatcher.shutdown()
+    await exec_session.sessions.stop()
+    await interpreter_pool.pool.stop()
+    await prompt_templates.stop()
+    await package_provisioner.provisioner.stop()
+    await log_writer.writer.stop()
 
-# 로그 저장 함수
-def save_log(user_input: str, ai_response: str):
-    """
-    요청과 응답을 날짜별 폴더에 시간별 파일로 저장
-    """
-    try:
-        # 현재 시간
-        now = datetime.now()
-        date_folder = now.strftime("%Y-%m-%d")
-        time_filename = now.strftime("%H-%M-%S.txt")
+# === LLM 클라이언트 설정 ===
 
-        # 로그 디렉토리 생성 (log/YYYY-MM-DD/)
-        log_dir = Path("./log") / date_folder
-        log_dir.mkdir(parents=True, exist_ok=True)
+# 프로바이더별 동시 실행 제한 + 대기열 + 데드라인
+llm_dispatcher = LLMDispatcher()
 
-        # 로그 파일 경로
-        log_file = log_dir / time_filename
+# LLM 프로바이더 (LLM_PROVIDERS 순서대로 우선, 기본: Gemini → Ollama)
+# SDK import와 클라이언트 생성은 서버 시작 후 백그라운드에서 수행
+llm_registry = ProviderRegistry(llm_dispatcher)
 
-        # 로그 내용 작성
-        log_content = f"""=== 요청 시간 ===
-{now.strftime("%Y년 %m월 %d일 %H시 %M분 %S초")}
+# 프로바이더 상태 추적 + 회로 차단기 + 장애 조치 (LLM_ROUTING, LLM_HEDGE_DELAY)
+llm_router = ProviderRouter(llm_registry)
 
-=== 사용자 요청 ===
-{user_input}
+# LLM 호출 함수
+async def call_llm(prompt: Prompt, timeout: Optional[float] = None, usage: Optional[dict] = None) -> str:
+    """
+    라우터가 고른 순서대로 프로바이더를 시도 (회로가 열린 프로바이더는 건너뜀)
 
-=== AI 응답 ===
-{ai_response}
-"""
+    데드라인은 요청 단위로 계산되어 폴백 호출까지 포함합니다.
+    """
+    return await llm_router.generate(prompt, llm_dispatcher.new_deadline(timeout), usage)
 
-        # 파일 저장
-        with open(log_file, "w", encoding="utf-8") as f:
-            f.write(log_content)
+# LLM 스트리밍 호출 함수 (첫 토큰 전 실패 시 다음 프로바이더)
+async def stream_llm(prompt: Prompt, timeout: Optional[float] = None,
+                     usage: Optional[dict] = None) -> AsyncIterator[str]:
+    """
+    LLM 응답을 토큰(청크) 단위로 전달
 
-        print(f"[로그 저장 완료] {log_file}")
+    이미 토큰을 보낸 뒤 실패하면 폴백하지 않고 예외를 그대로 전달합니다.
+    """
+    async with aclosing(llm_router.stream(prompt, llm_dispatcher.new_deadline(timeout), usage)) as texts:
+        async for text in texts:
+            yield text
+
+# 프롬프트 템플릿 (파일 변경 시 자동으로 다시 읽음, 보드/요청별로 이름 선택)
+prompt_templates = template_store.store
+
+# 동일 프롬프트 응답 캐시
+llm_cache = LLMResponseCache()
+
+# 동시에 들어온 동일 프롬프트 요청은 upstream 호출 하나를 공유
+llm_singleflight = SingleFlight()
+
+def get_active_model_name() -> str:
+    """캐시 키에 사용할 우선 모델 이름 (초기화 전에도 설정 기준으로 결정)"""
+    providers = llm_registry.configured_providers()
+    if not providers:
+        return "none"
+    return f"{providers[0].name}:{providers[0].model_name}"
+
+def is_cacheable(usage: dict) -> bool:
+    """캐시 키의 우선 프로바이더가 직접 답한 응답만 캐시 (failover 응답은 다른 모델의 결과)"""
+    providers = llm_registry.configured_providers()
+    return bool(providers) and usage.get("provider") == providers[0].name
+
+def select_template(requested: Optional[str] = None, board=None) -> PromptTemplate:
+    """요청에서 지정한 템플릿 → 보드 템플릿 → default 순으로 선택"""
+    name = requested or (board.prompt_template if board is not None else None)
+    return prompt_templates.get(name)
+
+def build_llm_prompt(user_input: str, chats: Optional[list] = None,
+                     template: Optional[PromptTemplate] = None) -> Prompt:
+    """템플릿(시스템 지시문) + 보드 대화 기록(토큰 예산 내) + 사용자 요청"""
+    template = template or prompt_templates.get()
+    return build_prompt(template.text, user_input, chats)
+
+async def load_board_history(db: AsyncSession, board_id: int) -> list:
+    """프롬프트에 넣을 최근 보드 대화 (LLM_HISTORY_TURNS가 0이면 사용 안 함)"""
+    if LLM_HISTORY_TURNS <= 0:
+        return []
+    return await crud_async.get_board_chat_history(db, board_id, limit=LLM_HISTORY_TURNS, latest=True)
+
+def get_cache_key(user_input: str, prompt: Prompt) -> str:
+    return make_cache_key(prompt.system, user_input, get_active_model_name(), prompt.history_key())
+
+def new_request_usage(prompt: Prompt, template: PromptTemplate) -> dict:
+    """요청별 사용량 보고 (템플릿 버전 + 프롬프트 구성 정보 + 프로바이더 토큰 수)"""
+    usage = new_usage()
+    usage.update(
+        template=template.label,
+        history_turns=prompt.history_turns,
+        summarized_turns=prompt.summarized_turns,
+        estimated_tokens_in=prompt.estimated_tokens()
+    )
+    return usage
 
-    except Exception as e:
-        print(f"[로그 저장 실패] {e}")
+async def generate_llm_text(user_input: str, no_cache: bool = False, chats: Optional[list] = None,
+                            usage: Optional[dict] = None, template: Optional[PromptTemplate] = None) -> str:
+    """
+    프롬프트를 구성하여 LLM 응답 텍스트를 생성합니다.
+
+    동일한 템플릿 버전/대화 기록/입력/모델 조합은 캐시에서 바로 반환하며,
+    no_cache=True이면 캐시 조회를 건너뛰고 새 응답으로 캐시를 갱신합니다.
+    동시에 들어온 동일 요청은 하나의 LLM 호출을 공유합니다.
+    """
+    template = template or prompt_templates.get()
+    prompt = build_llm_prompt(user_input, chats, template)
+    cache_key = get_cache_key(user_input, prompt)
+    usage = usage if usage is not None else {}
+    usage.update(new_request_usage(prompt, template))
+
+    if no_cache:
+        llm_cache.record_bypass()
+    else:
+        cached = await llm_cache.get(cache_key)
+        if cached is not None:
+            print("[LLM Cache] 캐시 히트")
+            usage["cached"] = True
+            return cached
+
+    async def fetch():
+        # LLM API 호출 (라우터가 고른 프로바이더 순서대로)
+        call_usage = dict(usage)
+        text = await call_llm(prompt, usage=call_usage)
+        if is_cacheable(call_usage):
+            await llm_cache.put(cache_key, text)
+        return text, call_usage
+
+    # 같은 프롬프트가 이미 호출 중이면 그 결과를 함께 기다림
+    text, call_usage = await llm_singleflight.do(cache_key, fetch)
+    usage.update(call_usage)
+    return text
 
 # ==================== Pydantic 모델 ====================
 
 # Board 관련
 class BoardCreate(BaseModel):
     title: str
+    prompt_template: Optional[str] = None
+
+class BoardUpdate(BaseModel):
+    title: Optional[str] = None
+    prompt_template: Optional[str] = None  # 빈 문자열이면 기본 템플릿으로 되돌림
 
 class BoardResponse(BaseModel):
     board_id: int
     title: str
     created_time: datetime
     edited_time: datetime
+    prompt_template: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -241,6 +275,9 @@ class BoardResponse(BaseModel):
 class ChatRequest(BaseModel):
     board_id: int
     user_input: str
+    no_cache: bool = False     # True이면 응답 캐시를 사용하지 않음
+    use_history: bool = True   # 보드의 최근 대화를 프롬프트에 포함
+    template: Optional[str] = None  # 프롬프트 템플릿 이름 (없으면 보드 설정 → default)
 
 class ChatResponse(BaseModel):
     user_chat_id: int
@@ -252,14 +289,30 @@ class ChatResponse(BaseModel):
     wiring_content: Optional[str] = None
     steps_content: Optional[str] = None
     created_time: datetime
+    usage: Optional[dict] = None  # provider, tokens_in, tokens_out, cached, history_turns ...
+
+class ChatImportItem(BaseModel):
+    user_content: str
+    response_type: str
+    plain_text: Optional[str] = None
+    code_content: Optional[str] = None
+    wiring_content: Optional[str] = None
+    steps_content: Optional[str] = None
+    created_time: Optional[datetime] = None
+
+class ChatImportRequest(BaseModel):
+    chats: List[ChatImportItem]
 
 # 기존 모델 (호환성 유지)
 class ProjectRequest(BaseModel):
     user_input: str
+    no_cache: bool = False
+    template: Optional[str] = None
 
 class ProjectResponse(BaseModel):
     response: str
     status: str
+    usage: Optional[dict] = None
 
 @app.post("/generate", response_model=ProjectResponse)
 async def generate_tutorial(request: ProjectRequest):
@@ -267,20 +320,28 @@ async def generate_tutorial(request: ProjectRequest):
     사용자 입력을 받아 Gemini API로 튜토리얼을 생성합니다.
     """
     try:
-        # 프롬프트 구성
-        full_prompt = f"{PROMPT_TEMPLATE}\n\n사용자 요청: {request.user_input}"
+        # LLM 응답 생성 (캐시 우선)
+        usage = {}
+        response_text = await generate_llm_text(request.user_input, no_cache=request.no_cache, usage=usage,
+                                                template=select_template(request.template))
 
-        # LLM API 호출 (Gemini 우선, 실패 시 Ollama)
-        response_text = await call_llm(full_prompt)
-
-        # 로그 저장
-        save_log(request.user_input, response_text)
+        # 로그 기록 (백그라운드에서 모아서 저장)
+        log_writer.writer.log_chat(request.user_input, response_text, usage=usage)
 
         return ProjectResponse(
             response=response_text,
-            status="success"
+            status="success",
+            usage=usage
         )
 
+    except TemplateNotFoundError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except LLMQueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"LLM 요청이 많아 처리할 수 없습니다: {str(e)}")
+    except LLMDeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"LLM 응답 시간 초과: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM 처리 중 오류 발생: {str(e)}")
 
@@ -292,39 +353,76 @@ async def health_check():
     """
     return {
         "status": "healthy",
-        "llm_provider": "gemini",
-        "llm_api_configured": bool(LLM_API_KEY)
+        "llm_provider": next((provider.name for provider in llm_registry.ready_providers()), None),
+        "llm_api_configured": bool(os.getenv("LLM_API_KEY")),
+        "llm_providers": llm_registry.report(),
+        "llm_router": llm_router.stats(),
+        "startup": getattr(app.state, "startup_report", None),
+        "llm_dispatch": llm_dispatcher.stats(),
+        "llm_cache": llm_cache.stats(),
+        "llm_singleflight": llm_singleflight.stats(),
+        "log_writer": log_writer.writer.stats(),
+        "prompt_templates": prompt_templates.stats(),
+        "packages": package_provisioner.provisioner.stats(),
+        "slave_vm": vm_manager.get_vm_state()
     }
 
+@app.delete("/llm/cache")
+async def clear_llm_cache():
+    """LLM 응답 캐시 비우기"""
+    await llm_cache.clear()
+    return {"message": "LLM cache cleared"}
+
 # ==================== Board API ====================
 
+def require_template(name: Optional[str]):
+    """보드에 지정할 템플릿 이름 확인 (없거나 빈 문자열이면 기본 템플릿)"""
+    if name and name not in prompt_templates.names():
+        raise HTTPException(status_code=400, detail=f"Unknown prompt template: {name}")
+
 @app.post("/boards", response_model=BoardResponse)
-async def create_board(board: BoardCreate, db: Session = Depends(get_db)):
+async def create_board(board: BoardCreate, db: AsyncSession = Depends(get_async_db)):
     """새로운 보드 생성"""
-    new_board = crud.create_board(
+    require_template(board.prompt_template)
+    new_board = await crud_async.create_board(
         db=db,
-        title=board.title
+        title=board.title,
+        prompt_template=board.prompt_template
     )
     return new_board
 
 @app.get("/boards/{board_id}", response_model=BoardResponse)
-async def get_board(board_id: int, db: Session = Depends(get_db)):
+async def get_board(board_id: int, db: AsyncSession = Depends(get_async_db)):
     """보드 조회"""
-    board = crud.get_board(db, board_id)
+    board = await crud_async.get_board(db, board_id)
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
     return board
 
+@app.patch("/boards/{board_id}", response_model=BoardResponse)
+async def update_board(board_id: int, update: BoardUpdate, db: AsyncSession = Depends(get_async_db)):
+    """보드 제목 / 프롬프트 템플릿 변경"""
+    require_template(update.prompt_template)
+    board = await crud_async.update_board(db, board_id, title=update.title, prompt_template=update.prompt_template)
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    return board
+
+@app.get("/prompts")
+async def list_prompt_templates():
+    """사용 가능한 프롬프트 템플릿과 현재 버전"""
+    return prompt_templates.list()
+
 @app.get("/boards")
-async def get_all_boards(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_all_boards(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
     """모든 보드 조회"""
-    boards = crud.get_all_boards(db, skip=skip, limit=limit)
+    boards = await crud_async.get_all_boards(db, skip=skip, limit=limit)
     return boards
 
 @app.delete("/boards/{board_id}")
-async def delete_board(board_id: int, db: Session = Depends(get_db)):
+async def delete_board(board_id: int, db: AsyncSession = Depends(get_async_db)):
     """보드 삭제"""
-    success = crud.delete_board(db, board_id)
+    success = await crud_async.delete_board(db, board_id)
     if not success:
         raise HTTPException(status_code=404, detail="Board not found")
     return {"message": "Board deleted successfully"}
@@ -333,29 +431,188 @@ async def delete_board(board_id: int, db: Session = Depends(get_db)):
 
 class CodeExecuteRequest(BaseModel):
     code: str
+    timeout: Optional[float] = None  # 최대 실행 시간 (초, 없으면 서버 기본값)
+    wiring: Optional[str] = None     # WIRING 섹션 (핀 사용권 판단, 없으면 같은 코드의 응답에서 찾음)
 
 class CodeExecuteResponse(BaseModel):
     success: bool
     stdout: str
     stderr: str
+    usage: Optional[dict] = None  # wall_seconds, cpu_seconds, peak_rss_kb, output_bytes, limit_exceeded
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+
+class PackageInstallRequest(BaseModel):
+    packages: List[str] = []     # import 이름 (예: "cv2", "adafruit_dht")
+    code: Optional[str] = None   # 코드를 주면 미설치 import를 찾아서 설치
+    wait: bool = False           # 설치 완료까지 대기
 
 @app.post("/boards/execute", response_model=CodeExecuteResponse)
-async def execute_code(request: CodeExecuteRequest, db: Session = Depends(get_db)):
+async def execute_code(request: CodeExecuteRequest):
     """
-    공유 Slave VM에서 코드 실행
+    공유 Slave VM에서 코드 실행 (완료될 때까지 대기)
+
+    작업 스케줄러를 거치므로 동시 실행 수와 타임아웃 제한이 적용됩니다.
     """
-    import code_executor
-    
-    # 코드 실행 (단일 공유 VM 사용)
-    success, stdout, stderr = code_executor.execute_code(db, request.code)
-    
+    try:
+        job = job_scheduler.scheduler.submit(request.code, timeout=request.timeout, wiring=request.wiring)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    await job.wait()
     return CodeExecuteResponse(
-        success=success,
-        stdout=stdout,
-        stderr=stderr
+        success=job.status == JobStatus.SUCCEEDED,
+        stdout=job.output("stdout"),
+        stderr=job.output("stderr"),
+        usage=job.usage
     )
 
-# ==================== WebSocket 실시간 코드 실행 ====================
+@app.post("/boards/execute/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_execution_job(request: CodeExecuteRequest):
+    """코드 실행 작업 제출 (job_id 즉시 반환)"""
+    try:
+        job = job_scheduler.scheduler.submit(request.code, timeout=request.timeout, wiring=request.wiring)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return JobSubmitResponse(job_id=job.job_id, status=job.status.value)
+
+@app.get("/boards/execute/jobs")
+async def list_execution_jobs():
+    """실행 작업 목록 (출력 제외)"""
+    return {
+        "scheduler": job_scheduler.scheduler.stats(),
+        "jobs": [job.to_dict(include_output=False) for job in job_scheduler.scheduler.list()]
+    }
+
+@app.get("/boards/execute/jobs/{job_id}")
+async def get_execution_job(job_id: str):
+    """실행 작업 상태와 stdout/stderr 조회 (폴링용)"""
+    job = job_scheduler.scheduler.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.delete("/boards/execute/jobs/{job_id}")
+async def cancel_execution_job(job_id: str):
+    """실행 작업 취소"""
+    if not job_scheduler.scheduler.cancel(job_id):
+        raise HTTPException(status_code=404, detail="Job not found or already finished")
+    return {"message": "Job cancelled"}
+
+@app.websocket("/ws/jobs/{job_id}")
+async def websocket_follow_job(websocket: WebSocket, job_id: str, offset: int = 0):
+    """
+    실행 작업 출력 구독 (?offset=으로 마지막으로 받은 위치부터 이어 받기)
+
+    서버 → {"type": "output", "stream": "stdout", "data": "...", "offset": 다음 바이트 위치}
+           {"type": "status", ...job 정보}  (완료 시 한 번)
+    """
+    await websocket.accept()
+    try:
+        job = job_scheduler.scheduler.get(job_id)
+        if not job:
+            await websocket.send_json({"type": "error", "detail": "Job not found"})
+            return
+
+        async for stream, text, next_offset in job.follow(offset):
+            await websocket.send_json({"type": "output", "stream": stream, "data": text, "offset": next_offset})
+        await websocket.send_json(jsonable_encoder({"type": "status", **job.to_dict(include_output=False)}))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        try:
+            await websocket.close()
+        except:
+            pass
+
+@app.get("/runs")
+async def list_run_outputs():
+    """출력 기록이 남아 있는 실행 목록 (작업 / 세션 / /ws/execute)"""
+    return {
+        "store": output_log.store.stats(),
+        "runs": [log.to_dict() for log in output_log.store.list()]
+    }
+
+@app.get("/runs/{run_id}/output")
+async def get_run_output(run_id: str, offset: int = 0, limit: int = output_log.OUTPUT_READ_LIMIT):
+    """
+    실행 출력 조회 (코드를 다시 실행하지 않음)
+
+    offset(바이트)부터 최대 limit 바이트를 반환하며, next_offset으로 이어서 읽습니다.
+    start보다 앞의 출력은 보관 한도를 넘어 삭제된 부분입니다.
+    """
+    log = output_log.store.get(run_id)
+    if not log:
+        raise HTTPException(status_code=404, detail="Run not found")
+    start, data = log.read(offset, max(4, min(limit, output_log.OUTPUT_READ_LIMIT)))
+    return {
+        **log.to_dict(),
+        "offset": start,
+        "next_offset": start + len(data),
+        "finished": log.finished,
+        "data": data.decode("utf-8", errors="replace"),
+    }
+
+@app.get("/boards/execute/metrics")
+async def get_execution_metrics():
+    """warm 인터프리터 풀 상태와 콜드/웜 스타트 지연 시간 비교, import 분석 캐시"""
+    return {
+        **interpreter_pool.pool.stats(),
+        "imports": import_analyzer.analyzer.stats(),
+        "scripts": script_cache.cache.stats(),
+        "sessions": exec_session.sessions.stats(),
+        "output": output_log.store.stats(),
+        "hardware": hardware_scheduler.scheduler.stats(),
+    }
+
+@app.get("/boards/execute/hardware")
+async def get_hardware_leases():
+    """핀 사용권 현황 (사용 중 / 대기 중인 실행과 대기 순서)"""
+    return {
+        "scheduler": hardware_scheduler.scheduler.stats(),
+        "leases": [lease.to_dict() for lease in hardware_scheduler.scheduler.list()]
+    }
+
+# ==================== Package API ====================
+
+@app.post("/packages/install", status_code=202)
+async def install_packages(request: PackageInstallRequest):
+    """
+    Master VM에 패키지 설치 (대기열에서 하나씩 실행, wheelhouse 재사용)
+
+    wait=false이면 작업 목록을 바로 반환하고, GET /packages/installs/{task_id}로 상태를 확인합니다.
+    """
+    modules = list(request.packages)
+    if request.code:
+        modules += import_analyzer.analyzer.analyze(request.code).missing
+    if not modules:
+        return {"tasks": []}
+
+    try:
+        tasks = package_provisioner.provisioner.request(modules)
+    except package_provisioner.InvalidPackageNameError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if request.wait:
+        await asyncio.gather(*(task.wait() for task in tasks))
+    return {"tasks": [task.to_dict() for task in tasks]}
+
+@app.get("/packages/installs")
+async def list_package_installs():
+    """설치 작업 목록과 설치 시간 통계"""
+    return {
+        "provisioner": package_provisioner.provisioner.stats(),
+        "tasks": [task.to_dict() for task in package_provisioner.provisioner.list()]
+    }
+
+@app.get("/packages/installs/{task_id}")
+async def get_package_install(task_id: str):
+    """설치 작업 상태"""
+    task = package_provisioner.provisioner.get(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Install task not found")
+    return task.to_dict()
 
 @app.websocket("/ws/execute")
 async def websocket_execute_code(websocket: WebSocket):
@@ -366,101 +623,115 @@ async def websocket_execute_code(websocket: WebSocket):
     print("WebSocket 연결됨")
     
     process = None
-    temp_file_path = None
+    script = None
+    lease = None
+    resources = RunResources()
+    run_log = None
+    run_status = JobStatus.FAILED
     
     try:
         # 클라이언트로부터 코드 받기
         print("코드 수신 대기 중...")
         code = await websocket.receive_text()
         print(f"코드 수신 완료 (길이: {len(code)})")
+
+        # 출력 기록 (연결이 끊겨도 GET /runs/{run_id}/output으로 조회 가능)
+        run_log = output_log.store.create("ws")
+        print(f"출력 기록: {run_log.run_id}")
         
         # VM 체크
-        import vm_manager
         print("VM 체크 중...")
-        vm_manager.recreate_slave_vm_if_needed()
-        python_exe = vm_manager.get_slave_python_executable()
+        python_exe = await code_executor.ensure_slave_python()
         print(f"Python 실행 파일: {python_exe}")
         
         if not python_exe:
             error_msg = "ERROR: SlaveVM을 찾을 수 없습니다"
             print(error_msg)
+            run_log.append("stdout", error_msg)
             await websocket.send_text(error_msg)
             await websocket.close()
             return
-        
-        # 임시 파일 생성 - 신호 핸들러와 cleanup 코드 자동 추가
-        print("임시 파일 생성 중...")
-        
-        # 사용자 코드에 안전한 종료 처리 추가
-        wrapped_code = f"""
-import signal
-import sys
-import atexit
-
-# GPIO 및 기타 리소스 cleanup
-def cleanup_resources():
-    try:
-        from gpiozero import Device
-        Device.pin_factory.close()
-    except:
-        pass
-
-atexit.register(cleanup_resources)
 
-# SIGTERM/SIGINT 핸들러
-def signal_handler(signum, frame):
-    print("\\n>>> 정리 중...")
-    sys.exit(0)
+        # 미설치 패키지 확인 (프로세스 시작 전에 바로 알림, 자동 설치 설정 시 설치 진행 상황 전달)
+        missing = await code_executor.prepare_imports(
+            code, on_output=lambda stream, text: asyncio.create_task(websocket.send_text(text))
+        )
+        if missing:
+            print(f"미설치 패키지로 실행 중단: {missing}")
+            run_log.append("stdout", f"ERROR: {missing}")
+            await websocket.send_text(f"ERROR: {missing}")
+            await websocket.close()
+            return
 
-signal.signal(signal.SIGTERM, signal_handler)
-signal.signal(signal.SIGINT, signal_handler)
+        # 핀 사용권 - 같은 핀을 쓰는 실행이 끝날 때까지 대기 순서를 알림 (STOP이나 연결 끊김이면 대기 취소)
+        lease = await code_executor.acquire_hardware(code, label=f"ws {run_log.run_id}")
+        if lease and not lease.granted:
+            def notify_queue(stream, text):
+                run_log.append("stdout", text)
+                asyncio.create_task(websocket.send_text(text))
 
-# === 사용자 코드 시작 ===
-{code}
-"""
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as temp_file:
-            temp_file.write(wrapped_code)
-            temp_file_path = temp_file.name
-        print(f"임시 파일 생성 완료: {temp_file_path}")
+            waiter = asyncio.create_task(code_executor.wait_hardware(lease, on_output=notify_queue))
+            try:
+                while not waiter.done():
+                    receiver = asyncio.create_task(websocket.receive_text())
+                    await asyncio.wait([waiter, receiver], return_when=asyncio.FIRST_COMPLETED)
+                    if not receiver.done():
+                        receiver.cancel()
+                    elif receiver.result() == "STOP":
+                        print("하드웨어 대기 중 중지 신호 받음")
+                        run_status = JobStatus.CANCELLED
+                        notice = "\n>>> 실행이 중지되었습니다 (하드웨어 대기 중)"
+                        run_log.append("stdout", notice)
+                        await websocket.send_text(notice)
+                        return
+                    # 실행 전 입력(INPUT:)은 전달할 프로세스가 없으므로 무시
+            finally:
+                waiter.cancel()
+            print(f"[Hardware] 사용권 받음: {lease.usage.describe()}")
         
-        # 환경변수 설정
-        env = os.environ.copy()
-        if sys.platform == "win32" or sys.platform == "darwin":
-            env['GPIOZERO_PIN_FACTORY'] = 'mock'
-        env['PYTHONUNBUFFERED'] = '1'  # 출력 버퍼링 비활성화
-        env['PYTHONIOENCODING'] = 'utf-8'  # Python 출력 인코딩을 UTF-8로 설정
+        # 실행 스크립트 준비 - 신호 처리/GPIO 정리는 pigent_runner가 담당하므로 사용자 코드 그대로 사용
+        # 같은 코드를 다시 실행하면 저장/컴파일 없이 캐시된 .pyc 사용
+        script = await script_cache.cache.acquire(code)
+        print(f"실행 스크립트 준비 완료: {script.path}")
         
-        # 비동기 서브프로세스 생성 (stdin도 파이프로 연결)
+        # 서브프로세스 생성 (warm 풀 우선, stdin도 파이프로 연결)
         print("서브프로세스 시작 중...")
-        process = await asyncio.create_subprocess_exec(
-            str(python_exe), temp_file_path,
-            stdin=asyncio.subprocess.PIPE,   # stdin 파이프 추가
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT,
-            env=env
+        started = time.perf_counter()
+        await resources.setup()
+        process = await code_executor.spawn_python(
+            python_exe, str(script.path), code_executor.build_exec_env(), merge_stderr=True, resources=resources,
+            preload=code_executor.preload_modules(code)
         )
-        print(f"서브프로세스 시작됨 (PID: {process.pid})")
+        print(f"서브프로세스 시작됨 (PID: {process.pid}, {process.mode})")
         
         # 출력 읽기와 메시지 수신을 동시에 처리
         async def read_output():
-            line_count = 0
-            while True:
-                line = await process.stdout.readline()
-                if not line:
-                    break
-                
-                # Windows에서 한글 출력을 위해 cp949 또는 utf-8로 시도
-                try:
-                    output = line.decode('utf-8')
-                except UnicodeDecodeError:
-                    try:
-                        output = line.decode('cp949')
-                    except UnicodeDecodeError:
-                        output = line.decode('utf-8', errors='replace')
-                
-                await websocket.send_text(output)
-                line_count += 1
+            # 큰 단위로 읽고, 짧은 시간 창 단위로 묶어서 프레임 전송
+            batcher = OutputBatcher(websocket.send_text)
+            sender = asyncio.create_task(batcher.run())
+            first = True
+            try:
+                while True:
+                    data = await process.stdout.read(WS_READ_CHUNK_BYTES)
+                    if not data:
+                        break
+                    if first:
+                        interpreter_pool.pool.record(process.mode, "first_output", time.perf_counter() - started)
+                        first = False
+                    run_log.append("stdout", data)
+                    if not resources.count_output(len(data)):
+                        batcher.feed(data)
+                        batcher.close()
+                        await sender
+                        notice = f"\n>>> 출력 제한 초과 ({resources.limits['output_bytes']} bytes) - 실행을 중지합니다"
+                        run_log.append("stdout", notice)
+                        await websocket.send_text(notice)
+                        return
+                    batcher.feed(data)
+                batcher.close()
+                await sender
+            finally:
+                sender.cancel()
         
         async def receive_messages():
             while True:
@@ -518,37 +789,58 @@ signal.signal(signal.SIGINT, signal_handler)
             await process.wait()
         
         print(f"프로세스 최종 종료 (코드: {process.returncode})")
+        usage = await resources.finish(process)
+        runtime = code_executor.read_run_report(process)
+        if runtime:
+            print(f"[Runner] {process.mode}: preload {runtime['preload_ms']}ms, run {runtime['run_ms']}ms, "
+                  f"exception={runtime['exception']}, signal={runtime['signal']}")
+        summary = format_usage(usage)
         
-        # 결과 전송
+        # 결과 전송 (사용량 요약 포함)
         if receive_task in done and receive_task.result():
-            await websocket.send_text("\n>>> 실행이 중지되었습니다")
+            run_status = JobStatus.CANCELLED
+            final = f"\n>>> 실행이 중지되었습니다 ({summary})"
+        elif usage["limit_exceeded"]:
+            final = f"\n>>> 리소스 제한 초과: {usage['limit_exceeded']} ({summary})"
         elif process.returncode == 0:
-            await websocket.send_text("\n>>> 실행 완료")
+            run_status = JobStatus.SUCCEEDED
+            final = f"\n>>> 실행 완료 ({summary})"
         else:
-            await websocket.send_text(f"\n>>> 오류 발생 (종료 코드: {process.returncode})")
+            final = f"\n>>> 오류 발생 (종료 코드: {process.returncode}, {summary})"
+        run_log.append("stdout", final)
+        await websocket.send_text(final)
             
     except WebSocketDisconnect:
         print("WebSocket 연결 해제됨")
+        run_status = JobStatus.CANCELLED
         if process and process.returncode is None:
             print("연결 끊김 - 프로세스 강제 종료")
             process.kill()
             await process.wait()
+        if process:
+            await resources.finish(process)
     except Exception as e:
         import traceback
         print(f"WebSocket 오류: {e}")
         print(f"상세 오류:\n{traceback.format_exc()}")
+        if process and process.returncode is None:
+            # 실행 도중 오류 - 핀 사용권을 넘기기 전에 프로세스 종료
+            await code_executor.terminate_process(process)
         try:
             await websocket.send_text(f"ERROR: {str(e)}")
         except:
             pass
     finally:
-        # 임시 파일 삭제
-        if temp_file_path:
-            try:
-                Path(temp_file_path).unlink()
-                print("임시 파일 삭제 완료")
-            except Exception as e:
-                print(f"임시 파일 삭제 실패: {e}")
+        # 남은 실행 보고 파일 정리, 스크립트 사용 종료 (캐시 크기 초과 시 오래된 스크립트 삭제)
+        if run_log:
+            run_log.close(run_status.value)
+        if process:
+            code_executor.read_run_report(process)
+        await resources.cleanup()  # 시작 실패/오류 시 남은 cgroup 삭제
+        if script:
+            script_cache.cache.release(script)
+        if lease:
+            lease.release()
         
         try:
             await websocket.close()
@@ -556,95 +848,228 @@ signal.signal(signal.SIGINT, signal_handler)
         except:
             pass
 
+@app.websocket("/ws/session")
+async def websocket_execution_session(websocket: WebSocket, session_id: Optional[str] = None):
+    """
+    실행 세션 - 연결 하나로 여러 코드를 동시에 실행 (JSON 메시지, run_id로 구분)
+
+    ?session_id=...로 다시 연결하면 실행 중인 코드의 출력을 이어 받을 수 있습니다.
+    메시지 형식은 exec_session 모듈 참고.
+    """
+    await websocket.accept()
+    await exec_session.sessions.serve(websocket, session_id)
+
 # ==================== Chat API ====================
 
+async def save_chat(db: AsyncSession, board_id: int, user_input: str, parsed: dict) -> ChatResponse:
+    """
+    파싱된 LLM 응답을 데이터베이스에 저장하고 ChatResponse로 변환
+    (채팅, 응답, 보드 edited_time을 한 번의 커밋으로 저장)
+    """
+    user_chat, llm_resp = await crud_async.create_chat_transaction(
+        db=db,
+        board_id=board_id,
+        user_content=user_input,
+        response_type=parsed['response_type'],
+        plain_text=parsed.get('plain_text'),
+        code_content=parsed.get('code_content'),
+        wiring_content=parsed.get('wiring_content'),
+        steps_content=parsed.get('steps_content')
+    )
+
+    return ChatResponse(
+        user_chat_id=user_chat.user_chat_id,
+        board_id=user_chat.board_id,
+        user_content=user_chat.content,
+        response_type=user_chat.response_type.value,
+        plain_text=llm_resp.plain_text,
+        code_content=llm_resp.code_content,
+        wiring_content=llm_resp.wiring_content,
+        steps_content=llm_resp.steps_content,
+        created_time=user_chat.created_time
+    )
+
 @app.post("/chat", response_model=ChatResponse)
-async def create_chat(request: ChatRequest, db: Session = Depends(get_db)):
+async def create_chat(request: ChatRequest, db: AsyncSession = Depends(get_async_db)):
     """
     사용자 질문을 받아 LLM 응답을 생성하고 데이터베이스에 저장합니다.
     """
     try:
         # 보드 존재 확인
-        board = crud.get_board(db, request.board_id)
+        board = await crud_async.get_board(db, request.board_id)
         if not board:
             raise HTTPException(status_code=404, detail="Board not found")
+        template = select_template(request.template, board)
+        chats = await load_board_history(db, request.board_id) if request.use_history else []
+        # LLM 응답을 기다리는 동안 DB 연결을 풀에 반환
+        await db.commit()
 
-        # 프롬프트 구성
-        full_prompt = f"{PROMPT_TEMPLATE}\n\n사용자 요청: {request.user_input}"
+        # LLM 응답 생성 (캐시 우선)
+        usage = {}
+        response_text = await generate_llm_text(request.user_input, no_cache=request.no_cache,
+                                                chats=chats, usage=usage, template=template)
 
-        # LLM API 호출 (Gemini 우선, 실패 시 Ollama)
-        response_text = await call_llm(full_prompt)
-
-        # 로그 저장
-        save_log(request.user_input, response_text)
+        # 로그 기록 (백그라운드에서 모아서 저장)
+        log_writer.writer.log_chat(request.user_input, response_text, usage=usage)
 
         # 응답 파싱
         parsed = parse_llm_response(response_text)
 
         # 데이터베이스에 저장
-        if parsed['response_type'] == ResponseType.SUCCESS:
-            user_chat, llm_resp = crud.create_chat_with_success_response(
-                db=db,
-                board_id=request.board_id,
-                user_content=request.user_input,
-                code_content=parsed['code_content'],
-                wiring_content=parsed['wiring_content'],
-                steps_content=parsed['steps_content']
-            )
-        else:  # EXCEPTION
-            user_chat, llm_resp = crud.create_chat_with_exception_response(
-                db=db,
-                board_id=request.board_id,
-                user_content=request.user_input,
-                plain_text=parsed['plain_text']
-            )
-
-        # Board의 edited_time 업데이트
-        board = crud.get_board(db, request.board_id)
-        if board:
-            board.edited_time = datetime.now()
-            db.commit()
-
-        # 응답 반환
-        return ChatResponse(
-            user_chat_id=user_chat.user_chat_id,
-            board_id=user_chat.board_id,
-            user_content=user_chat.content,
-            response_type=user_chat.response_type.value,
-            plain_text=llm_resp.plain_text,
-            code_content=llm_resp.code_content,
-            wiring_content=llm_resp.wiring_content,
-            steps_content=llm_resp.steps_content,
-            created_time=user_chat.created_time
-        )
+        chat = await save_chat(db, request.board_id, request.user_input, parsed)
+        chat.usage = usage
+        return chat
 
     except HTTPException:
         raise
+    except TemplateNotFoundError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except LLMQueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"LLM 요청이 많아 처리할 수 없습니다: {str(e)}")
+    except LLMDeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"LLM 응답 시간 초과: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM 처리 중 오류 발생: {str(e)}")
 
+@app.websocket("/ws/chat")
+async def websocket_chat(websocket: WebSocket, db: AsyncSession = Depends(get_async_db)):
+    """
+    WebSocket을 통한 스트리밍 채팅
+
+    클라이언트 → {"board_id": 1, "user_input": "...", "no_cache": false, "use_history": true}
+    서버 → JSON 이벤트
+        {"type": "token", "text": "..."}                          # 토큰 도착 즉시
+        {"type": "section_start", "section": "code"}              # 섹션 헤더 감지
+        {"type": "section", "section": "code", "content": "..."}  # 섹션 코드 블록 완료
+        {"type": "done", "chat": {...ChatResponse, "usage": {...}}}  # 저장 완료 (토큰 사용량 포함)
+        {"type": "error", "detail": "..."}
+    """
+    await websocket.accept()
+
+    try:
+        request = ChatRequest(**(await websocket.receive_json()))
+
+        # 보드 존재 확인
+        board = await crud_async.get_board(db, request.board_id)
+        if not board:
+            await websocket.send_json({"type": "error", "detail": "Board not found"})
+            return
+        template = select_template(request.template, board)
+        chats = await load_board_history(db, request.board_id) if request.use_history else []
+        await db.commit()
+
+        detector = SectionParser()
+        prompt = build_llm_prompt(request.user_input, chats, template)
+        cache_key = get_cache_key(request.user_input, prompt)
+        usage = new_request_usage(prompt, template)
+        response_text = None
+
+        # 캐시 히트 시 전체 응답을 한 번에 전달
+        if request.no_cache:
+            llm_cache.record_bypass()
+        else:
+            response_text = await llm_cache.get(cache_key)
+
+        if response_text is not None:
+            usage["cached"] = True
+            await websocket.send_json({"type": "token", "text": response_text})
+            for event in detector.feed(response_text) + detector.finish():
+                await websocket.send_json(event)
+        else:
+            parts = []
+            # 클라이언트가 중간에 끊어도 프로바이더 슬롯과 스트림을 바로 정리
+            async with aclosing(stream_llm(prompt, usage=usage)) as texts:
+                async for text in texts:
+                    parts.append(text)
+                    await websocket.send_json({"type": "token", "text": text})
+                    for event in detector.feed(text):
+                        await websocket.send_json(event)
+            for event in detector.finish():
+                await websocket.send_json(event)
+
+            response_text = "".join(parts)
+            if is_cacheable(usage):
+                await llm_cache.put(cache_key, response_text)
+
+        # 로그 기록 및 최종 결과 저장 (스트리밍 중 파싱한 섹션을 그대로 사용)
+        log_writer.writer.log_chat(request.user_input, response_text, usage=usage)
+        parsed = parse_structured(response_text) or detector.result()
+        chat = await save_chat(db, request.board_id, request.user_input, parsed)
+        chat.usage = usage
+        await websocket.send_json({"type": "done", "chat": chat.model_dump(mode="json")})
+
+    except TemplateNotFoundError as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        print("채팅 WebSocket 연결 해제됨")
+    except Exception as e:
+        print(f"채팅 스트리밍 오류: {e}")
+        try:
+            await websocket.send_json({"type": "error", "detail": f"LLM 처리 중 오류 발생: {str(e)}"})
+        except:
+            pass
+    finally:
+        try:
+            await websocket.close()
+        except:
+            pass
+
+@app.post("/boards/{board_id}/chats/import")
+async def import_board_chats(board_id: int, request: ChatImportRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    채팅 기록 일괄 저장 (보드 이전/복원용, 배치마다 커밋 1회)
+    """
+    board = await crud_async.get_board(db, board_id)
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+
+    for item in request.chats:
+        if item.response_type not in (ResponseType.SUCCESS.value, ResponseType.EXCEPTION.value):
+            raise HTTPException(status_code=400, detail=f"Invalid response_type: {item.response_type}")
+
+    imported = await crud_async.import_chats(db, board_id, [item.model_dump() for item in request.chats])
+    return {"board_id": board_id, "imported": imported}
+
 @app.get("/boards/{board_id}/chats")
-async def get_board_chats(board_id: int, db: Session = Depends(get_db)):
-    """특정 보드의 모든 채팅 조회"""
-    board = crud.get_board(db, board_id)
+async def get_board_chats(board_id: int, before: Optional[int] = None, after: Optional[int] = None,
+                          limit: Optional[int] = None, fields: str = "full", db: AsyncSession = Depends(get_async_db)):
+    """
+    특정 보드의 채팅 조회
+
+    - before / after: user_chat_id 기준 커서 (이전/이후 페이지)
+    - limit: 최대 개수 (없으면 전체)
+    - fields: "full" (기본, LLM 응답 포함) 또는 "summary" (질문과 응답 타입만)
+    """
+    if fields not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="fields must be 'full' or 'summary'")
+
+    board = await crud_async.get_board(db, board_id)
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
 
-    chats = crud.get_chats_by_board(db, board_id)
+    include_content = fields == "full"
+    chats = await crud_async.get_board_chat_history(db, board_id, before=before, after=after,
+                                        limit=limit, include_content=include_content)
 
     result = []
     for chat in chats:
-        llm_resp = crud.get_llm_response(db, chat.user_chat_id)
-        result.append({
+        item = {
             "user_chat_id": chat.user_chat_id,
             "user_content": chat.content,
             "response_type": chat.response_type.value,
-            "plain_text": llm_resp.plain_text if llm_resp else None,
-            "code_content": llm_resp.code_content if llm_resp else None,
-            "wiring_content": llm_resp.wiring_content if llm_resp else None,
-            "steps_content": llm_resp.steps_content if llm_resp else None,
             "created_time": chat.created_time
-        })
+        }
+        if include_content:
+            llm_resp = chat.llm_response
+            item.update({
+                "plain_text": llm_resp.plain_text if llm_resp else None,
+                "code_content": llm_resp.code_content if llm_resp else None,
+                "wiring_content": llm_resp.wiring_content if llm_resp else None,
+                "steps_content": llm_resp.steps_content if llm_resp else None
+            })
+        result.append(item)
 
     return result
 
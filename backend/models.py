@@ -1,14 +1,25 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
+from typing import Optional
 import enum
+import hashlib
 
 # ResponseType Enum 정의
 class ResponseType(str, enum.Enum):
     SUCCESS = "success"
     EXCEPTION = "exception"
 
+def hash_code(code: Optional[str]) -> Optional[str]:
+    """코드 내용 해시 (같은 코드의 응답을 인덱스로 찾기 위함)"""
+    if not code:
+        return None
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()[:32]
+
+def _default_code_hash(context) -> Optional[str]:
+    return hash_code(context.get_current_parameters().get("code_content"))
+
 # 1. Board 테이블
 class Board(Base):
     __tablename__ = "board"
@@ -17,6 +28,7 @@ class Board(Base):
     title = Column(String(255), nullable=False)
     created_time = Column(DateTime, default=datetime.now, nullable=False)
     edited_time = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+    prompt_template = Column(String(64), nullable=True)  # 사용할 프롬프트 템플릿 이름 (없으면 default)
 
     # Relationship
     user_chats = relationship("UserChat", back_populates="board", cascade="all, delete-orphan")
@@ -31,6 +43,11 @@ class UserChat(Base):
     response_type = Column(Enum(ResponseType), nullable=False)  # 'success' 또는 'exception'
     created_time = Column(DateTime, default=datetime.now, nullable=False)
 
+    # 보드별 채팅 목록 조회용 복합 인덱스
+    __table_args__ = (
+        Index("ix_user_chat_board_chat", "board_id", "user_chat_id"),
+    )
+
     # Relationships
     board = relationship("Board", back_populates="user_chats")
     llm_response = relationship("LLMResponse", back_populates="user_chat", uselist=False, cascade="all, delete-orphan")
@@ -47,6 +64,7 @@ class LLMResponse(Base):
 
     # Success 응답용 (CODE, WIRING, STEPS)
     code_content = Column(Text, nullable=True)
+    code_hash = Column(String(32), nullable=True, index=True, default=_default_code_hash)  # 코드로 WIRING 조회용
     wiring_content = Column(Text, nullable=True)
     steps_content = Column(Text, nullable=True)
 
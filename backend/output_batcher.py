@@ -0,0 +1,113 @@
+"""
+실행 출력 프레임 묶음 전송 모듈
+큰 단위로 읽은 출력을 짧은 시간/크기 창으로 묶어 WebSocket 프레임 수를 줄이고,
+클라이언트가 따라오지 못하면 오래된 줄을 생략합니다.
+"""
+
+import asyncio
+import codecs
+import os
+from typing import Awaitable, Callable, List
+
+# 기본 설정 (환경변수로 변경 가능)
+WS_READ_CHUNK_BYTES = int(os.getenv("WS_READ_CHUNK_BYTES", "65536"))    # 프로세스 출력 읽기 단위
+WS_BATCH_INTERVAL = float(os.getenv("WS_BATCH_INTERVAL", "0.05"))        # 프레임 묶음 시간 창 (초)
+WS_MAX_FRAME_CHARS = int(os.getenv("WS_MAX_FRAME_CHARS", "16384"))       # 프레임 하나의 최대 글자 수
+WS_MAX_BACKLOG_CHARS = int(os.getenv("WS_MAX_BACKLOG_CHARS", "262144"))  # 전송 대기 한도 (초과 시 생략)
+
+
+class OutputBatcher:
+    """
+    프로세스 출력 → WebSocket 프레임 묶음 전송
+
+    - feed()로 받은 바이트는 증분 UTF-8 디코더로 변환하므로
+      멀티바이트 문자가 청크 경계에서 잘려도 깨지지 않습니다.
+    - run()은 시간 창(interval) 동안 모은 출력을 프레임 하나로 보냅니다.
+      창이 끝나기 전에 max_frame_chars가 차면 바로 보냅니다.
+    - 전송이 밀려 대기 출력이 max_backlog_chars를 넘으면 오래된 줄을 버리고
+      다음 프레임 앞에 "N줄 생략" 표시를 붙입니다.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable[None]], interval: float = WS_BATCH_INTERVAL,
+                 max_frame_chars: int = WS_MAX_FRAME_CHARS, max_backlog_chars: int = WS_MAX_BACKLOG_CHARS):
+        self.send = send
+        self.interval = interval
+        self.max_frame_chars = max_frame_chars
+        self.max_backlog_chars = max_backlog_chars
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._skipped_lines = 0
+        self._closed = False
+        self._ready = asyncio.Event()   # 보낼 출력이 있음
+        self._full = asyncio.Event()    # 프레임 크기만큼 찼음
+
+        # 통계
+        self.frames_sent = 0
+        self.total_skipped_lines = 0
+
+    def feed(self, data: bytes):
+        """프로세스에서 읽은 바이트 추가"""
+        self._append(self._decoder.decode(data))
+
+    def close(self):
+        """출력 끝 - 남은 바이트를 마저 디코딩하고 전송 루프 종료 예약"""
+        self._append(self._decoder.decode(b"", final=True))
+        self._closed = True
+        self._ready.set()
+        self._full.set()
+
+    def _append(self, text: str):
+        if not text:
+            return
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered > self.max_backlog_chars:
+            self._shed()
+        self._ready.set()
+        if self._buffered >= self.max_frame_chars:
+            self._full.set()
+
+    def _shed(self):
+        """대기 출력의 앞부분을 줄 단위로 버리고 최근 절반만 유지"""
+        text = "".join(self._buffer)
+        cut = len(text) - self.max_backlog_chars // 2
+        newline = text.find("\n", cut)
+        cut = newline + 1 if newline != -1 else cut
+        dropped = text[:cut].count("\n")
+        self._skipped_lines += dropped
+        self.total_skipped_lines += dropped
+        self._buffer = [text[cut:]]
+        self._buffered = len(self._buffer[0])
+
+    def _take_frame(self) -> str:
+        text = "".join(self._buffer)
+        frame, rest = text[:self.max_frame_chars], text[self.max_frame_chars:]
+        self._buffer = [rest] if rest else []
+        self._buffered = len(rest)
+        if self._buffered < self.max_frame_chars:
+            self._full.clear()
+
+        if self._skipped_lines:
+            frame = f"\n>>> ... 출력이 너무 빨라 {self._skipped_lines}줄을 생략했습니다 ...\n" + frame
+            self._skipped_lines = 0
+        return frame
+
+    async def run(self):
+        """전송 루프 (close() 후 남은 출력을 모두 보내면 종료)"""
+        while True:
+            await self._ready.wait()
+            if not self._closed:
+                # 시간 창 동안 더 모으기 (프레임이 가득 차면 즉시 전송)
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._ready.clear()
+
+            while self._buffer or self._skipped_lines:
+                await self.send(self._take_frame())
+                self.frames_sent += 1
+
+            if self._closed:
+                return
@@ -0,0 +1,301 @@
+"""
+실행 출력 기록
+실행마다 stdout/stderr를 합친 출력을 바이트 offset으로 주소를 매겨 보관합니다.
+재연결한 클라이언트는 마지막으로 받은 offset부터 이어 받고, 끝난 실행의 출력은 다시 실행하지 않고 조회할 수 있습니다.
+
+- 메모리: 실행마다 최근 OUTPUT_RING_BYTES만 유지하는 링 버퍼
+- 디스크: 출력이 링 버퍼 크기를 넘으면 처음부터의 원본 바이트를 OUTPUT_LOG_DIR/<run_id>.log에 이어 씀
+          (프레임/JSON 없이 출력 바이트만 기록, 스트림 전환 위치는 메모리에 따로 보관)
+          파일 쓰기는 스레드에서 모아서 수행하며, 아직 기록하지 않은 부분은 링 버퍼에서 지우지 않음
+- 완료된 기록은 OUTPUT_LOG_RETENTION개까지 보관 (서버 실행 중에만 유지)
+"""
+
+import asyncio
+import bisect
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# 기본 설정 (환경변수로 변경 가능)
+OUTPUT_RING_BYTES = int(os.getenv("OUTPUT_RING_BYTES", str(256 * 1024)))    # 실행별 메모리 보관량 (넘으면 디스크 기록)
+OUTPUT_LOG_DIR = Path(os.getenv("OUTPUT_LOG_DIR", str(BASE_DIR / "log" / "output")))
+OUTPUT_LOG_RETENTION = int(os.getenv("OUTPUT_LOG_RETENTION", "100"))         # 보관할 완료 실행 수
+OUTPUT_READ_LIMIT = int(os.getenv("OUTPUT_READ_LIMIT", str(64 * 1024)))     # 한 번에 읽는 최대 바이트
+
+
+def _utf8_incomplete_tail(data: bytes) -> int:
+    """끝에서 잘린 UTF-8 문자의 바이트 수 (완전하면 0)"""
+    for back in range(1, min(4, len(data)) + 1):
+        byte = data[-back]
+        if byte & 0xC0 == 0x80:
+            continue  # 이어지는 바이트
+        if byte & 0x80 == 0:
+            return 0
+        length = 2 if byte & 0xE0 == 0xC0 else 3 if byte & 0xF0 == 0xE0 else 4
+        return back if back < length else 0
+    return 0
+
+
+class OutputLog:
+    """실행 하나의 출력 (append 전용, 바이트 offset으로 읽기)"""
+
+    def __init__(self, run_id: str, kind: str, ring_bytes: int = OUTPUT_RING_BYTES,
+                 spill_dir: Path = OUTPUT_LOG_DIR):
+        self.run_id = run_id
+        self.kind = kind
+        self.ring_bytes = ring_bytes
+        self.spill_dir = spill_dir
+        self.created_time = datetime.now()
+        self.finished_time: Optional[datetime] = None
+        self.status: Optional[str] = None
+        self.end = 0                                 # 지금까지 기록한 전체 바이트 수
+        self._ring = bytearray()                     # 최근 출력 (앞부분 삭제는 bytearray가 O(1)로 처리)
+        self._ring_start = 0                         # _ring[0]의 offset
+        self._stream_offsets: List[int] = []         # 스트림이 바뀐 위치
+        self._stream_names: List[str] = []
+        self._file = None
+        self._spilling = False                       # 디스크 기록 중 (파일을 아직 열지 못했어도 True)
+        self._spill_failed = False
+        self._flushed = 0                            # 파일에 기록한 바이트 수
+        self._flush_task: Optional[asyncio.Task] = None
+        self._discarded = False
+        self.spill_path: Optional[Path] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_time is not None
+
+    def append(self, stream: str, data: Union[str, bytes]):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not data:
+            return
+        if not self._stream_names or self._stream_names[-1] != stream:
+            self._stream_offsets.append(self.end)
+            self._stream_names.append(stream)
+
+        self._ring += data
+        self.end += len(data)
+        if not self._spilling and not self._spill_failed and self.end > self.ring_bytes:
+            self._spilling = True  # 지금까지의 출력은 아직 모두 링 버퍼에 있음
+        if self._spilling:
+            self._schedule_flush()
+        self._trim()
+
+    def _trim(self):
+        """링 버퍼 크기 유지 (디스크 기록 중이면 파일에 쓴 부분까지만 삭제)"""
+        overflow = len(self._ring) - self.ring_bytes
+        if self._spilling:
+            overflow = min(overflow, self._flushed - self._ring_start)
+        if overflow > 0:
+            del self._ring[:overflow]
+            self._ring_start += overflow
+
+    def _schedule_flush(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self):
+        """아직 기록하지 않은 출력을 스레드에서 파일에 추가 (기록하는 동안 쌓인 출력은 다음 번에 한꺼번에)"""
+        try:
+            while self._spilling and not self._discarded and self._flushed < self.end:
+                start = self._flushed
+                data = bytes(self._ring[start - self._ring_start:])
+                await asyncio.to_thread(self._write_spill, data)
+                self._flushed = start + len(data)
+                self._trim()
+        except OSError as e:
+            print(f"[Output] 디스크 기록 실패 ({self.run_id}): {e} - 최근 출력만 보관합니다")
+            self._spilling = False
+            self._spill_failed = True
+            self.spill_path = None
+            self._trim()
+        finally:
+            self._flush_task = None
+        if self._discarded or self.finished or self._spill_failed:
+            await asyncio.to_thread(self._close_spill)
+        if self.finished and self._spilling and self._flushed == self.end:
+            # 모두 파일에 있으므로 이후 읽기는 파일에서
+            self._ring = bytearray()
+            self._ring_start = self.end
+
+    def _write_spill(self, data: bytes):
+        """(스레드) 파일에 추가 - 기록이 끝난 부분은 바로 다른 연결에서 읽을 수 있도록 flush"""
+        if self._file is None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            path = self.spill_dir / f"{self.run_id}.log"
+            self._file = open(path, "wb")
+            self.spill_path = path
+        self._file.write(data)
+        self._file.flush()
+
+    def _close_spill(self):
+        """(스레드) 파일 닫기 - 삭제된 기록이면 파일도 삭제"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._discarded and self.spill_path is not None:
+            try:
+                self.spill_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            self.spill_path = None
+
+    def close(self, status: Optional[str] = None):
+        """실행 종료 - 디스크에 모두 기록하면 메모리의 링 버퍼는 비움"""
+        if self.finished:
+            return
+        self.status = status
+        self.finished_time = datetime.now()
+        if self._spilling and self._flush_task is None:
+            self._schedule_flush()  # 남은 출력 기록 후 파일 닫기
+
+    def discard(self):
+        """보관 기간이 지난 기록 삭제 (기록 중이면 끝난 뒤 삭제)"""
+        self.close(self.status)
+        self._discarded = True
+        if self._spilling:
+            self._schedule_flush()  # 진행 중인 기록이 없으면 바로 파일 닫고 삭제
+
+    @property
+    def start(self) -> int:
+        """읽을 수 있는 가장 앞 offset (디스크에 기록하지 못해 잘려 나간 부분 이후)"""
+        return 0 if self.spill_path is not None else self._ring_start
+
+    def _read_raw(self, offset: int, size: int) -> bytes:
+        if offset >= self._ring_start:
+            position = offset - self._ring_start
+            return bytes(self._ring[position:position + size])
+        if self.spill_path is None:
+            return b""
+        try:
+            with open(self.spill_path, "rb") as f:
+                f.seek(offset)
+                return f.read(size)
+        except OSError:
+            return b""
+
+    def read(self, offset: int = 0, limit: int = OUTPUT_READ_LIMIT) -> Tuple[int, bytes]:
+        """
+        offset부터 최대 limit 바이트 읽기 (UTF-8 문자 경계에 맞춤)
+
+        Returns:
+            Tuple[int, bytes]: (실제 시작 offset, 데이터) - 다음 offset은 시작 + len(데이터)
+        """
+        offset = min(max(offset, self.start), self.end)
+        data = self._read_raw(offset, max(0, min(limit, self.end - offset)))
+
+        # 문자 중간에서 시작하면 다음 문자부터
+        skip = 0
+        while skip < min(3, len(data)) and data[skip] & 0xC0 == 0x80:
+            skip += 1
+        offset, data = offset + skip, data[skip:]
+
+        # 문자 중간에서 끝나면 다음 읽기로 미룸 (아직 나머지 바이트가 오지 않은 경우 포함)
+        cut = _utf8_incomplete_tail(data)
+        if cut and (offset + len(data) < self.end or not self.finished):
+            data = data[:-cut]
+        return offset, data
+
+    def segments(self, offset: int = 0, limit: int = OUTPUT_READ_LIMIT) -> Tuple[int, List[Tuple[str, str, int]]]:
+        """
+        offset부터 읽어 스트림별로 나눈 텍스트
+
+        Returns:
+            Tuple[int, List[(stream, text, 끝 offset)]]: (다음 offset, 조각 목록)
+        """
+        offset, data = self.read(offset, limit)
+        end = offset + len(data)
+        pieces = []
+        position = offset
+        while position < end:
+            index = bisect.bisect_right(self._stream_offsets, position) - 1
+            stream = self._stream_names[index] if index >= 0 else "stdout"
+            boundary = self._stream_offsets[index + 1] if index + 1 < len(self._stream_offsets) else end
+            stop = min(boundary, end)
+            text = data[position - offset:stop - offset].decode("utf-8", errors="replace")
+            pieces.append((stream, text, stop))
+            position = stop
+        return end, pieces
+
+    def text(self, stream: Optional[str] = None) -> str:
+        """보관 중인 전체 출력 (stream을 지정하면 해당 스트림만)"""
+        offset = self.start
+        parts = []
+        while offset < self.end:
+            next_offset, pieces = self.segments(offset, limit=max(self.end - offset, 4))
+            if next_offset == offset:
+                break
+            parts.extend(text for name, text, _ in pieces if stream is None or name == stream)
+            offset = next_offset
+        return "".join(parts)
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "kind": self.kind,
+            "status": self.status,
+            "start": self.start,
+            "end": self.end,
+            "spilled": self.spill_path is not None,
+            "created_time": self.created_time,
+            "finished_time": self.finished_time,
+        }
+
+
+class OutputStore:
+    """run_id별 출력 기록 (완료된 기록은 retention개까지 보관)"""
+
+    def __init__(self, retention: int = OUTPUT_LOG_RETENTION, spill_dir: Path = OUTPUT_LOG_DIR):
+        self.retention = retention
+        self.spill_dir = spill_dir
+        self._logs: "OrderedDict[str, OutputLog]" = OrderedDict()
+        self._cleaned = False
+
+    def create(self, kind: str, run_id: Optional[str] = None) -> OutputLog:
+        if not self._cleaned:
+            self._clean_stale()
+        log = OutputLog(run_id or uuid.uuid4().hex[:12], kind, spill_dir=self.spill_dir)
+        self._logs[log.run_id] = log
+        self._prune()
+        return log
+
+    def _clean_stale(self):
+        """이전 서버 실행에서 남은 기록 파일 삭제 (기록 목록은 메모리에만 있으므로 조회 불가)"""
+        self._cleaned = True
+        try:
+            for path in self.spill_dir.glob("*.log"):
+                path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def get(self, run_id: str) -> Optional[OutputLog]:
+        return self._logs.get(run_id)
+
+    def list(self) -> List[OutputLog]:
+        return list(self._logs.values())
+
+    def _prune(self):
+        finished = [run_id for run_id, log in self._logs.items() if log.finished]
+        for run_id in finished[:max(len(finished) - self.retention, 0)]:
+            self._logs.pop(run_id).discard()
+
+    def stats(self) -> Dict[str, int]:
+        logs = list(self._logs.values())
+        return {
+            "runs": len(logs),
+            "active": sum(1 for log in logs if not log.finished),
+            "retention": self.retention,
+            "ring_bytes": OUTPUT_RING_BYTES,
+            "memory_bytes": sum(len(log._ring) for log in logs),
+            "spilled": sum(1 for log in logs if log.spill_path is not None),
+        }
+
+
+# 서버 전역 출력 기록
+store = OutputStore()
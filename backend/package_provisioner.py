@@ -0,0 +1,369 @@
+"""
+패키지 설치 모듈
+생성된 코드가 필요로 하는 패키지를 Master VM에 설치합니다 (Slave VM은 site-packages를 공유).
+
+- 설치는 대기열에서 한 번에 하나씩 실행 (pip 동시 실행 방지)
+- 빌드한 wheel은 wheelhouse에 보관하고 설치는 wheelhouse에서만 (--no-index) 수행하므로
+  한 번 빌드한 패키지(예: Adafruit_DHT)는 다시 설치할 때 복사만 합니다.
+- import 이름과 배포 이름이 다른 패키지는 IMPORT_TO_DISTRIBUTION으로 변환
+"""
+
+import asyncio
+import enum
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import vm_manager
+
+# 기본 설정 (환경변수로 변경 가능)
+PACKAGE_WHEELHOUSE = Path(os.getenv("PACKAGE_WHEELHOUSE", str(vm_manager.VM_DIR / "wheelhouse")))
+PACKAGE_INDEX_URL = os.getenv("PACKAGE_INDEX_URL")                     # 기본 PyPI 대신 사용할 인덱스
+PACKAGE_EXTRA_INDEX_URL = os.getenv("PACKAGE_EXTRA_INDEX_URL")         # 예: https://www.piwheels.org/simple
+PACKAGE_OFFLINE = os.getenv("PACKAGE_OFFLINE", "false").lower() == "true"  # wheelhouse에 있는 패키지만 설치
+PACKAGE_AUTO_INSTALL = os.getenv("PACKAGE_AUTO_INSTALL", "false").lower() == "true"  # 실행 전 미설치 패키지 자동 설치
+PACKAGE_INSTALL_TIMEOUT = float(os.getenv("PACKAGE_INSTALL_TIMEOUT", "900"))  # 설치 하나의 최대 시간 (초)
+PACKAGE_INSTALL_RETENTION = int(os.getenv("PACKAGE_INSTALL_RETENTION", "50"))  # 보관할 완료 설치 작업 수
+
+OUTPUT_TAIL_CHARS = 2000  # 실패 시 보관할 pip 출력 끝부분
+
+# 패키지 이름 (PEP 508 프로젝트 이름) - 옵션(--index-url), URL, 경로가 pip 인자로 들어가지 않도록 검사
+PACKAGE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+# import 이름 → pip 배포 이름 (같은 이름은 생략)
+IMPORT_TO_DISTRIBUTION = {
+    "RPi": "RPi.GPIO",
+    "board": "adafruit-blinka",
+    "busio": "adafruit-blinka",
+    "digitalio": "adafruit-blinka",
+    "analogio": "adafruit-blinka",
+    "pwmio": "adafruit-blinka",
+    "neopixel": "adafruit-circuitpython-neopixel",
+    "adafruit_dht": "adafruit-circuitpython-dht",
+    "smbus": "smbus2",
+    "serial": "pyserial",
+    "usb": "pyusb",
+    "cv2": "opencv-python-headless",
+    "PIL": "Pillow",
+    "yaml": "PyYAML",
+    "bs4": "beautifulsoup4",
+    "dateutil": "python-dateutil",
+    "dotenv": "python-dotenv",
+    "sklearn": "scikit-learn",
+    "skimage": "scikit-image",
+    "Crypto": "pycryptodome",
+    "attr": "attrs",
+}
+
+
+def _load_name_overrides() -> Dict[str, str]:
+    """PACKAGE_NAME_MAP="import=배포이름,..." 으로 변환표 추가/변경"""
+    overrides = {}
+    for item in os.getenv("PACKAGE_NAME_MAP", "").split(","):
+        module, _, distribution = item.partition("=")
+        if module.strip() and distribution.strip():
+            overrides[module.strip()] = distribution.strip()
+    return overrides
+
+
+IMPORT_TO_DISTRIBUTION.update(_load_name_overrides())
+
+
+def distribution_for(module: str) -> str:
+    """import 이름에 해당하는 pip 배포 이름"""
+    return IMPORT_TO_DISTRIBUTION.get(module, module)
+
+
+def normalize_name(name: str) -> str:
+    """배포 이름 / wheel 파일 이름 비교용 정규화 (PEP 503)"""
+    return re.sub(r"[-_.]+", "_", name).lower()
+
+
+class InstallStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class InstallError(Exception):
+    """패키지 설치 실패"""
+
+
+class InvalidPackageNameError(InstallError):
+    """패키지 이름이 아닌 값 (pip 옵션, URL, 경로 등)"""
+
+
+class InstallTask:
+    """설치 작업 하나 (같은 배포 이름을 요청하면 진행 중인 작업을 공유)"""
+
+    def __init__(self, distributions: List[str], modules: List[str]):
+        self.task_id = uuid.uuid4().hex[:12]
+        self.distributions = distributions
+        self.modules = modules
+        self.status = InstallStatus.QUEUED
+        self.source: Optional[str] = None  # wheelhouse: 복사만 / built: 다운로드·빌드 후 설치
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.created_time = datetime.now()
+        self.finished_time: Optional[datetime] = None
+        self.done = asyncio.get_running_loop().create_future()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (InstallStatus.SUCCEEDED, InstallStatus.FAILED)
+
+    def finish(self, status: InstallStatus, error: Optional[str] = None):
+        self.status = status
+        self.error = error
+        self.finished_time = datetime.now()
+        if not self.done.done():
+            self.done.set_result(status == InstallStatus.SUCCEEDED)
+
+    async def wait(self) -> bool:
+        return await asyncio.shield(self.done)
+
+    def to_dict(self) -> dict:
+        return {
+            "task_id": self.task_id,
+            "status": self.status.value,
+            "distributions": self.distributions,
+            "modules": self.modules,
+            "source": self.source,
+            "seconds": self.seconds,
+            "error": self.error,
+            "created_time": self.created_time,
+            "finished_time": self.finished_time,
+        }
+
+
+class PackageProvisioner:
+    """
+    Master VM 패키지 설치 대기열
+
+    - request(): 설치 작업 등록 (대기하지 않음, 이미 대기/설치 중인 패키지는 기존 작업 반환)
+    - install_modules(): 등록 후 완료까지 대기
+    - 설치 순서: wheelhouse에서 설치 시도 → 실패하면 pip wheel로 wheelhouse 채운 뒤 다시 설치
+    """
+
+    def __init__(self, wheelhouse: Path = PACKAGE_WHEELHOUSE, offline: bool = PACKAGE_OFFLINE,
+                 timeout: float = PACKAGE_INSTALL_TIMEOUT, retention: int = PACKAGE_INSTALL_RETENTION):
+        self.wheelhouse = wheelhouse
+        self.offline = offline
+        self.timeout = timeout
+        self.retention = retention
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        self._tasks: Dict[str, InstallTask] = {}
+        self._active: Dict[str, InstallTask] = {}  # 정규화된 배포 이름 → 대기/설치 중 작업
+
+        # 통계
+        self.installed = 0
+        self.failed = 0
+        self.wheelhouse_installs = 0
+        self.built_installs = 0
+        self.install_seconds: Dict[str, float] = {}  # 배포 이름 → 마지막 설치 시간
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """진행 중인 설치를 마친 뒤 종료 (대기 중인 작업은 실패 처리)"""
+        if self._worker is None:
+            return
+        while not self._queue.empty():
+            task = self._queue.get_nowait()
+            if task is not None:
+                self._release(task)
+                task.finish(InstallStatus.FAILED, "서버 종료로 설치 취소")
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+
+    def request(self, modules: Iterable[str]) -> List[InstallTask]:
+        """
+        import 이름 목록의 설치 작업 등록
+
+        Returns:
+            List[InstallTask]: 요청한 패키지를 담당하는 작업 (기존 작업 포함)
+
+        Raises:
+            InvalidPackageNameError: 패키지 이름 형식이 아닌 값이 있음 (아무 작업도 등록하지 않음)
+        """
+        modules = list(modules)
+        names = dict.fromkeys(modules + [distribution_for(module) for module in modules if isinstance(module, str)])
+        invalid = [name for name in names if not isinstance(name, str) or not PACKAGE_NAME_PATTERN.match(name)]
+        if invalid:
+            raise InvalidPackageNameError(f"잘못된 패키지 이름: {', '.join(map(repr, invalid))}")
+
+        self.start()
+        tasks: List[InstallTask] = []
+        new_distributions: Dict[str, List[str]] = {}
+        for module in modules:
+            distribution = distribution_for(module)
+            active = self._active.get(normalize_name(distribution))
+            if active is not None:
+                if active not in tasks:
+                    tasks.append(active)
+                continue
+            new_distributions.setdefault(distribution, []).append(module)
+
+        if new_distributions:
+            task = InstallTask(list(new_distributions), [m for names in new_distributions.values() for m in names])
+            for distribution in task.distributions:
+                self._active[normalize_name(distribution)] = task
+            self._tasks[task.task_id] = task
+            self._queue.put_nowait(task)
+            self._prune()
+            tasks.append(task)
+            print(f"[Package] 설치 대기열 추가: {', '.join(task.distributions)}")
+        return tasks
+
+    async def install_modules(self, modules: Iterable[str]):
+        """
+        import 이름 목록을 설치하고 완료까지 대기
+
+        Raises:
+            InstallError: 설치 실패
+        """
+        for task in self.request(modules):
+            if not await task.wait():
+                raise InstallError(f"패키지 설치 실패 ({', '.join(task.distributions)}): {task.error}")
+
+    def get(self, task_id: str) -> Optional[InstallTask]:
+        return self._tasks.get(task_id)
+
+    def list(self) -> List[InstallTask]:
+        return list(self._tasks.values())
+
+    def has_wheel(self, distribution: str) -> bool:
+        """wheelhouse에 해당 배포의 wheel이 있는지 (의존성은 설치 시 확인)"""
+        prefix = normalize_name(distribution)
+        try:
+            return any(normalize_name(path.name.split("-", 1)[0]) == prefix
+                       for path in self.wheelhouse.glob("*.whl"))
+        except OSError:
+            return False
+
+    async def _run(self):
+        while True:
+            task = await self._queue.get()
+            if task is None:
+                return
+            try:
+                await self._install(task)
+            except Exception as e:
+                task.finish(InstallStatus.FAILED, str(e))
+            finally:
+                self._release(task)
+
+    def _release(self, task: InstallTask):
+        for distribution in task.distributions:
+            if self._active.get(normalize_name(distribution)) is task:
+                del self._active[normalize_name(distribution)]
+
+    async def _install(self, task: InstallTask):
+        task.status = InstallStatus.RUNNING
+        started = time.perf_counter()
+
+        python_exe = vm_manager.get_master_python_executable()
+        if python_exe is None:
+            await asyncio.to_thread(vm_manager.create_master_vm)
+            python_exe = vm_manager.get_master_python_executable()
+        self.wheelhouse.mkdir(parents=True, exist_ok=True)
+
+        # 1. wheelhouse에 모두 있으면 복사만 (의존성이 빠져 있으면 실패 → 빌드 단계로)
+        error = None
+        if all(self.has_wheel(distribution) for distribution in task.distributions):
+            ok, output = await self._pip(python_exe, self._install_args(task.distributions))
+            if ok:
+                task.source = "wheelhouse"
+            else:
+                error = output
+
+        # 2. 다운로드/빌드해서 wheelhouse에 저장한 뒤 wheelhouse에서 설치
+        if task.source is None and not self.offline:
+            ok, output = await self._pip(python_exe, self._wheel_args(task.distributions))
+            if ok:
+                ok, output = await self._pip(python_exe, self._install_args(task.distributions))
+            if ok:
+                task.source = "built"
+            error = None if ok else output
+        elif task.source is None and error is None:
+            error = "오프라인 모드: wheelhouse에 패키지가 없습니다"
+
+        task.seconds = round(time.perf_counter() - started, 3)
+        if task.source is None:
+            self.failed += 1
+            print(f"[Package] 설치 실패: {', '.join(task.distributions)} ({task.seconds:.1f}s)")
+            task.finish(InstallStatus.FAILED, error[-OUTPUT_TAIL_CHARS:] if error else None)
+            return
+
+        self.installed += 1
+        if task.source == "wheelhouse":
+            self.wheelhouse_installs += 1
+        else:
+            self.built_installs += 1
+        for distribution in task.distributions:
+            self.install_seconds[distribution] = task.seconds
+        print(f"[Package] 설치 완료: {', '.join(task.distributions)} ({task.source}, {task.seconds:.1f}s)")
+        task.finish(InstallStatus.SUCCEEDED)
+
+    def _install_args(self, distributions: List[str]) -> List[str]:
+        return ["install", "--no-index", "--find-links", str(self.wheelhouse), "--", *distributions]
+
+    def _wheel_args(self, distributions: List[str]) -> List[str]:
+        args = ["wheel", "--wheel-dir", str(self.wheelhouse), "--find-links", str(self.wheelhouse), "--prefer-binary"]
+        if PACKAGE_INDEX_URL:
+            args += ["--index-url", PACKAGE_INDEX_URL]
+        if PACKAGE_EXTRA_INDEX_URL:
+            args += ["--extra-index-url", PACKAGE_EXTRA_INDEX_URL]
+        return args + ["--", *distributions]
+
+    async def _pip(self, python_exe: Path, args: List[str]):
+        """pip 실행 (출력은 stdout/stderr 합쳐서 반환)"""
+        process = await asyncio.create_subprocess_exec(
+            str(python_exe), "-m", "pip", "--disable-pip-version-check", *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+        try:
+            output, _ = await asyncio.wait_for(process.communicate(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return False, f"pip {args[0]} 시간 초과 ({self.timeout:g}초)"
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+        return process.returncode == 0, output.decode("utf-8", errors="replace")
+
+    def _prune(self):
+        """보관 한도를 넘은 오래된 완료 작업 삭제"""
+        finished = [task_id for task_id, task in self._tasks.items() if task.finished]
+        for task_id in finished[:max(len(finished) - self.retention, 0)]:
+            del self._tasks[task_id]
+
+    def stats(self) -> dict:
+        return {
+            "wheelhouse": str(self.wheelhouse),
+            "offline": self.offline,
+            "auto_install": PACKAGE_AUTO_INSTALL,
+            "queued": self._queue.qsize(),
+            "active": sorted({task.task_id for task in self._active.values()}),
+            "installed": self.installed,
+            "failed": self.failed,
+            "wheelhouse_installs": self.wheelhouse_installs,
+            "built_installs": self.built_installs,
+            "install_seconds": dict(self.install_seconds),
+        }
+
+
+# 서버 전역 설치 대기열
+provisioner = PackageProvisioner()
@@ -0,0 +1,146 @@
+"""
+LLM 프롬프트 구성 모듈
+고정 템플릿은 시스템 지시문으로 분리해 프로바이더 측 캐시(Gemini system_instruction/cached content,
+Ollama 프롬프트 캐시)를 활용하고, 보드 대화 기록은 토큰 예산 안에서만 포함합니다.
+"""
+
+import hashlib
+import os
+from typing import Dict, List, Optional
+
+from models import ResponseType
+
+# 기본 설정 (환경변수로 변경 가능)
+LLM_HISTORY_TURNS = int(os.getenv("LLM_HISTORY_TURNS", "6"))                 # 불러올 최근 대화 수 (0이면 기록 미포함)
+LLM_HISTORY_TOKEN_BUDGET = int(os.getenv("LLM_HISTORY_TOKEN_BUDGET", "1500"))  # 대화 기록에 쓸 최대 토큰 (추정)
+LLM_HISTORY_CODE_CHARS = int(os.getenv("LLM_HISTORY_CODE_CHARS", "1200"))    # 이전 응답 코드 최대 글자 수
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "false").lower() == "true"  # JSON 응답 요청 (섹션 파싱 생략)
+
+SUMMARY_BUDGET_RATIO = 0.2  # 예산 중 오래된 대화 요약에 쓰는 비율
+
+# 구조화 출력 사용 시 템플릿 뒤에 붙이는 지시문 (response_parser.parse_structured 형식)
+STRUCTURED_OUTPUT_INSTRUCTION = """
+
+## 응답 형식 (JSON)
+위의 ### 섹션 형식 대신 아래 JSON 객체 하나로만 답하세요. 마크다운 코드 블록(```)은 쓰지 마세요.
+- 하드웨어 요청: {"code": "<CODE 내용>", "wiring": "<WIRING 내용>", "steps": "<STEPS 내용>"}
+- 그 외 (인사, 무관한 요청): {"message": "<답변>"}"""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토큰 수 추정 (토크나이저 없이)
+    ASCII는 약 4글자당 1토큰, 한글 등 비ASCII는 글자당 약 1토큰으로 계산
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:limit] + "\n... (생략)"
+
+
+class Prompt:
+    """
+    시스템 지시문 + 대화 메시지
+
+    messages: [{'role': 'user' | 'assistant', 'content': str}, ...] (마지막은 현재 사용자 요청)
+    response_format: "json"이면 프로바이더에 JSON 출력을 요청
+    """
+
+    def __init__(self, system: str, messages: List[Dict[str, str]], history_turns: int = 0,
+                 summarized_turns: int = 0, response_format: Optional[str] = None):
+        self.system = system
+        self.messages = messages
+        self.history_turns = history_turns
+        self.summarized_turns = summarized_turns
+        self.response_format = response_format
+
+    @property
+    def system_hash(self) -> str:
+        return hashlib.sha256(self.system.encode("utf-8")).hexdigest()[:16]
+
+    def history_key(self) -> str:
+        """캐시 키에 포함할 대화 기록 (현재 요청 제외)"""
+        return "\x1e".join(f"{message['role']}:{message['content']}" for message in self.messages[:-1])
+
+    def estimated_tokens(self) -> int:
+        return estimate_tokens(self.system) + sum(estimate_tokens(m["content"]) for m in self.messages)
+
+
+def _assistant_content(chat) -> str:
+    """이전 LLM 응답을 대화 기록용으로 축약 (코드만 남기고 배선/단계는 생략)"""
+    response = chat.llm_response
+    if response is None:
+        return ""
+    if chat.response_type == ResponseType.SUCCESS:
+        return f"### CODE\n```python\n{_truncate(response.code_content or '', LLM_HISTORY_CODE_CHARS)}\n```"
+    return _truncate(response.plain_text or "", LLM_HISTORY_CODE_CHARS)
+
+
+def build_history(chats, budget: int = LLM_HISTORY_TOKEN_BUDGET):
+    """
+    최근 대화부터 예산 안에 들어가는 만큼 포함하고, 들어가지 않는 오래된 대화는 질문만 한 줄씩 요약
+
+    Args:
+        chats: 생성 시간 오름차순 UserChat 목록 (llm_response 로드됨)
+
+    Returns:
+        (messages, included_turns, summarized_turns)
+    """
+    if not chats or budget <= 0:
+        return [], 0, 0
+
+    summary_budget = int(budget * SUMMARY_BUDGET_RATIO)
+    remaining = budget - summary_budget
+    included = []
+    for chat in reversed(chats):
+        turn = [
+            {"role": "user", "content": chat.content},
+            {"role": "assistant", "content": _assistant_content(chat)},
+        ]
+        cost = sum(estimate_tokens(message["content"]) for message in turn)
+        if cost > remaining:
+            break
+        included.append(turn)
+        remaining -= cost
+
+    older = chats[:len(chats) - len(included)]
+    messages: List[Dict[str, str]] = []
+    summarized = 0
+    if older:
+        lines = []
+        for chat in reversed(older):
+            line = f"- {_truncate(chat.content, 80)}"
+            if estimate_tokens(line) > summary_budget:
+                break
+            lines.append(line)
+            summary_budget -= estimate_tokens(line)
+        if lines:
+            summarized = len(lines)
+            messages.append({"role": "user", "content": "이전에 했던 질문:\n" + "\n".join(reversed(lines))})
+            messages.append({"role": "assistant", "content": "네, 이전 대화를 참고하겠습니다."})
+
+    for turn in reversed(included):
+        messages.extend(turn)
+    return messages, len(included), summarized
+
+
+def build_prompt(template: str, user_input: str, chats: Optional[list] = None,
+                 budget: int = LLM_HISTORY_TOKEN_BUDGET, structured: bool = LLM_STRUCTURED_OUTPUT) -> Prompt:
+    """템플릿(시스템 지시문) + 대화 기록 + 현재 요청으로 Prompt 구성"""
+    messages, turns, summarized = build_history(chats or [], budget)
+    messages.append({"role": "user", "content": f"사용자 요청: {user_input}"})
+    if structured:
+        return Prompt(template + STRUCTURED_OUTPUT_INSTRUCTION, messages, history_turns=turns,
+                      summarized_turns=summarized, response_format="json")
+    return Prompt(template, messages, history_turns=turns, summarized_turns=summarized)
+
+
+def new_usage() -> dict:
+    """요청별 토큰 사용량 (프로바이더가 응답 후 채움)"""
+    return {"provider": None, "tokens_in": None, "tokens_out": None, "cached": False}
@@ -0,0 +1,263 @@
+"""
+코드 실행 리소스 제한 및 사용량 측정
+rlimit(CPU 시간, 주소 공간, 열린 파일, 프로세스 수), cgroup v2 배치, 출력 바이트 제한,
+실행별 사용량(최대 RSS, CPU 시간, 벽시계 시간) 집계
+"""
+
+import asyncio
+import os
+import signal
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+# 기본 설정 (환경변수로 변경 가능, 0이면 해당 제한 없음)
+EXEC_CPU_SECONDS = int(os.getenv("EXEC_CPU_SECONDS", "60"))
+EXEC_MEMORY_MB = int(os.getenv("EXEC_MEMORY_MB", "512"))
+EXEC_MAX_OPEN_FILES = int(os.getenv("EXEC_MAX_OPEN_FILES", "256"))
+EXEC_MAX_PROCESSES = int(os.getenv("EXEC_MAX_PROCESSES", "32"))             # cgroup pids.max
+EXEC_MAX_USER_PROCESSES = int(os.getenv("EXEC_MAX_USER_PROCESSES", "0"))    # RLIMIT_NPROC (사용자 전체 기준)
+EXEC_MAX_OUTPUT_BYTES = int(os.getenv("EXEC_MAX_OUTPUT_BYTES", str(1024 * 1024)))
+EXEC_CGROUP_ROOT = Path(os.getenv("EXEC_CGROUP_ROOT", "/sys/fs/cgroup/pigent"))
+
+SAMPLE_INTERVAL = 0.2  # cgroup/rusage가 없을 때 /proc 샘플링 간격 (초)
+
+
+def default_limits() -> dict:
+    return {
+        "cpu_seconds": EXEC_CPU_SECONDS,
+        "memory_mb": EXEC_MEMORY_MB,
+        "open_files": EXEC_MAX_OPEN_FILES,
+        "processes": EXEC_MAX_PROCESSES,
+        "user_processes": EXEC_MAX_USER_PROCESSES,
+        "output_bytes": EXEC_MAX_OUTPUT_BYTES,
+    }
+
+
+class CgroupManager:
+    """cgroup v2 실행별 하위 그룹 관리 (사용 불가능하면 조용히 비활성화)"""
+
+    def __init__(self, root: Path = EXEC_CGROUP_ROOT):
+        self.root = root
+        self._available: Optional[bool] = None
+
+    @property
+    def available(self) -> bool:
+        if self._available is None:
+            self._available = self._prepare()
+        return self._available
+
+    def _prepare(self) -> bool:
+        if not sys.platform.startswith("linux") or not Path("/sys/fs/cgroup/cgroup.controllers").exists():
+            return False
+        try:
+            self.root.mkdir(exist_ok=True)
+            controllers = (self.root / "cgroup.controllers").read_text().split()
+            wanted = [name for name in ("cpu", "memory", "pids") if name in controllers]
+            (self.root / "cgroup.subtree_control").write_text(" ".join(f"+{name}" for name in wanted))
+            print(f"[Resource] cgroup v2 사용: {self.root} ({', '.join(wanted)})")
+            return True
+        except OSError as e:
+            print(f"[Resource] cgroup v2 사용 불가: {e}")
+            return False
+
+    def create(self, limits: dict) -> Optional[Path]:
+        if not self.available:
+            return None
+        path = self.root / f"run-{uuid.uuid4().hex[:12]}"
+        try:
+            path.mkdir()
+            if limits.get("memory_mb"):
+                self._write(path / "memory.max", str(int(limits["memory_mb"]) * 1024 * 1024))
+                self._write(path / "memory.swap.max", "0")
+            if limits.get("processes"):
+                self._write(path / "pids.max", str(limits["processes"]))
+            return path
+        except OSError:
+            return None
+
+    @staticmethod
+    def _write(path: Path, value: str):
+        try:
+            path.write_text(value)
+        except OSError:
+            pass
+
+    @staticmethod
+    def read_usage(path: Path) -> dict:
+        usage = {}
+        try:
+            for line in (path / "cpu.stat").read_text().splitlines():
+                key, value = line.split()
+                if key == "usage_usec":
+                    usage["cpu_seconds"] = int(value) / 1_000_000
+            peak = path / "memory.peak"
+            if peak.exists():
+                usage["peak_rss_kb"] = int(peak.read_text()) // 1024
+            for line in (path / "memory.events").read_text().splitlines():
+                key, value = line.split()
+                if key == "oom_kill" and int(value) > 0:
+                    usage["oom_killed"] = True
+        except (OSError, ValueError):
+            pass
+        return usage
+
+    @staticmethod
+    def remove(path: Path):
+        # 남은 하위 프로세스가 있으면 정리 후 삭제 (재시도 대기가 있으므로 스레드에서 호출)
+        try:
+            if (path / "cgroup.kill").exists():
+                (path / "cgroup.kill").write_text("1")
+        except OSError:
+            pass
+        for _ in range(10):
+            try:
+                path.rmdir()
+                return
+            except OSError:
+                time.sleep(0.05)
+
+
+cgroups = CgroupManager()
+
+
+def _read_and_remove(path: Path) -> dict:
+    """(스레드) 사용량을 읽은 뒤 cgroup 삭제"""
+    usage = CgroupManager.read_usage(path)
+    CgroupManager.remove(path)
+    return usage
+
+
+def _sample_proc(pid: int) -> Optional[dict]:
+    """/proc에서 최대 RSS(VmHWM)와 CPU 시간 읽기 (Linux 전용)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            peak_kb = next((int(line.split()[1]) for line in f if line.startswith("VmHWM:")), None)
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        return {"peak_rss_kb": peak_kb, "cpu_seconds": (int(fields[11]) + int(fields[12])) / ticks}
+    except (OSError, ValueError, IndexError, StopIteration):
+        return None
+
+
+class RunResources:
+    """
+    실행 한 번에 대한 리소스 제한 적용과 사용량 집계
+
+    사용량은 정확도 순서대로 채웁니다.
+        1. cgroup v2 (memory.peak, cpu.stat)
+        2. zygote가 wait4로 받은 rusage (warm 스타트)
+        3. 실행 중 /proc 샘플링 (cold 스타트)
+
+    cgroup 파일시스템 작업은 스레드에서 수행합니다 (이벤트 루프를 막지 않도록).
+
+        resources = RunResources()
+        try:
+            await resources.setup()
+            ... 프로세스 실행 ...
+            usage = await resources.finish(process)
+        finally:
+            await resources.cleanup()
+    """
+
+    def __init__(self, limits: Optional[dict] = None):
+        self.limits = limits or default_limits()
+        self.cgroup: Optional[Path] = None
+        self.started = time.perf_counter()
+        self.output_bytes = 0
+        self.limit_exceeded: Optional[str] = None
+        self._sample: Optional[dict] = None
+        self._sampler: Optional[asyncio.Task] = None
+
+    async def setup(self):
+        """실행별 cgroup 생성 (프로세스 시작 직전에 호출)"""
+        self.cgroup = await asyncio.to_thread(cgroups.create, self.limits)
+
+    async def cleanup(self):
+        """finish()를 거치지 못한 경우(시작 실패, 오류)에도 샘플링 중지 및 cgroup 삭제"""
+        if self._sampler:
+            self._sampler.cancel()
+        if self.cgroup:
+            cgroup, self.cgroup = self.cgroup, None
+            await asyncio.to_thread(CgroupManager.remove, cgroup)
+
+    def child_spec(self) -> dict:
+        """자식 프로세스에서 pigent_runner가 적용할 설정 (zygote 요청 / PIGENT_LIMITS 공용)"""
+        return {"cgroup": str(self.cgroup) if self.cgroup else None, "limits": self.limits}
+
+    def attach(self, process):
+        """프로세스 시작 후 호출 - 필요 시 /proc 샘플링 시작"""
+        if self.cgroup is None and process.mode == "cold" and sys.platform.startswith("linux"):
+            self._sampler = asyncio.create_task(self._sample_loop(process))
+
+    async def _sample_loop(self, process):
+        while process.returncode is None:
+            sample = _sample_proc(process.pid)
+            if sample:
+                self._sample = sample
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    def count_output(self, nbytes: int) -> bool:
+        """
+        출력 바이트 누적
+
+        Returns:
+            bool: 제한 이내이면 True, 초과하면 False
+        """
+        self.output_bytes += nbytes
+        cap = self.limits.get("output_bytes")
+        if cap and self.output_bytes > cap:
+            self.limit_exceeded = self.limit_exceeded or "output"
+            return False
+        return True
+
+    def mark_exceeded(self, reason: str):
+        self.limit_exceeded = self.limit_exceeded or reason
+
+    async def finish(self, process) -> dict:
+        """프로세스 종료 후 사용량 집계 및 cgroup 정리"""
+        if self._sampler:
+            self._sampler.cancel()
+
+        usage = {
+            "wall_seconds": round(time.perf_counter() - self.started, 3),
+            "cpu_seconds": None,
+            "peak_rss_kb": None,
+            "output_bytes": self.output_bytes,
+            "limit_exceeded": None,
+        }
+
+        if self.cgroup:
+            cgroup, self.cgroup = self.cgroup, None
+            measured = await asyncio.to_thread(_read_and_remove, cgroup)
+            if measured.pop("oom_killed", False):
+                self.mark_exceeded("memory")
+            usage.update(measured)
+        elif getattr(process, "rusage", None):
+            rusage = process.rusage
+            usage["cpu_seconds"] = rusage["utime"] + rusage["stime"]
+            # ru_maxrss 단위: Linux는 KB, macOS는 바이트
+            usage["peak_rss_kb"] = rusage["maxrss"] // 1024 if sys.platform == "darwin" else rusage["maxrss"]
+        elif self._sample:
+            usage.update(self._sample)
+
+        if usage["cpu_seconds"] is not None:
+            usage["cpu_seconds"] = round(usage["cpu_seconds"], 3)
+        if hasattr(signal, "SIGXCPU") and process.returncode == -signal.SIGXCPU:
+            self.mark_exceeded("cpu_time")
+
+        usage["limit_exceeded"] = self.limit_exceeded
+        return usage
+
+
+def format_usage(usage: dict) -> str:
+    """사용량 요약 문자열 (WebSocket 완료 메시지용)"""
+    parts = [f"{usage['wall_seconds']:.2f}s"]
+    if usage.get("cpu_seconds") is not None:
+        parts.append(f"CPU {usage['cpu_seconds']:.2f}s")
+    if usage.get("peak_rss_kb") is not None:
+        parts.append(f"최대 메모리 {usage['peak_rss_kb'] / 1024:.1f}MB")
+    return " · ".join(parts)
@@ -0,0 +1,235 @@
+"""
+LLM 응답 파싱 모듈
+### CODE / ### WIRING / ### STEPS 섹션을 한 번의 줄 단위 순회로 분리합니다.
+스트리밍 청크에도 그대로 사용할 수 있고, 구조화(JSON) 출력 응답은 섹션 파싱 없이 바로 변환합니다.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from models import ResponseType
+
+SECTION_NAMES = {"CODE": "code", "WIRING": "wiring", "STEPS": "steps"}
+REQUIRED_SECTIONS = ("code", "wiring", "steps")
+
+# 줄 단위 섹션 헤더 (예: "### CODE", "## Wiring:", "**STEPS**")
+SECTION_HEADER_PATTERN = re.compile(
+    r'^(?:#{1,6}\s*(?:\*\*)?|\*\*)\s*(CODE|WIRING|STEPS)\s*(?:\*\*)?\s*:?\s*$', re.IGNORECASE
+)
+
+# 코드 블록 여는 줄 (``` 또는 ~~~, 언어 표기 선택)
+FENCE_OPEN_PATTERN = re.compile(r'^\s*(`{3,}|~{3,})\s*([\w+.#-]*)')
+
+# CODE 섹션에서 실행할 코드로 취급하는 언어 표기 (그 외 블록은 python 블록이 없을 때만 사용)
+PYTHON_LANGS = {"", "python", "python3", "py", "py3"}
+
+
+class _Section:
+    """섹션 하나의 코드 블록과 블록 밖 텍스트"""
+
+    def __init__(self):
+        self.blocks: List[Tuple[str, str]] = []  # (언어, 내용)
+        self.text: List[str] = []
+
+    def content(self, name: str) -> str:
+        if not self.blocks:
+            # 코드 블록 없이 작성된 섹션은 본문 그대로 사용
+            return "\n".join(self.text).strip()
+        blocks = self.blocks
+        if name == "code":
+            python_blocks = [block for block in blocks if block[0] in PYTHON_LANGS]
+            blocks = python_blocks or blocks
+        return "\n\n".join(text for _, text in blocks).strip()
+
+
+class SectionParser:
+    """
+    단일 순회 섹션 파서
+
+    feed()로 청크를 넣으면 이벤트 리스트를 반환합니다.
+        {'type': 'section_start', 'section': 'code'}
+        {'type': 'section', 'section': 'code', 'content': '...'}  # 섹션이 끝난 시점 (다음 헤더 / 스트림 종료)
+
+    - 완결된 줄만 검사하므로 헤더나 펜스가 청크 경계에서 잘려도 안전
+    - 헤더 순서와 무관, 코드 블록 안의 헤더 모양 줄은 무시
+    - CODE 섹션 안의 "# Code" 같은 단일 # 줄은 파이썬 주석으로 보고 헤더로 취급하지 않음
+    - 섹션 안에 코드 블록이 여러 개면 이어 붙임 (CODE는 python 블록 우선)
+    - 닫히지 않은 코드 블록은 스트림 종료 시 그때까지의 내용으로 마감
+    """
+
+    def __init__(self):
+        self._pending = ""                     # 아직 줄바꿈이 오지 않은 마지막 줄
+        self._parts: List[str] = []            # 전체 원문 (예외 응답용)
+        self._sections: Dict[str, _Section] = {}
+        self._current: Optional[str] = None    # 현재 섹션 이름
+        self._fence: Optional[str] = None      # 열린 코드 블록의 펜스 문자열
+        self._fence_lang = ""
+        self._block: List[str] = []
+        self._finished = False
+
+    def feed(self, chunk: str) -> List[Dict[str, str]]:
+        events = []
+        self._parts.append(chunk)
+        self._pending += chunk
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            # 코드 블록 안의 일반 줄은 바로 추가 (대부분의 줄)
+            if self._fence is not None and not line.rstrip().endswith(self._fence[0]):
+                self._block.append(line)
+                continue
+            events.extend(self._process_line(line))
+        return events
+
+    def finish(self) -> List[Dict[str, str]]:
+        """스트림 종료 시 남은 줄을 처리하고 현재 섹션을 마감"""
+        if self._finished:
+            return []
+        self._finished = True
+        events = []
+        if self._pending:
+            events.extend(self._process_line(self._pending))
+            self._pending = ""
+        self._close_block()
+        events.extend(self._close_current())
+        return events
+
+    def _process_line(self, line: str) -> List[Dict[str, str]]:
+        stripped = line.strip()
+
+        if self._fence is not None:
+            if stripped.startswith(self._fence) and not stripped.strip(self._fence[0]):
+                self._close_block()
+            elif stripped.endswith(self._fence):
+                # 마지막 코드 줄 끝에 바로 붙은 닫는 펜스 (예: "pause()```")
+                self._block.append(line.rstrip()[:-len(self._fence)])
+                self._close_block()
+            else:
+                self._block.append(line)
+            return []
+
+        first = stripped[:1]
+        header = SECTION_HEADER_PATTERN.match(stripped) if first in ("#", "*") else None
+        if header and self._current == "code" and first == "#" and not stripped.startswith("##"):
+            # 펜스 없이 작성된 코드의 주석 (예: "# Code", "# wiring")
+            header = None
+        if header:
+            events = self._close_current()
+            self._current = SECTION_NAMES[header.group(1).upper()]
+            self._sections.setdefault(self._current, _Section())
+            events.append({"type": "section_start", "section": self._current})
+            return events
+
+        fence = FENCE_OPEN_PATTERN.match(line) if first in ("`", "~") else None
+        if fence:
+            # 섹션 밖의 코드 블록도 추적해 그 안의 헤더 모양 줄을 무시
+            self._fence = fence.group(1)
+            self._fence_lang = fence.group(2).lower()
+            self._block = []
+        elif self._current is not None:
+            self._sections[self._current].text.append(line)
+        return []
+
+    def _close_block(self):
+        if self._fence is None:
+            return
+        if self._current is not None:
+            self._sections[self._current].blocks.append((self._fence_lang, "\n".join(self._block)))
+        self._fence = None
+        self._block = []
+
+    def _close_current(self) -> List[Dict[str, str]]:
+        if self._current is None:
+            return []
+        name, self._current = self._current, None
+        return [{"type": "section", "section": name, "content": self._sections[name].content(name)}]
+
+    def result(self) -> dict:
+        """파싱 결과 (parse_llm_response와 같은 형식)"""
+        self.finish()
+        if all(name in self._sections for name in REQUIRED_SECTIONS):
+            return _success(*(self._sections[name].content(name) for name in REQUIRED_SECTIONS))
+        return _exception("".join(self._parts))
+
+
+def _success(code: str, wiring: str, steps: str) -> dict:
+    return {
+        'response_type': ResponseType.SUCCESS,
+        'plain_text': None,
+        'code_content': code,
+        'wiring_content': wiring,
+        'steps_content': steps
+    }
+
+
+def _exception(text: str) -> dict:
+    return {
+        'response_type': ResponseType.EXCEPTION,
+        'plain_text': text.strip(),
+        'code_content': None,
+        'wiring_content': None,
+        'steps_content': None
+    }
+
+
+def _as_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "\n".join(str(item) for item in value)
+    return str(value).strip()
+
+
+def parse_structured(response_text: str) -> Optional[dict]:
+    """
+    구조화(JSON) 출력 응답 변환
+
+        {"code": ..., "wiring": ..., "steps": ...} → success
+        {"message": ...}                           → exception
+
+    Returns:
+        dict | None: JSON 응답이 아니면 None (섹션 파싱으로 처리)
+    """
+    text = response_text.strip()
+    if text.startswith("```"):
+        # ```json ... ``` 로 감싼 경우
+        first_newline = text.find("\n")
+        if first_newline < 0 or not text.endswith("```"):
+            return None
+        text = text[first_newline + 1:-3].strip()
+    if not text.startswith("{"):
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    if data.get("code"):
+        return _success(_as_text(data.get("code")), _as_text(data.get("wiring")), _as_text(data.get("steps")))
+    if "message" in data:
+        return _exception(_as_text(data.get("message")))
+    return None
+
+
+def parse_llm_response(response_text: str) -> dict:
+    """
+    LLM 응답을 파싱하여 response_type과 각 섹션을 추출합니다.
+
+    Returns:
+        dict: {
+            'response_type': 'success' or 'exception',
+            'plain_text': str (exception인 경우),
+            'code_content': str (success인 경우),
+            'wiring_content': str (success인 경우),
+            'steps_content': str (success인 경우)
+        }
+    """
+    structured = parse_structured(response_text)
+    if structured is not None:
+        return structured
+
+    parser = SectionParser()
+    parser.feed(response_text)
+    return parser.result()
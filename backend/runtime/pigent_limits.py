@@ -0,0 +1,63 @@
+"""
+실행 자식 프로세스 리소스 제한 (Slave VM / 서버 양쪽에서 사용)
+
+사용자 코드 실행 직전에 자식 프로세스 안에서 pigent_runner가 호출합니다.
+    - cold 스타트: python -m pigent_runner
+    - warm 스타트: zygote가 fork한 자식
+"""
+
+import os
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _set_limit(name, value):
+    """soft/hard 제한 설정 (현재 hard 제한보다 높게는 설정하지 않음)"""
+    kind = getattr(resource, name, None)
+    if kind is None or not value:
+        return
+    _, hard = resource.getrlimit(kind)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    try:
+        resource.setrlimit(kind, (value, hard if name == "RLIMIT_CPU" else value))
+    except (ValueError, OSError):
+        pass
+
+
+def setup_child(spec):
+    """
+    cgroup 배치 + rlimit 적용
+
+    Args:
+        spec: {
+            'cgroup': cgroup v2 디렉토리 경로 또는 None,
+            'limits': {'cpu_seconds', 'memory_mb', 'open_files', 'user_processes'}
+        }
+    """
+    if not spec:
+        return
+
+    # cgroup v2: 자기 자신을 cgroup으로 이동 ("0"은 쓰는 프로세스 자신)
+    cgroup = spec.get("cgroup")
+    if cgroup:
+        try:
+            with open(os.path.join(cgroup, "cgroup.procs"), "w") as f:
+                f.write("0")
+        except OSError:
+            pass
+
+    if resource is None:
+        return
+
+    limits = spec.get("limits") or {}
+    # CPU: soft 초과 시 SIGXCPU, hard는 유지
+    _set_limit("RLIMIT_CPU", limits.get("cpu_seconds"))
+    if limits.get("memory_mb"):
+        _set_limit("RLIMIT_AS", int(limits["memory_mb"]) * 1024 * 1024)
+    _set_limit("RLIMIT_NOFILE", limits.get("open_files"))
+    # RLIMIT_NPROC는 사용자 전체 프로세스 수 기준이므로 명시적으로 설정한 경우에만 적용
+    _set_limit("RLIMIT_NPROC", limits.get("user_processes"))
@@ -0,0 +1,177 @@
+"""
+PIGENT 실행 런너 (Slave VM의 Python으로 실행)
+
+cold 스타트와 warm 스타트가 같은 순서로 사용자 스크립트를 실행합니다.
+    - cold 스타트: python -m pigent_runner <script>  (PYTHONPATH에 runtime 디렉토리)
+    - warm 스타트: zygote가 fork한 자식에서 run() 호출
+
+실행 순서:
+    1. 리소스 제한 적용 (cgroup 배치 + rlimit)
+    2. 하드웨어 라이브러리 미리 import (warm 스타트에서는 zygote가 이미 import해 둠)
+    3. SIGTERM/SIGINT 핸들러와 GPIO 정리(atexit) 등록
+    4. 스크립트 실행 후 실행 정보를 보고 파일(JSON)에 기록 - 출력 스트림과 분리된 보조 채널
+
+설정 (환경변수, 사용자 코드에는 전달하지 않음):
+    PIGENT_LIMITS   pigent_limits.setup_child에 넘길 JSON (cold 스타트)
+    PIGENT_PRELOAD  미리 import할 모듈 (쉼표 구분)
+    PIGENT_REPORT   실행 정보를 기록할 파일 경로
+"""
+
+import atexit
+import importlib
+import json
+import os
+import runpy
+import signal
+import sys
+import time
+import traceback
+
+import pigent_limits
+
+RUNNER_FILES = {os.path.abspath(__file__), runpy.__file__, "<frozen runpy>"}
+
+
+def cleanup_resources():
+    """GPIO 및 기타 리소스 정리"""
+    gpiozero = sys.modules.get("gpiozero")
+    if gpiozero is None:
+        return
+    try:
+        gpiozero.Device.pin_factory.close()
+    except Exception:
+        pass
+
+
+class _Stopped(SystemExit):
+    """종료 신호로 인한 정상 종료 (보고서에 신호 이름 기록)"""
+
+    def __init__(self, signum):
+        super().__init__(0)
+        self.signum = signum
+
+
+def signal_handler(signum, frame):
+    print("\n>>> 정리 중...")
+    raise _Stopped(signum)
+
+
+def install_handlers():
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGINT, signal_handler)
+    atexit.register(cleanup_resources)
+
+
+def preload(modules):
+    """모듈 미리 import (실패한 모듈은 사용자 코드에서 다시 오류가 나므로 건너뜀)"""
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:
+            pass
+    return loaded
+
+
+def exit_code_of(code):
+    """SystemExit.code를 프로세스 종료 코드로 변환"""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def print_user_traceback(error):
+    """런너/runpy 프레임을 빼고 사용자 코드부터 traceback 출력"""
+    tb = error.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename in RUNNER_FILES:
+        tb = tb.tb_next
+    traceback.print_exception(type(error), error, tb or error.__traceback__)
+
+
+def write_report(path, report):
+    if not path:
+        return
+    try:
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        os.replace(temp_path, path)
+    except OSError:
+        pass
+
+
+def run(script, limits=None, modules=(), report_path=None):
+    """
+    사용자 스크립트 실행
+
+    Args:
+        script: 실행할 .py / .pyc 경로
+        limits: cgroup/rlimit 설정 (RunResources.child_spec())
+        modules: 미리 import할 모듈 이름
+        report_path: 실행 정보를 기록할 파일 경로
+
+    Returns:
+        int: 프로세스 종료 코드 (atexit 핸들러는 호출자가 실행)
+    """
+    started = time.perf_counter()
+    report = {"exit_code": None, "exception": None, "signal": None, "preloaded": []}
+
+    # cgroup 배치 + rlimit 적용 (사용자 코드 실행 직전)
+    pigent_limits.setup_child(limits)
+    limited = time.perf_counter()
+
+    already = [name for name in modules if name in sys.modules]
+    report["preloaded"] = already + preload([name for name in modules if name not in sys.modules])
+    install_handlers()
+    ready = time.perf_counter()
+
+    sys.argv = [script]
+    sys.path[0] = os.path.dirname(os.path.abspath(script))
+
+    code = 0
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except _Stopped as e:
+        report["signal"] = signal.Signals(e.signum).name
+    except SystemExit as e:
+        code = exit_code_of(e.code)
+    except BaseException as e:
+        report["exception"] = type(e).__name__
+        print_user_traceback(e)
+        code = 1
+    finished = time.perf_counter()
+
+    report.update({
+        "exit_code": code,
+        "limits_ms": round((limited - started) * 1000, 2),
+        "preload_ms": round((ready - limited) * 1000, 2),
+        "run_ms": round((finished - ready) * 1000, 2),
+    })
+    write_report(report_path, report)
+    return code
+
+
+def options_from_env():
+    """환경변수의 런너 설정을 읽고 제거 (사용자 코드와 그 자식 프로세스에는 보이지 않도록)"""
+    limits = os.environ.pop("PIGENT_LIMITS", "")
+    modules = os.environ.pop("PIGENT_PRELOAD", "")
+    return {
+        "limits": json.loads(limits) if limits else None,
+        "modules": [name for name in modules.split(",") if name],
+        "report_path": os.environ.pop("PIGENT_REPORT", None),
+    }
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python -m pigent_runner <script>", file=sys.stderr)
+        sys.exit(2)
+    sys.exit(run(sys.argv[1], **options_from_env()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+PIGENT 실행 zygote (Slave VM의 Python으로 실행)
+
+하드웨어 라이브러리를 미리 import해 둔 뒤, 요청마다 fork하여 사용자 스크립트를 실행합니다.
+fork된 자식은 한 번만 사용되고 종료되므로 실행 간 상태가 공유되지 않습니다.
+
+프로토콜 (Unix 소켓, 요청마다 연결 하나):
+    요청: SCM_RIGHTS로 (stdin, stdout, stderr) fd 3개 + JSON 한 줄
+          {"script": "...", "env": {...}, "cwd": "...", "resources": {...}}
+    응답: {"pid": 1234}\n
+          {"exit": 0, "rusage": {...}}\n   (자식 종료 시)
+"""
+
+import argparse
+import atexit
+import importlib
+import json
+import os
+import selectors
+import signal
+import socket
+import sys
+
+import pigent_runner
+
+
+def warmup(modules):
+    """공통 하드웨어 라이브러리 미리 import (실패한 모듈은 건너뜀)"""
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception as e:
+            print(f"[Zygote] warmup 실패: {name} ({e})", flush=True)
+    return loaded
+
+
+def recv_request(conn):
+    """fd 3개와 JSON 요청 한 줄 수신"""
+    data, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+    while not data.endswith(b"\n"):
+        more = conn.recv(65536)
+        if not more:
+            break
+        data += more
+    return json.loads(data.decode("utf-8")), fds
+
+
+def send_message(conn, message):
+    try:
+        conn.sendall((json.dumps(message) + "\n").encode("utf-8"))
+    except OSError:
+        pass
+
+
+def run_child(request, fds):
+    """fork된 자식: 표준 입출력 연결 후 pigent_runner로 사용자 스크립트 실행"""
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    os.setsid()
+
+    stdin_fd, stdout_fd, stderr_fd = fds
+    os.dup2(stdin_fd, 0)
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    os.closerange(3, os.sysconf("SC_OPEN_MAX"))
+
+    os.environ.clear()
+    os.environ.update(request.get("env") or {})
+    if request.get("cwd"):
+        os.chdir(request["cwd"])
+
+    # cold 스타트와 같은 런너로 실행 (리소스 제한 적용, 신호 핸들러 등록, 실행 정보 보고)
+    options = pigent_runner.options_from_env()
+    options["limits"] = request.get("resources")
+    code = pigent_runner.run(request["script"], **options)
+
+    # 사용자 코드가 등록한 atexit 핸들러 실행 (예: GPIO cleanup)
+    try:
+        atexit._run_exitfuncs()
+    except BaseException:
+        pass
+
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except Exception:
+            pass
+    os._exit(code)
+
+
+def serve(socket_path, max_forks):
+    sel = selectors.DefaultSelector()
+
+    # SIGCHLD → wakeup fd로 메인 루프 깨우기
+    wake_r, wake_w = socket.socketpair()
+    wake_r.setblocking(False)
+    wake_w.setblocking(False)
+    signal.set_wakeup_fd(wake_w.fileno())
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    sel.register(wake_r, selectors.EVENT_READ, "wake")
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(64)
+    listener.setblocking(False)
+    sel.register(listener, selectors.EVENT_READ, "listen")
+
+    children = {}  # pid -> 요청 연결
+    forks = 0
+    accepting = True
+
+    print("READY", flush=True)
+
+    while accepting or children:
+        for key, _ in sel.select():
+            if key.data == "listen":
+                conn, _ = listener.accept()
+                conn.setblocking(True)
+                try:
+                    request, fds = recv_request(conn)
+                except Exception as e:
+                    print(f"[Zygote] 요청 수신 실패: {e}", flush=True)
+                    conn.close()
+                    continue
+
+                pid = os.fork()
+                if pid == 0:
+                    run_child(request, fds)
+
+                for fd in fds:
+                    os.close(fd)
+                children[pid] = conn
+                send_message(conn, {"pid": pid})
+
+                # 최대 재사용 횟수 도달 → 새 요청은 받지 않고 남은 자식만 기다린 뒤 종료
+                forks += 1
+                if max_forks and forks >= max_forks:
+                    accepting = False
+                    sel.unregister(listener)
+                    listener.close()
+                    os.unlink(socket_path)
+
+            elif key.data == "wake":
+                try:
+                    while wake_r.recv(4096):
+                        pass
+                except BlockingIOError:
+                    pass
+
+                while children:
+                    try:
+                        pid, status, usage = os.wait4(-1, os.WNOHANG)
+                    except ChildProcessError:
+                        break
+                    if pid == 0:
+                        break
+                    conn = children.pop(pid, None)
+                    if conn is None:
+                        continue
+                    send_message(conn, {
+                        "exit": os.waitstatus_to_exitcode(status),
+                        "rusage": {
+                            "maxrss": usage.ru_maxrss,
+                            "utime": usage.ru_utime,
+                            "stime": usage.ru_stime,
+                        }
+                    })
+                    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--socket", required=True)
+    parser.add_argument("--warmup", default="")
+    parser.add_argument("--max-forks", type=int, default=0)
+    args = parser.parse_args()
+
+    warmup([name for name in args.warmup.split(",") if name])
+    serve(args.socket, args.max_forks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+실행 스크립트 캐시
+실행할 소스의 해시를 이름으로 소스와 미리 컴파일한 .pyc를 보관합니다.
+같은 코드를 다시 실행하면 임시 파일 생성/쓰기와 컴파일 없이 .pyc를 바로 실행합니다.
+
+- 위치: tmpfs(/dev/shm)가 있으면 그곳, 없으면 임시 디렉토리 (사용자별 디렉토리, 0700)
+- 공유 디렉토리이므로 다른 사용자가 만들었거나 그룹/다른 사용자가 쓸 수 있는 캐시 디렉토리는 사용하지 않음
+- 전체 크기가 SCRIPT_CACHE_MAX_BYTES를 넘으면 오래 사용하지 않은 항목부터 삭제 (실행 중인 항목 제외)
+- .pyc는 서버와 같은 Python 버전(Slave VM)에서만 유효하므로 cache_tag별 디렉토리 사용
+"""
+
+import asyncio
+import hashlib
+import os
+import py_compile
+import stat
+import sys
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def _default_cache_dir() -> Path:
+    shm = Path("/dev/shm")
+    base = shm if shm.is_dir() and os.access(shm, os.W_OK) else Path(tempfile.gettempdir())
+    suffix = f"-{os.getuid()}" if hasattr(os, "getuid") else ""
+    return base / f"pigent-scripts{suffix}"
+
+
+# 기본 설정 (환경변수로 변경 가능)
+SCRIPT_CACHE_DIR = Path(os.getenv("SCRIPT_CACHE_DIR", str(_default_cache_dir())))
+SCRIPT_CACHE_MAX_BYTES = int(os.getenv("SCRIPT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # 0이면 캐시 사용 안 함
+
+
+class CachedScript:
+    """캐시된 스크립트 하나 (source: .py, compiled: .pyc - 컴파일 실패 시 None)"""
+
+    def __init__(self, key: str, source: Path, compiled: Optional[Path], size: int):
+        self.key = key
+        self.source = source
+        self.compiled = compiled
+        self.size = size
+        self.in_use = 0
+
+    @property
+    def path(self) -> Path:
+        """실행할 파일 (문법 오류로 컴파일하지 못했으면 소스 - 실행 시 Python이 오류 표시)"""
+        return self.compiled or self.source
+
+
+class ScriptCache:
+    """
+    내용 기반 스크립트 저장소
+
+        script = await cache.acquire(source)
+        try:
+            ... script.path 실행 ...
+        finally:
+            cache.release(script)
+    """
+
+    def __init__(self, cache_dir: Path = SCRIPT_CACHE_DIR, max_bytes: int = SCRIPT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir / (sys.implementation.cache_tag or "python")
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedScript]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.compile_errors = 0
+        self.evictions = 0
+        self._loaded = False
+        self._dir_checked = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _ensure_dir(self):
+        """캐시 디렉토리 생성 (0700) 및 소유자/권한 확인 (스레드에서 실행)"""
+        if self._dir_checked:
+            return
+        root = self.cache_dir.parent
+        root.parent.mkdir(parents=True, exist_ok=True)
+        for path in (root, self.cache_dir):
+            path.mkdir(mode=0o700, exist_ok=True)
+            info = path.lstat()
+            if (not stat.S_ISDIR(info.st_mode) or info.st_mode & 0o022
+                    or (hasattr(os, "getuid") and info.st_uid != os.getuid())):
+                raise PermissionError(f"스크립트 캐시 디렉토리를 신뢰할 수 없습니다 (소유자/권한 확인): {path}")
+        self._dir_checked = True
+
+    def _load_existing(self):
+        """이전 서버 실행에서 남은 항목을 사용 시간 순으로 등록 (tmpfs는 재부팅 전까지 유지)"""
+        self._loaded = True
+        try:
+            self._ensure_dir()
+            sources = sorted(self.cache_dir.glob("*.py"), key=lambda path: path.stat().st_mtime)
+        except OSError as e:
+            print(f"[Script Cache] 기존 항목을 불러오지 않음: {e}")
+            return
+        for source in sources:
+            compiled = source.with_suffix(".pyc")
+            try:
+                size = source.stat().st_size + (compiled.stat().st_size if compiled.exists() else 0)
+            except OSError:
+                continue
+            entry = CachedScript(source.stem, source, compiled if compiled.exists() else None, size)
+            self._entries[entry.key] = entry
+            self.total_bytes += size
+        self._evict()
+
+    async def acquire(self, source: str) -> CachedScript:
+        """소스에 해당하는 스크립트 반환 (없으면 저장 후 컴파일, 동시에 같은 소스를 요청하면 한 번만 수행)"""
+        if not self._loaded:
+            await asyncio.to_thread(self._load_existing)
+
+        key = hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]
+        entry = self._entries.get(key)
+        if entry is not None and entry.path.exists():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            entry.in_use += 1
+            return entry
+
+        pending = self._pending.get(key)
+        if pending is None:
+            self.misses += 1
+            pending = asyncio.get_running_loop().create_future()
+            self._pending[key] = pending
+            try:
+                entry = await asyncio.to_thread(self._store, key, source)
+                entry.in_use += 1  # 등록 시 바로 삭제되지 않도록 먼저 사용 중 표시
+                self._add(entry)
+                pending.set_result(entry)
+            except BaseException as e:
+                pending.set_exception(e)
+                pending.exception()  # 기다리는 요청이 없어도 경고가 나지 않도록
+                raise
+            finally:
+                del self._pending[key]
+            return entry
+
+        entry = await asyncio.shield(pending)
+        self.hits += 1
+        entry.in_use += 1
+        return entry
+
+    def release(self, entry: CachedScript):
+        entry.in_use = max(0, entry.in_use - 1)
+        if not self.enabled or self.total_bytes > self.max_bytes:
+            self._evict()
+
+    def _store(self, key: str, source: str) -> CachedScript:
+        """소스 저장 + .pyc 컴파일 (스레드에서 실행, 임시 파일로 쓴 뒤 교체해 원자적으로 저장)"""
+        self._ensure_dir()
+        source_path = self.cache_dir / f"{key}.py"
+        compiled_path = self.cache_dir / f"{key}.pyc"
+
+        temp_path = source_path.with_suffix(f".{os.getpid()}.tmp")
+        temp_path.write_text(source, encoding="utf-8")
+        os.replace(temp_path, source_path)
+
+        try:
+            # 소스 mtime과 무관하게 사용 (파일 이름이 곧 내용 해시)
+            py_compile.compile(str(source_path), cfile=str(compiled_path), doraise=True,
+                               invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+        except py_compile.PyCompileError:
+            self.compile_errors += 1
+            compiled_path.unlink(missing_ok=True)
+            compiled = None
+        else:
+            compiled = compiled_path
+
+        size = source_path.stat().st_size + (compiled_path.stat().st_size if compiled else 0)
+        return CachedScript(key, source_path, compiled, size)
+
+    def _add(self, entry: CachedScript):
+        old = self._entries.pop(entry.key, None)
+        if old is not None:
+            self.total_bytes -= old.size
+        self._entries[entry.key] = entry
+        self.total_bytes += entry.size
+        self._evict()
+
+    def _evict(self):
+        """최대 크기를 넘으면 오래된 항목부터 삭제 (실행 중인 항목은 남김)"""
+        for key in list(self._entries):
+            if self.enabled and self.total_bytes <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if entry.in_use:
+                continue
+            del self._entries[key]
+            self.total_bytes -= entry.size
+            self.evictions += 1
+            for path in (entry.source, entry.compiled):
+                if path is not None:
+                    try:
+                        path.unlink(missing_ok=True)
+                    except OSError:
+                        pass
+
+    def stats(self) -> dict:
+        return {
+            "dir": str(self.cache_dir),
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "compile_errors": self.compile_errors,
+            "evictions": self.evictions,
+        }
+
+
+# 서버 전역 스크립트 캐시
+cache = ScriptCache()
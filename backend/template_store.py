@@ -0,0 +1,191 @@
+"""
+프롬프트 템플릿 저장소
+템플릿 파일의 변경(mtime/크기)을 주기적으로 확인해 서버 재시작 없이 다시 읽고,
+이름별 템플릿과 내용 기반 버전을 관리합니다.
+
+    default        → PROMPT_TEMPLATE_PATH (기본: backend/text_prompt.txt)
+    <name>         → PROMPT_TEMPLATE_DIR/<name>.txt (기본: backend/prompts/)
+"""
+
+import asyncio
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# 기본 설정 (환경변수로 변경 가능)
+PROMPT_TEMPLATE_PATH = Path(os.getenv("PROMPT_TEMPLATE_PATH", str(BASE_DIR / "text_prompt.txt")))
+PROMPT_TEMPLATE_DIR = Path(os.getenv("PROMPT_TEMPLATE_DIR", str(BASE_DIR / "prompts")))
+PROMPT_RELOAD_INTERVAL = float(os.getenv("PROMPT_RELOAD_INTERVAL", "2.0"))  # 변경 확인 간격 (초, 0이면 감시 안 함)
+
+DEFAULT_TEMPLATE = "default"
+FALLBACK_TEXT = "당신은 라즈베리파이 학습을 돕는 AI 어시스턴트입니다."
+ENCODINGS = ['utf-8', 'cp949', 'euc-kr', 'utf-8-sig']
+
+
+class TemplateNotFoundError(Exception):
+    """등록되지 않은 템플릿 이름"""
+
+
+class PromptTemplate:
+    """템플릿 한 버전 (불변 - 다시 읽으면 새 객체로 교체)"""
+
+    def __init__(self, name: str, text: str, path: Optional[Path], mtime_ns: Optional[int], size: Optional[int]):
+        self.name = name
+        self.text = text
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        self.loaded_time = datetime.now()
+
+    @property
+    def label(self) -> str:
+        """로그/사용량 보고용 "이름@버전" """
+        return f"{self.name}@{self.version}"
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "path": str(self.path) if self.path else None,
+            "chars": len(self.text),
+            "loaded_time": self.loaded_time,
+        }
+
+
+def _read_text(path: Path) -> Optional[str]:
+    """인코딩을 순서대로 시도하며 파일 읽기"""
+    data = path.read_bytes()
+    for encoding in ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+class TemplateStore:
+    """
+    이름별 프롬프트 템플릿
+
+    - reload(): 변경된 파일만 다시 읽고, 전체 템플릿 딕셔너리를 한 번에 교체
+      (읽는 도중의 요청은 이전 버전을 그대로 사용)
+    - start_watching(): interval마다 reload() 실행
+    """
+
+    def __init__(self, default_path: Path = PROMPT_TEMPLATE_PATH, template_dir: Path = PROMPT_TEMPLATE_DIR,
+                 interval: float = PROMPT_RELOAD_INTERVAL):
+        self.default_path = default_path
+        self.template_dir = template_dir
+        self.interval = interval
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.reloads = 0
+        self.reload()
+
+    def _sources(self) -> Dict[str, Path]:
+        sources = {DEFAULT_TEMPLATE: self.default_path}
+        if self.template_dir.is_dir():
+            for path in sorted(self.template_dir.glob("*.txt")):
+                sources.setdefault(path.stem, path)
+        return sources
+
+    def reload(self) -> List[str]:
+        """
+        변경된 템플릿 다시 읽기
+
+        Returns:
+            List[str]: 새로 읽은 템플릿 이름
+        """
+        current = self._templates
+        updated: Dict[str, PromptTemplate] = {}
+        changed = []
+
+        for name, path in self._sources().items():
+            old = current.get(name)
+            try:
+                stat = path.stat()
+            except OSError:
+                # 편집기가 파일을 교체하는 순간일 수 있으므로 이전 버전 유지
+                if old:
+                    updated[name] = old
+                elif name == DEFAULT_TEMPLATE:
+                    print(f"[Prompt] 프롬프트 파일을 읽을 수 없어 기본 프롬프트를 사용합니다: {path}")
+                    updated[name] = PromptTemplate(name, FALLBACK_TEXT, None, None, None)
+                    changed.append(name)
+                continue
+
+            if old and old.path == path and old.mtime_ns == stat.st_mtime_ns and old.size == stat.st_size:
+                updated[name] = old
+                continue
+
+            try:
+                text = _read_text(path)
+            except OSError as e:
+                text = None
+                print(f"[Prompt] {name} 읽기 실패: {e}")
+            if text is None:
+                # 읽기 실패 시 이전 버전 유지
+                if old:
+                    updated[name] = old
+                continue
+
+            template = PromptTemplate(name, text, path, stat.st_mtime_ns, stat.st_size)
+            updated[name] = template
+            if old is None or old.version != template.version:
+                changed.append(name)
+                if old is not None:
+                    print(f"[Prompt] {name} 다시 읽음: {old.version} → {template.version}")
+
+        self._templates = updated
+        if changed:
+            self.reloads += 1
+        return changed
+
+    def get(self, name: Optional[str] = None) -> PromptTemplate:
+        template = self._templates.get(name or DEFAULT_TEMPLATE)
+        if template is None:
+            raise TemplateNotFoundError(f"Unknown prompt template: {name}")
+        return template
+
+    def names(self) -> List[str]:
+        return list(self._templates)
+
+    def list(self) -> List[dict]:
+        return [template.to_dict() for template in self._templates.values()]
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "reloads": self.reloads,
+            "templates": {name: template.version for name, template in self._templates.items()},
+        }
+
+    def start_watching(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                print(f"[Prompt] 템플릿 확인 실패: {e}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 서버 전역 템플릿 저장소
+store = TemplateStore()
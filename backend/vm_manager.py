@@ -122,6 +122,36 @@ def get_slave_python_executable() -> Optional[Path]:
     return python_exe if python_exe.exists() else None
 
 
+def get_master_python_executable() -> Optional[Path]:
+    """
+    Master VM의 Python 실행 파일 경로 반환 (패키지 설치용)
+    
+    Returns:
+        Optional[Path]: Python 실행 파일 경로 (없으면 None)
+    """
+    if sys.platform == "win32":
+        python_exe = MASTER_VM_PATH / "Scripts" / "python.exe"
+    else:
+        python_exe = MASTER_VM_PATH / "bin" / "python"
+    
+    return python_exe if python_exe.exists() else None
+
+
+def create_master_vm() -> Path:
+    """
+    Master VM 생성 (없을 때만, 패키지는 설치하지 않음)
+    
+    Returns:
+        Path: Master VM 경로
+    """
+    if get_master_python_executable() is None:
+        MASTER_VM_PATH.parent.mkdir(parents=True, exist_ok=True)
+        print(f"[VM Manager] Creating master VM...")
+        subprocess.run([sys.executable, "-m", "venv", str(MASTER_VM_PATH)], check=True)
+        print(f"[VM Manager] Master VM created: {MASTER_VM_PATH}")
+    return MASTER_VM_PATH
+
+
 def get_python_version(python_exe: Path) -> tuple:
     """
     Python 실행 파일의 버전 반환
@@ -164,22 +194,125 @@ def verify_python_version_match() -> bool:
     return slave_version == master_version
 
 
+def _get_slave_site_packages() -> Path:
+    """Slave VM의 site-packages 경로 (Master VM으로의 심볼릭 링크)"""
+    if sys.platform == "win32":
+        return SLAVE_VM_PATH / "Lib" / "site-packages"
+    python_version = f"python{sys.version_info.major}.{sys.version_info.minor}"
+    return SLAVE_VM_PATH / "lib" / python_version / "site-packages"
+
+
+def _stat_signature(python_exe: Path) -> Optional[dict]:
+    """
+    subprocess 없이 stat만으로 얻는 Slave VM 식별 정보
+
+    Returns:
+        Optional[dict]: 실행 파일/심볼릭 링크 정보 (없으면 None)
+    """
+    try:
+        st = os.stat(python_exe)  # 심볼릭 링크를 따라간 실제 인터프리터
+        site_packages = _get_slave_site_packages()
+        return {
+            "python_exe": str(python_exe),
+            "real_path": os.path.realpath(python_exe),
+            "st_dev": st.st_dev,
+            "st_ino": st.st_ino,
+            "st_mtime_ns": st.st_mtime_ns,
+            "site_packages_target": os.readlink(site_packages) if site_packages.is_symlink() else None,
+        }
+    except OSError:
+        return None
+
+
+# 마지막으로 검증된 Slave VM 상태 (stat 정보 + 버전)
+_vm_state: Optional[dict] = None
+
+
+def get_vm_state() -> Optional[dict]:
+    """캐시된 Slave VM 상태 반환"""
+    return _vm_state
+
+
+def _probe_vm_state() -> Optional[dict]:
+    """Python 버전을 실제로 실행해서 확인하고 상태 캐시 갱신"""
+    global _vm_state
+
+    python_exe = get_slave_python_executable()
+    signature = _stat_signature(python_exe) if python_exe else None
+    if signature is None:
+        _vm_state = None
+        return None
+
+    signature["version"] = get_python_version(python_exe)
+    _vm_state = signature
+    return _vm_state
+
+
+def is_vm_state_valid() -> bool:
+    """
+    캐시된 상태가 여전히 유효한지 stat만으로 확인 (subprocess 실행 없음)
+    """
+    if _vm_state is None:
+        return False
+
+    python_exe = get_slave_python_executable()
+    if not python_exe:
+        return False
+
+    current = _stat_signature(python_exe)
+    if current is None:
+        return False
+
+    return all(current[key] == _vm_state[key] for key in current)
+
+
 def recreate_slave_vm_if_needed() -> bool:
     """
     Python 버전이 다르면 Slave VM 재생성
+
+    캐시된 상태가 stat 기준으로 그대로면 버전 확인 subprocess를 생략합니다.
+    실행 파일이나 심볼릭 링크가 바뀐 경우에만 다시 확인합니다.
     
     Returns:
         bool: 재생성 여부
     """
-    if not verify_python_version_match():
+    master_version = (sys.version_info.major, sys.version_info.minor)
+
+    if is_vm_state_valid() and _vm_state["version"] == master_version:
+        return False
+
+    state = _probe_vm_state()
+    if state is None or state["version"] != master_version:
         print(f"[VM Manager] Python version mismatch detected")
         print(f"[VM Manager] Recreating slave VM...")
         delete_slave_vm()
         create_slave_vm()
+        _probe_vm_state()
         return True
     return False
 
 
+def verify_vm_at_startup() -> Optional[dict]:
+    """
+    서버 시작 시 Slave VM 검증
+
+    버전을 실제로 확인해 상태 캐시를 채우고, 필요하면 재생성합니다.
+    이후 실행 경로에서는 stat 비교만 수행합니다.
+
+    Returns:
+        Optional[dict]: 검증된 Slave VM 상태
+    """
+    global _vm_state
+    _vm_state = None  # 시작 시에는 항상 다시 확인
+
+    recreated = recreate_slave_vm_if_needed()
+    if not verify_slave_vm():
+        print(f"[VM Manager] Slave VM verification failed: {SLAVE_VM_PATH}")
+    elif not recreated:
+        print(f"[VM Manager] Slave VM verified (Python {_vm_state['version'][0]}.{_vm_state['version'][1]})")
+    return _vm_state
+
+
 def verify_slave_vm() -> bool:
     """
     Slave VM이 제대로 생성되었는지 확인
@@ -196,10 +329,5 @@ def verify_slave_vm() -> bool:
         return False
     
     # site-packages 심볼릭 링크 확인
-    if sys.platform == "win32":
-        slave_site_packages = SLAVE_VM_PATH / "Lib" / "site-packages"
-    else:
-        python_version = f"python{sys.version_info.major}.{sys.version_info.minor}"
-        slave_site_packages = SLAVE_VM_PATH / "lib" / python_version / "site-packages"
-    
+    slave_site_packages = _get_slave_site_packages()
     return slave_site_packages.exists() and slave_site_packages.is_symlink()